@@ -0,0 +1,3 @@
+"""
+Бенчмарки горячих путей. Запуск из корня репозитория: python -m benchmarks.<модуль>
+"""
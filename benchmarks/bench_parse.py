@@ -0,0 +1,72 @@
+"""
+Бенчмарк разбора ответа finam.ru: скорость (строк в секунду) потокового разбора в сравнении с прежним
+разбором через strptime.
+
+python -m benchmarks.bench_parse [<кол-во_строк>]
+"""
+
+import sys
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import List, Callable
+
+from src.equities.finam import Price, _parse_price
+
+
+def make_lines(count: int) -> List[bytes]:
+    """
+    Сформировать синтетический ответ finam.ru с дневными курсами
+
+    :param count: Кол-во строк
+    """
+
+    dt = date(2000, 1, 1)
+    return [f'{(dt + timedelta(days=i)).strftime("%d%m%y")};000000;{100 + i % 50}.25;{101 + i % 50}.5;'
+            f'{99 + i % 50}.75;{100 + i % 50}.5;{1000 + i}\r\n'.encode() for i in range(count)]
+
+
+def parse_strptime(result_str: bytes) -> Price:
+    """
+    Прежний разбор строки ответа
+    """
+    result_values = result_str.decode().split(';')
+    return Price(datetime.strptime(result_values[0], "%d%m%y").date(),
+                 Decimal(result_values[2]),
+                 Decimal(result_values[5]))
+
+
+def measure(parse: Callable[[bytes], Price], lines: List[bytes], repeat: int = 5) -> float:
+    """
+    Измерить скорость разбора, лучший результат из нескольких повторов
+
+    :return: Строк в секунду
+    """
+
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for line in lines:
+            parse(line)
+        best = min(best, time.perf_counter() - start)
+
+    return len(lines) / best
+
+
+def run(count: int = 100_000):
+    """
+    Запустить бенчмарк
+
+    :param count: Кол-во строк
+    """
+
+    lines = make_lines(count)
+    assert all(parse_strptime(line)[:3] == _parse_price(line)[:3] for line in lines[:1000])
+
+    strptime_rate, stream_rate = measure(parse_strptime, lines), measure(_parse_price, lines)
+    print(f'strptime: {strptime_rate:,.0f} строк/с')
+    print(f'stream:   {stream_rate:,.0f} строк/с (x{stream_rate / strptime_rate:.1f})')
+
+
+if __name__ == '__main__':
+    run(*map(int, sys.argv[1:]))
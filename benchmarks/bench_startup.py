@@ -0,0 +1,61 @@
+"""
+Бенчмарк времени запуска: время импорта модулей (python -X importtime) при выполнении команды помощи интерфейса
+командной строки. Время сравнивается с бюджетом, при превышении бюджета код возврата 1.
+
+python -m benchmarks.bench_startup
+"""
+
+import os
+import re
+import subprocess
+import sys
+from typing import Dict
+
+STARTUP_BUDGET_US = 80_000
+"""
+Бюджет суммарного времени импорта модулей проекта и их зависимостей (в микросекундах)
+"""
+
+_IMPORT_TIME = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$')
+
+
+def measure_import_time(code: str) -> Dict[str, int]:
+    """
+    Измерить время импорта модулей в отдельном процессе
+
+    :param code: Выполняемый код
+    :return: Словарь {Модуль верхнего уровня: Кумулятивное время импорта в микросекундах}
+    """
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=root, capture_output=True,
+                             text=True, check=True, env=dict(os.environ, PYTHONPATH=root))
+
+    result = {}
+    for line in process.stderr.splitlines():
+        match = _IMPORT_TIME.match(line)
+        # Учитываем только модули верхнего уровня, время вложенных входит в их кумулятивное время
+        if match and len(match.group(3)) == 1:
+            result[match.group(4)] = result.get(match.group(4), 0) + int(match.group(2))
+    return result
+
+
+def run() -> int:
+    """
+    Запустить бенчмарк
+
+    :return: Код возврата
+    """
+
+    import_time = measure_import_time('from src.interface.cl.app import _execute; _execute([])')
+    total = sum(import_time.values())
+
+    for module, cumulative in sorted(import_time.items(), key=lambda item: -item[1])[:10]:
+        print(f'{cumulative / 1000:8.1f} мс {module}')
+    print(f'Итого: {total / 1000:.1f} мс, бюджет {STARTUP_BUDGET_US / 1000:.1f} мс')
+
+    return 0 if total <= STARTUP_BUDGET_US else 1
+
+
+if __name__ == '__main__':
+    sys.exit(run())
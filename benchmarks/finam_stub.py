@@ -0,0 +1,189 @@
+"""
+Локальный заменитель export.finam.ru для бенчмарков.
+
+Сервер отвечает на запросы /result.txt синтетическими курсами в формате finam.ru (см. finam._iter_fetch_price_chunk)
+для запрошенного отрезка и детализации. Данные детерминированы (зависят только от кода эмитента и даты), поэтому
+результаты бенчмарков воспроизводимы и не требуют сети.
+
+python -m benchmarks.finam_stub [<порт>]
+"""
+
+import http.server
+import sys
+import threading
+import time
+import urllib.parse
+from datetime import datetime, timedelta
+from typing import List
+
+from src.equities.price import Period
+from src.equities.transport import Transport
+
+_PERIOD_MINUTES = {Period.MIN1: 1, Period.MIN5: 5, Period.MIN10: 10, Period.MIN15: 15, Period.MIN30: 30,
+                   Period.HOUR: 60}
+
+_SESSION_MINUTES = 9 * 60
+"""
+Длительность торговой сессии синтетических данных (10:00 - 19:00)
+"""
+
+
+class FinamStub:
+    """
+    Локальный сервер синтетических курсов.
+
+    >>> with FinamStub() as stub:
+    ...     len(stub.make_lines(Period.DAY, 'SBER', datetime(2019, 1, 1), datetime(2019, 1, 7)))
+    5
+    """
+
+    def __init__(self, port: int = 0, latency: float = 0.0, ticks_per_day: int = 1000):
+        """
+        :param port: Порт. Если 0, выбирается свободный порт
+        :param latency: Задержка ответа в секундах
+        :param ticks_per_day: Кол-во тиков в торговый день
+        """
+
+        self.latency = latency
+        self.ticks_per_day = ticks_per_day
+        self.request_count = 0
+
+        self.fail_count = 0
+        """
+        Кол-во следующих запросов, на которые сервер отвечает ошибкой 503 (для проверки повторов запросов)
+        """
+
+        self.request_list = []
+        """
+        Запрошенные отрезки: кортежи (Код эмитента, Детализация, Дата начала, Дата конца)
+        """
+
+        stub = self
+
+        class _Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                stub.request_count += 1
+                query = dict(urllib.parse.parse_qsl(urllib.parse.urlparse(self.path).query))
+
+                if stub.latency:
+                    time.sleep(stub.latency)
+
+                if stub.fail_count > 0:
+                    stub.fail_count -= 1
+                    self.send_response(503)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+
+                period = Period(int(query['p']))
+                dt_left = datetime.strptime(query['from'], '%d.%m.%Y')
+                dt_right = datetime.strptime(query['to'], '%d.%m.%Y')
+                stub.request_list.append((query['code'], period, dt_left.date(), dt_right.date()))
+
+                body = ''.join(f'{line}\r\n' for line in stub.make_lines(
+                    period, query['code'], dt_left, dt_right)).encode()
+
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *_):
+                pass
+
+        self._server = http.server.ThreadingHTTPServer(('127.0.0.1', port), _Handler)
+        self._server.daemon_threads = True
+        self._thread = None
+
+    def get_port(self) -> int:
+        """
+        Получить порт
+        """
+        return self._server.server_address[1]
+
+    def transport(self, **kwargs) -> Transport:
+        """
+        Получить транспорт к серверу
+
+        :param kwargs: Параметры транспорта (см. Transport)
+        """
+        return Transport('127.0.0.1', self.get_port(), **kwargs)
+
+    def start(self) -> 'FinamStub':
+        """
+        Запустить сервер в фоновом потоке
+        """
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Остановить сервер
+        """
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'FinamStub':
+        return self.start()
+
+    def __exit__(self, *_):
+        self.stop()
+
+    def make_lines(self, period: Period, issuer_code: str, dt_left: datetime, dt_right: datetime) -> List[str]:
+        """
+        Сформировать строки ответа за отрезок. Торговые дни - с понедельника по пятницу
+
+        :param period: Детализация
+        :param issuer_code: Код эмитента
+        :param dt_left: Дата начала отрезка
+        :param dt_right: Дата конца отрезка
+        """
+
+        seed = sum(map(ord, issuer_code))
+
+        result = []
+        day = dt_left
+        while day <= dt_right:
+            if day.weekday() < 5:
+                base = 100 + (seed + day.toordinal()) % 50
+                if period == Period.TICK:
+                    step = _SESSION_MINUTES * 60 // self.ticks_per_day
+                    result.extend(f'{_time(day, i * step)};{base + i % 10 / 10:.2f};{1 + i % 7};{i};B'
+                                  for i in range(self.ticks_per_day))
+                elif period in _PERIOD_MINUTES:
+                    minutes = _PERIOD_MINUTES[period]
+                    result.extend(_bar(_time(day, i * minutes * 60), base + i % 10 / 10, 10 + i)
+                                  for i in range(_SESSION_MINUTES // minutes))
+                elif period == Period.DAY or (period == Period.WEEK and day.weekday() == 0) or \
+                        (period == Period.MONTH and day.day == 1):
+                    result.append(_bar(day.strftime('%d%m%y;000000'), base, 1000 + day.toordinal() % 1000))
+            day += timedelta(days=1)
+
+        return result
+
+
+def _time(day: datetime, second: int) -> str:
+    """
+    Получить дату и время в формате 'ддммгг;ччммсс', отсчет времени от начала сессии (10:00)
+    """
+    return (day + timedelta(hours=10, seconds=second)).strftime('%d%m%y;%H%M%S')
+
+
+def _bar(dt: str, base: float, volume: int) -> str:
+    """
+    Получить строку свечи
+    """
+    return f'{dt};{base:.2f};{base + 1:.2f};{base - 1:.2f};{base + 0.5:.2f};{volume}'
+
+
+if __name__ == '__main__':
+    with FinamStub(*map(int, sys.argv[1:2])) as _stub:
+        print(f'Сервер запущен: http://127.0.0.1:{_stub.get_port()}/result.txt')
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
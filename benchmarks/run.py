@@ -0,0 +1,181 @@
+"""
+Набор бенчмарков горячих путей, выполняется без сети относительно локального заменителя finam.ru (см. finam_stub):
+ * Поиск по перечню эмитентов (get_issuer_list)
+ * Получение и разбор курсов (get_price) дневной, минутной и тиковой детализации
+ * Выполнение команды менеджером команд (Manager.run_cmd)
+ * Запрос к web странице
+
+Каждый замер повторяется, в результат попадает медиана. Результат можно сохранить в json и сравнить с
+результатом другой ревизии.
+
+python -m benchmarks.run [--latency <сек>] [--ticks <кол-во_в_день>] [--output <файл>] [--compare <файл>]
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import time
+from datetime import date
+from typing import Callable, Dict
+
+from benchmarks.finam_stub import FinamStub
+from src.equities.finam import get_issuer_list, get_price
+from src.equities.price import Period
+from src.equities.price_store import get_price_store, set_price_store
+from src.equities.transport import get_transport, set_transport
+
+REPEAT = 7
+"""
+Кол-во повторов замера
+"""
+
+
+def measure(func: Callable[[], object], number: int = 1) -> float:
+    """
+    Измерить время выполнения
+
+    :param func: Функция
+    :param number: Кол-во выполнений в одном замере
+    :return: Медиана времени одного выполнения в секундах
+    """
+
+    sample_list = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        sample_list.append((time.perf_counter() - start) / number)
+    return statistics.median(sample_list)
+
+
+def bench_issuer_list() -> Dict[str, float]:
+    """
+    Поиск по перечню эмитентов, мкс на запрос
+    """
+    return {f'issuer_list[{query}]_us': measure(lambda: get_issuer_list([query], 5, fuzzy=True), 1000) * 1e6
+            for query in ('SBER', 'газ', 'ао', 'ГМКНорНек')}
+
+
+def bench_price() -> Dict[str, float]:
+    """
+    Получение и разбор курсов, строк в секунду
+    """
+
+    result = {}
+    for name, period, dt_left, dt_right in (('day_20y', Period.DAY, date(2000, 1, 1), date(2019, 12, 31)),
+                                            ('min1_1m', Period.MIN1, date(2019, 1, 1), date(2019, 1, 31)),
+                                            ('tick_1d', Period.TICK, date(2019, 1, 10), date(2019, 1, 10))):
+        def _get_price():
+            return get_price('SBER', dt_left, dt_right, period)
+
+        result[f'price[{name}]_rows_per_s'] = len(_get_price()) / measure(_get_price)
+
+    return result
+
+
+def bench_run_cmd() -> Dict[str, float]:
+    """
+    Выполнение команды менеджером команд, мкс на команду
+    """
+
+    from src.interface.core.commands.manager import Manager
+
+    Manager.run_cmd('find', ['сбер'])
+    return {
+        'run_cmd[help]_us': measure(lambda: Manager.run_cmd('help', []), 1000) * 1e6,
+        'run_cmd[find_cached]_us': measure(lambda: Manager.run_cmd('find', ['сбер']), 1000) * 1e6,
+    }
+
+
+def bench_web() -> Dict[str, float]:
+    """
+    Запрос к web странице, мс на запрос. Страница формируется потоково, поэтому время включает получение всего
+    ответа
+    """
+
+    # Загрузка web интерфейса включает хранилище курсов, бенчмарки выполняются без хранилища
+    store = get_price_store()
+    from src.interface.webserver.app import app
+    set_price_store(store)
+
+    client = app.test_client()
+    price_data = {'cl': 'price SBER 01.01.18 31.12.18'}
+    return {
+        'web[help]_ms': measure(lambda: client.get('/').get_data(), 100) * 1e3,
+        'web[price_1y_cached]_ms': measure(lambda: client.post('/', data=price_data).get_data(), 10) * 1e3,
+    }
+
+
+def run(latency: float = 0.0, ticks_per_day: int = 10_000) -> Dict[str, object]:
+    """
+    Запустить набор бенчмарков
+
+    :param latency: Задержка ответа заменителя finam.ru в секундах
+    :param ticks_per_day: Кол-во тиков в торговый день
+    :return: Результат {Показатель: значение} и сведения об окружении
+    """
+
+    previous_transport, previous_store = get_transport(), get_price_store()
+    set_price_store(None)
+
+    with FinamStub(latency=latency, ticks_per_day=ticks_per_day) as stub:
+        set_transport(stub.transport())
+        try:
+            result = {}
+            for bench in (bench_issuer_list, bench_price, bench_run_cmd, bench_web):
+                result.update(bench())
+        finally:
+            set_transport(previous_transport)
+            set_price_store(previous_store)
+
+    return {
+        'revision': _get_revision(),
+        'python': platform.python_version(),
+        'latency': latency,
+        'ticks_per_day': ticks_per_day,
+        'result': result,
+    }
+
+
+def _get_revision() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def _print(report: Dict[str, object], baseline: Dict[str, object] = None):
+    """
+    Вывести результат, при наличии базового результата - с относительным изменением
+    """
+
+    print(f'Ревизия {report["revision"] or "?"}, python {report["python"]}')
+    for name, value in report['result'].items():
+        line = f'{name:40} {value:14,.2f}'
+        if baseline and name in baseline['result']:
+            line += f' ({(value / baseline["result"][name] - 1) * 100:+.1f}% к {baseline["revision"] or "?"})'
+        print(line)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Набор бенчмарков')
+    parser.add_argument('--latency', type=float, default=0.0, help='Задержка ответа finam.ru в секундах')
+    parser.add_argument('--ticks', type=int, default=10_000, help='Кол-во тиков в торговый день')
+    parser.add_argument('--output', help='Сохранить результат в json файл')
+    parser.add_argument('--compare', help='Сравнить с результатом из json файла')
+    args = parser.parse_args()
+
+    _report = run(args.latency, args.ticks)
+
+    _baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as file:
+            _baseline = json.load(file)
+    _print(_report, _baseline)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(_report, file, ensure_ascii=False, indent=2)
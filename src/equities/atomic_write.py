@@ -0,0 +1,37 @@
+"""
+Атомарная перезапись файла: содержимое записывается во временный файл рядом с исходным, который затем заменяет
+исходный (os.replace). Читатели видят либо прежний, либо новый файл целиком; открытый прежний файл (в т.ч. через
+mmap) не изменяется. Имя временного файла уникально, поэтому файл могут одновременно перезаписывать несколько
+процессов.
+"""
+
+import os
+import tempfile
+from typing import Iterable
+
+
+def write_atomic(path: str, chunk_list: Iterable[bytes]):
+    """
+    Атомарно перезаписать файл
+
+    :param path: Путь файла
+    :param chunk_list: Части содержимого
+
+    :raise: OSError
+
+    >>> path = os.path.join(tempfile.mkdtemp(), 'a.bin')
+    >>> write_atomic(path, [b'1', b'2'])
+    >>> open(path, 'rb').read(), os.listdir(os.path.dirname(path))
+    (b'12', ['a.bin'])
+    """
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f'.{os.path.basename(path)}.', suffix='.tmp')
+    try:
+        with open(fd, 'wb') as file:
+            file.writelines(chunk_list)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
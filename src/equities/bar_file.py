@@ -0,0 +1,300 @@
+"""
+Двоичный файл курсов (свечей) одного эмитента с одной детализацией.
+
+Файл состоит из заголовка и записей фиксированной длины, упорядоченных по времени. Запись - время (секунды от
+1970-01-01, для детализации от дня - начало дня) и цены OHLC в фиксированной точке (целое, умноженное на
+10 ^ PRICE_DIGITS), объем. Файл открывается через mmap без разбора: запись по номеру читается по смещению, отрезок
+дат находится двоичным поиском по времени (O(log n) обращений к страницам файла), поэтому чтение недели минутных
+курсов из истории за 20 лет затрагивает только нужные страницы. Новые курсы дописываются в конец файла.
+
+Формат заголовка (little-endian): сигнатура, версия, кол-во знаков дробной части цен, признак внутридневной
+детализации.
+"""
+
+import bisect
+import mmap
+import os
+import struct
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Iterable, List, Optional, Tuple
+
+from src.equities.atomic_write import write_atomic
+from src.equities.price import Price
+
+PRICE_DIGITS = 8
+"""
+Кол-во знаков дробной части цены
+"""
+
+RECORD = struct.Struct('<qqqqqq')
+"""
+Запись: время, открытие, максимум, минимум, закрытие, объем
+"""
+
+NO_VALUE = -2 ** 63
+"""
+Значение записи 'нет данных' (цена либо объем None)
+"""
+
+_MAGIC = b'EQBR'
+
+_VERSION = 1
+
+_HEADER = struct.Struct('<4sHBB8x')
+
+_EPOCH = datetime(1970, 1, 1)
+
+_EPOCH_ORDINAL = _EPOCH.toordinal()
+
+_DAY_SECONDS = 24 * 60 * 60
+
+_SCALE = 10 ** PRICE_DIGITS
+
+
+def to_timestamp(dt) -> int:
+    """
+    Получить время записи по дате (дате и времени)
+
+    >>> to_timestamp(date(1970, 1, 2)), to_timestamp(datetime(1970, 1, 2, 0, 1))
+    (86400, 86460)
+    """
+
+    if isinstance(dt, datetime):
+        return (dt.toordinal() - _EPOCH_ORDINAL) * _DAY_SECONDS + dt.hour * 3600 + dt.minute * 60 + dt.second
+    return (dt.toordinal() - _EPOCH_ORDINAL) * _DAY_SECONDS
+
+
+def pack_price(price_list: Iterable[Price]) -> bytes:
+    """
+    Получить записи курсов
+
+    :param price_list: Курсы по возрастанию даты
+
+    :raise: ValueError
+
+    >>> unpack_price(pack_price([Price(date(2019, 1, 3), Decimal('186.5'), Decimal('188.2'), Decimal('189'),
+    ...                                Decimal('0.00012345'), 1000)]), False)
+    [Price(dt=datetime.date(2019, 1, 3), open=Decimal('186.5'), close=Decimal('188.2'), high=Decimal('189'), \
+low=Decimal('0.00012345'), volume=1000)]
+    """
+
+    return b''.join(RECORD.pack(to_timestamp(price.dt), _to_fixed(price.open), _to_fixed(price.high),
+                                _to_fixed(price.low), _to_fixed(price.close),
+                                NO_VALUE if price.volume is None else price.volume)
+                    for price in price_list)
+
+
+def unpack_price(data: bytes, intraday: bool) -> List[Price]:
+    """
+    Получить курсы по записям
+
+    :param data: Записи
+    :param intraday: Внутридневная детализация (дата курса - дата и время)
+    """
+
+    result = []
+    for timestamp, open_, high, low, close, volume in RECORD.iter_unpack(data):
+        day, second = divmod(timestamp, _DAY_SECONDS)
+        dt = date.fromordinal(day + _EPOCH_ORDINAL)
+        if intraday:
+            dt = datetime(dt.year, dt.month, dt.day) + timedelta(seconds=second)
+        result.append(Price(dt, _from_fixed(open_), _from_fixed(close), _from_fixed(high), _from_fixed(low),
+                            None if volume == NO_VALUE else volume))
+    return result
+
+
+def _to_fixed(value: Optional[Decimal]) -> int:
+    """
+    Получить цену в фиксированной точке
+
+    :raise: ValueError
+    """
+
+    if value is None:
+        return NO_VALUE
+
+    result = value.scaleb(PRICE_DIGITS)
+    if result != result.to_integral_value():
+        raise ValueError(f'Цена {value} содержит более {PRICE_DIGITS} знаков дробной части!')
+    return int(result)
+
+
+def _from_fixed(value: int) -> Optional[Decimal]:
+    """
+    Получить цену по значению в фиксированной точке, без незначащих нулей дробной части
+    """
+
+    if value == NO_VALUE:
+        return None
+
+    integer, fraction = divmod(abs(value), _SCALE)
+    sign = '-' if value < 0 else ''
+    if not fraction:
+        return Decimal(f'{sign}{integer}')
+    return Decimal(f'{sign}{integer}.{fraction:0{PRICE_DIGITS}d}'.rstrip('0'))
+
+
+class _TimestampView:
+    """
+    Последовательность времени записей файла для двоичного поиска (bisect)
+    """
+
+    def __init__(self, buffer: mmap.mmap, count: int):
+        self._buffer = buffer
+        self._count = count
+
+    def __getitem__(self, index: int) -> int:
+        return struct.unpack_from('<q', self._buffer, _HEADER.size + index * RECORD.size)[0]
+
+    def __len__(self) -> int:
+        return self._count
+
+
+class BarFile:
+    """
+    Файл курсов, открытый для чтения. Содержимое файла на момент открытия не меняется при дописывании курсов
+
+    >>> import tempfile
+    >>> path = os.path.join(tempfile.mkdtemp(), 'SBER_8.bars')
+    >>> append_bars(path, False, pack_price([Price(date(2019, 1, d), Decimal(d), Decimal(d)) for d in (3, 4, 8)]))
+    >>> with BarFile(path) as bar_file:
+    ...     [price.dt.day for price in bar_file.read_price(*bar_file.find_range(date(2019, 1, 4), date(2019, 1, 7)))]
+    [4]
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: Путь файла
+
+        :raise: OSError, ValueError
+        """
+
+        with open(path, 'rb') as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self.intraday = _read_header(self._mmap)
+        """
+        Внутридневная детализация
+        """
+
+        # Неполная последняя запись (прерванное дописывание) не учитывается
+        self._count = (len(self._mmap) - _HEADER.size) // RECORD.size
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __enter__(self) -> 'BarFile':
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def find_range(self, dt_left: date, dt_right: date) -> Tuple[int, int]:
+        """
+        Найти записи за отрезок дат (включительно) двоичным поиском
+
+        :return: Кортеж (Номер первой записи, Номер записи после последней)
+        """
+
+        view = _TimestampView(self._mmap, self._count)
+        return (bisect.bisect_left(view, to_timestamp(dt_left)),
+                bisect.bisect_left(view, to_timestamp(dt_right) + _DAY_SECONDS))
+
+    def read_bytes(self, left: int, right: int) -> bytes:
+        """
+        Получить записи с номерами [left, right)
+        """
+        return self._mmap[_HEADER.size + left * RECORD.size:_HEADER.size + right * RECORD.size]
+
+    def read_price(self, left: int, right: int) -> List[Price]:
+        """
+        Получить курсы записей с номерами [left, right)
+        """
+        return unpack_price(self.read_bytes(left, right), self.intraday)
+
+    def get_last_timestamp(self) -> Optional[int]:
+        """
+        Получить время последней записи. None, если записей нет
+        """
+        return _TimestampView(self._mmap, self._count)[self._count - 1] if self._count else None
+
+    def close(self):
+        """
+        Закрыть файл
+        """
+        self._mmap.close()
+
+
+def _read_header(buffer) -> bool:
+    """
+    Проверить заголовок файла
+
+    :raise: ValueError
+
+    :return: Признак внутридневной детализации
+    """
+
+    if len(buffer) < _HEADER.size:
+        raise ValueError('Некорректный формат файла курсов!')
+
+    magic, version, digits, intraday = _HEADER.unpack_from(buffer, 0)
+    if magic != _MAGIC or version != _VERSION or digits != PRICE_DIGITS:
+        raise ValueError('Некорректный формат файла курсов!')
+    return bool(intraday)
+
+
+def write_bars(path: str, intraday: bool, data_list: Iterable[bytes]):
+    """
+    Перезаписать файл курсов атомарно (см. atomic_write)
+
+    :param path: Путь файла
+    :param intraday: Внутридневная детализация
+    :param data_list: Части записей, по возрастанию времени
+    """
+
+    write_atomic(path, [_HEADER.pack(_MAGIC, _VERSION, PRICE_DIGITS, intraday), *data_list])
+
+
+def append_bars(path: str, intraday: bool, data: bytes):
+    """
+    Дописать записи в конец файла курсов (файл создается при отсутствии). Файл не усекается, поэтому файлы, открытые
+    для чтения (BarFile), остаются корректными. Если последняя запись файла неполная (прерванное дописывание), файл
+    перезаписывается без нее
+
+    :param path: Путь файла
+    :param intraday: Внутридневная детализация
+    :param data: Записи, время которых не меньше времени последней записи файла
+
+    :raise: ValueError
+
+    >>> import tempfile
+    >>> path = os.path.join(tempfile.mkdtemp(), 'SBER_8.bars')
+    >>> append_bars(path, False, pack_price([Price(date(2019, 1, 3), Decimal(1), Decimal(1))]))
+    >>> with open(path, 'ab') as file:
+    ...     _ = file.write(b'partial')
+    >>> append_bars(path, False, pack_price([Price(date(2019, 1, 4), Decimal(2), Decimal(2))]))
+    >>> with BarFile(path) as bar_file:
+    ...     [price.dt.day for price in bar_file.read_price(0, len(bar_file))]
+    [3, 4]
+    """
+
+    try:
+        file = open(path, 'r+b')
+    except FileNotFoundError:
+        write_bars(path, intraday, [data])
+        return
+
+    with file:
+        _read_header(file.read(_HEADER.size))
+
+        size = file.seek(0, os.SEEK_END)
+        partial = (size - _HEADER.size) % RECORD.size
+        if not partial:
+            file.write(data)
+            return
+
+        file.seek(_HEADER.size)
+        record_data = file.read(size - _HEADER.size - partial)
+
+    write_bars(path, intraday, [record_data, data])
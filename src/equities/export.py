@@ -0,0 +1,257 @@
+"""
+Выгрузка курсов ценных бумаг в файлы.
+
+Курсы каждого эмитента выгружаются в отдельный файл по мере получения частей отрезка от finam.ru, не накапливаясь в
+памяти.
+Поддерживаются форматы csv, а также parquet и arrow (Arrow IPC) при наличии пакета pyarrow.
+
+Эмитенты выгружаются параллельно. Выгруженные эмитенты отмечаются в файле контрольной точки, поэтому прерванную
+выгрузку можно продолжить повторным запуском с теми же параметрами.
+"""
+
+import csv
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Set
+
+from src.equities.finam import iter_price
+from src.equities.price import Price, Period
+
+EXPORT_FORMATS = ('csv', 'parquet', 'arrow')
+"""
+Форматы выгрузки
+"""
+
+BATCH_ROWS = 50_000
+"""
+Кол-во строк в одном блоке записи колоночных форматов
+"""
+
+CHECKPOINT_FILE = 'export.checkpoint'
+"""
+Имя файла контрольной точки в каталоге выгрузки
+"""
+
+
+class ExportError(Exception):
+    """
+    Исключение 'Выгрузка невозможна'
+    """
+    pass
+
+
+class ExportResult(NamedTuple):
+    """
+    Результат выгрузки
+    """
+
+    exported: Dict[str, int]
+    """
+    Выгруженные эмитенты {Код: Кол-во строк}
+    """
+
+    skipped: List[str]
+    """
+    Эмитенты, выгруженные ранее (по контрольной точке)
+    """
+
+    failed: Dict[str, Exception]
+    """
+    Эмитенты, выгрузка которых завершилась ошибкой {Код: Исключение}
+    """
+
+
+def export_price(issuer_code_list: Iterable[str], dt_left: date, dt_right: date, root: str,
+                 period: Period = Period.DAY, fmt: str = 'csv', max_workers: int = 4) -> ExportResult:
+    """
+    Выгрузить курсы эмитентов за временной отрезок, каждого эмитента в файл '<код>_<детализация>.<формат>'.
+    Файл эмитента появляется в каталоге только после успешной выгрузки. Ошибка по одному эмитенту не прерывает
+    выгрузку остальных, такой эмитент будет выгружен при повторном запуске.
+
+    :param issuer_code_list: Список кодов эмитентов
+    :param dt_left: Дата начала отрезка
+    :param dt_right: Дата конца отрезка
+    :param root: Каталог выгрузки
+    :param period: Детализация
+    :param fmt: Формат (см. EXPORT_FORMATS)
+    :param max_workers: Кол-во одновременно выгружаемых эмитентов
+
+    :raise: ExportError
+    """
+
+    if fmt not in EXPORT_FORMATS:
+        raise ExportError(f'Формат "{fmt}" не поддерживается!')
+    if fmt != 'csv':
+        _import_pyarrow()
+
+    os.makedirs(root, exist_ok=True)
+    checkpoint = _Checkpoint(os.path.join(root, CHECKPOINT_FILE),
+                             f'{Period(period).name};{dt_left.isoformat()};{dt_right.isoformat()};{fmt}')
+
+    code_list = list(dict.fromkeys(code.upper() for code in issuer_code_list))
+    done = checkpoint.get_done()
+    pending_list = [code for code in code_list if code not in done]
+
+    def _export(issuer_code: str):
+        path = os.path.join(root, f'{issuer_code}_{Period(period).name.lower()}.{fmt}')
+        try:
+            row_count = _write_file(iter_price(issuer_code, dt_left, dt_right, period, use_store=False),
+                                    path, fmt, period)
+        except Exception as err:
+            return err
+
+        checkpoint.add(issuer_code)
+        return row_count
+
+    result = ExportResult({}, [code for code in code_list if code in done], {})
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for issuer_code, value in zip(pending_list, executor.map(_export, pending_list)):
+            if isinstance(value, Exception):
+                result.failed[issuer_code] = value
+            else:
+                result.exported[issuer_code] = value
+
+    return result
+
+
+class _Checkpoint:
+    """
+    Контрольная точка выгрузки: первая строка - параметры выгрузки, далее коды выгруженных эмитентов.
+    Контрольная точка с другими параметрами выгрузки не учитывается.
+    """
+
+    def __init__(self, path: str, params: str):
+        """
+        :param path: Путь файла
+        :param params: Параметры выгрузки
+        """
+
+        self._path = path
+        self._lock = threading.Lock()
+
+        line_list = []
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as file:
+                line_list = file.read().splitlines()
+
+        if line_list[:1] == [params]:
+            self._done = set(line_list[1:])
+        else:
+            self._done = set()
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write(f'{params}\n')
+
+    def get_done(self) -> Set[str]:
+        """
+        Получить коды выгруженных эмитентов
+        """
+        return set(self._done)
+
+    def add(self, issuer_code: str):
+        """
+        Отметить эмитента выгруженным
+
+        :param issuer_code: Код эмитента
+        """
+
+        with self._lock:
+            with open(self._path, 'a', encoding='utf-8') as file:
+                file.write(f'{issuer_code}\n')
+                file.flush()
+                os.fsync(file.fileno())
+            self._done.add(issuer_code)
+
+
+def _write_file(price_iter: Iterator[Price], path: str, fmt: str, period: Period) -> int:
+    """
+    Записать курсы в файл. Запись ведется во временный файл, который по окончании переименовывается
+
+    :return: Кол-во строк
+    """
+
+    tmp_path = f'{path}.part'
+    try:
+        if fmt == 'csv':
+            row_count = _write_csv(price_iter, tmp_path)
+        else:
+            row_count = _write_arrow(price_iter, tmp_path, fmt, period)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return row_count
+
+
+def _write_csv(price_iter: Iterator[Price], path: str) -> int:
+    row_count = 0
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(Price._fields)
+        for price in price_iter:
+            writer.writerow((price.dt.isoformat(), price.open, price.close, _or_empty(price.high),
+                             _or_empty(price.low), _or_empty(price.volume)))
+            row_count += 1
+    return row_count
+
+
+def _or_empty(value) -> object:
+    return '' if value is None else value
+
+
+def _write_arrow(price_iter: Iterator[Price], path: str, fmt: str, period: Period) -> int:
+    """
+    Записать курсы в колоночном формате блоками по BATCH_ROWS строк
+    """
+
+    pa = _import_pyarrow()
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([('dt', pa.date32() if period >= Period.DAY else pa.timestamp('s')),
+                        ('open', pa.float64()), ('close', pa.float64()), ('high', pa.float64()),
+                        ('low', pa.float64()), ('volume', pa.int64())])
+
+    def _to_batch(price_list: List[Price]):
+        return pa.record_batch([
+            [price.dt for price in price_list],
+            [float(price.open) for price in price_list],
+            [float(price.close) for price in price_list],
+            [None if price.high is None else float(price.high) for price in price_list],
+            [None if price.low is None else float(price.low) for price in price_list],
+            [price.volume for price in price_list],
+        ], schema=schema)
+
+    row_count = 0
+    writer = pq.ParquetWriter(path, schema) if fmt == 'parquet' else pa.ipc.new_file(path, schema)
+    with writer:
+        price_list = []
+        for price in price_iter:
+            price_list.append(price)
+            if len(price_list) == BATCH_ROWS:
+                writer.write_batch(_to_batch(price_list))
+                row_count += len(price_list)
+                price_list = []
+
+        if price_list:
+            writer.write_batch(_to_batch(price_list))
+            row_count += len(price_list)
+
+    return row_count
+
+
+def _import_pyarrow():
+    """
+    Импортировать необязательный пакет pyarrow
+
+    :raise: ExportError
+    """
+
+    try:
+        import pyarrow
+        import pyarrow.ipc
+    except ImportError:
+        raise ExportError('Для форматов parquet и arrow требуется пакет pyarrow!')
+    return pyarrow
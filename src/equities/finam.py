@@ -3,26 +3,42 @@ API к данным акций российских эмитентов от fina
 
 Обзор возможностей:
 
-* Поиск по переченю ценных бумаг (акций).
+* Поиск по переченю ценных бумаг (акций) с ранжированием результата (см. issuer_index).
 
-* Курс на указанный период
+* Курс (OHLCV) на указанный период с детализацией от тиков до месяца, в том числе одновременно по нескольким
+  эмитентам. Курсы за закрытые дни сохраняются в локальном хранилище (см. price_store), у finam.ru запрашиваются
+  только отсутствующие в хранилище отрезки. Большие отрезки запрашиваются частями параллельно. Курс можно получать
+  потоково (см. iter_price), по мере получения частей отрезка от finam.ru.
+
+Запросы к finam.ru выполняются через общий пул постоянных соединений (см. transport). Одновременные одинаковые
+запросы курса объединяются в один запрос.
 """
 
-from datetime import datetime
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
 from decimal import Decimal
-from typing import List, Tuple, NamedTuple
-import urllib.request
+from typing import List, Tuple, Dict, Union, Iterator
 
-from src.equities.issuer_list import ISSUER_LIST
+from src.equities.issuer_directory import IssuerDirectory, get_issuers, get_market
+from src.equities.issuer_index import IssuerIndex, IssuerSearch
+from src.equities.price import Price, Period, price_day
+from src.equities.price_store import get_price_store
+from src.equities.resilience import SingleFlight
+from src.equities.transport import get_transport
+from src.metrics import REGISTRY, Counter, Histogram
 
 
-def get_issuer_list(search_str_list: List[str], result_max: int) -> List[Tuple[str, str]]:
+def get_issuer_list(search_str_list: List[str], result_max: int, fuzzy: bool = False) -> List[Tuple[str, str]]:
     """
     Получить список ценных бумаг по поисковой строке.
-    Поиск проиходит по коду или названию без учета регистра.
+    Поиск проиходит по коду или названию без учета регистра. Результат упорядочен по релевантности: точное
+    совпадение кода, совпадение начала кода или названия, вхождение подстроки.
 
     :param search_str_list: Список строк поиска. Если список пуст, соответствие щитается безуусловным.
     :param int result_max: Максимальный результат. Если 0, без ограничений.
+    :param fuzzy: Если точных совпадений нет, искать с учетом опечаток
 
     :return: Список кортежей (Код, Название)
 
@@ -31,40 +47,63 @@ def get_issuer_list(search_str_list: List[str], result_max: int) -> List[Tuple[s
 
     >>> get_issuer_list(['РогаИКопыта'], 0)
     []
+
+    >>> get_issuer_list(['ГМКНорНек'], 0, fuzzy=True)
+    [('GMKN', 'ГМКНорНик')]
     """
 
-    result = []
-    for code, data in ISSUER_LIST.items():
-        name = data[0]
-        if not search_str_list or all(search_str.upper() in code.upper() or search_str.upper() in name.upper()
-                                      for search_str in search_str_list):
-            result.append((code, name))
+    return _get_issuer_index().search(search_str_list, result_max, fuzzy)
 
-            if len(result) == result_max:
-                break
 
-    return result
+_issuer_index = None
 
+_issuer_index_source = None
+"""
+Справочник эмитентов, по которому построен поисковый индекс
+"""
 
-class Price(NamedTuple):
-    """
-    Курс ценной бумаги
-    """
 
-    dt: datetime.date
+def _get_issuer_index() -> IssuerSearch:
     """
-    Дата
+    Получить поисковый индекс эмитентов. Справочник из файла содержит индекс, для встроенного перечня индекс
+    строится в памяти при первом обращении
     """
 
-    open: Decimal
-    """
-    Цена на начало дня
-    """
+    global _issuer_index, _issuer_index_source
+    issuers = get_issuers()
+    if isinstance(issuers, IssuerDirectory):
+        return issuers
 
-    close: Decimal
-    """
-    Цена на окончания дня
-    """
+    if _issuer_index is None or _issuer_index_source is not issuers:
+        _issuer_index = IssuerIndex(issuers)
+        _issuer_index_source = issuers
+    return _issuer_index
+
+
+_CHUNK_DAYS = {Period.TICK: 1, Period.MIN1: 31, Period.MIN5: 92, Period.MIN10: 92, Period.MIN15: 183,
+               Period.MIN30: 183, Period.HOUR: 366}
+"""
+Максимальная длина отрезка (в днях) одного запроса к finam.ru по детализации. Отрезки длиннее разбиваются на части.
+Для детализации от дня ограничения нет.
+"""
+
+_CHUNK_WORKERS = 4
+"""
+Максимальное кол-во одновременных запросов частей отрезка
+"""
+
+
+_FETCH_NETWORK_SECONDS = REGISTRY.add(Histogram(
+    'finam_fetch_network_seconds', 'Время запроса и чтения ответа finam.ru', ('period',)))
+_FETCH_PARSE_SECONDS = REGISTRY.add(Histogram(
+    'finam_fetch_parse_seconds', 'Время разбора ответа finam.ru', ('period',)))
+_FETCH_BYTES = REGISTRY.add(Counter('finam_fetch_bytes_total', 'Объем ответов finam.ru в байтах', ('period',)))
+_FETCH_ROWS = REGISTRY.add(Counter('finam_fetch_rows_total', 'Кол-во строк ответов finam.ru', ('period',)))
+
+_price_flight = SingleFlight()
+"""
+Объединение одновременных одинаковых запросов курса
+"""
 
 
 class NotFoundIssuer(Exception):
@@ -74,13 +113,18 @@ class NotFoundIssuer(Exception):
     pass
 
 
-def get_price(issuer_code: str, dt_left: datetime.date, dt_right: datetime.date) -> List[Price]:
+def get_price(issuer_code: str, dt_left: datetime.date, dt_right: datetime.date,
+              period: Period = Period.DAY) -> List[Price]:
     """
     Получить курс за временной отрезок.
+    Курсы за закрытые дни берутся из локального хранилища, недостающие отрезки запрашиваются у finam.ru и
+    добавляются в хранилище. Текущий день всегда запрашивается у finam.ru. Одновременные запросы с одинаковыми
+    параметрами выполняются однократно.
 
     :param issuer_code: Код эмитента
     :param dt_left: Дата конца отрезка
     :param dt_right: Дата начала отрезка
+    :param period: Детализация
 
     :raise: NotFoundIssuer
 
@@ -90,20 +134,161 @@ def get_price(issuer_code: str, dt_left: datetime.date, dt_right: datetime.date)
     finam.NotFoundIssuer
     """
 
-    if issuer_code.upper() not in ISSUER_LIST:
+    key = (issuer_code.upper(), int(period), dt_left, dt_right)
+    return list(_price_flight.do(key, lambda: list(iter_price(issuer_code, dt_left, dt_right, period))))
+
+
+def iter_price(issuer_code: str, dt_left: datetime.date, dt_right: datetime.date,
+               period: Period = Period.DAY, use_store: bool = True) -> Iterator[Price]:
+    """
+    Получить курс за временной отрезок потоково, в порядке возрастания даты.
+    Курсы отрезков, отсутствующих в хранилище, возвращаются по мере получения частей отрезка от finam.ru.
+
+    :param issuer_code: Код эмитента
+    :param dt_left: Дата начала отрезка
+    :param dt_right: Дата конца отрезка
+    :param period: Детализация
+    :param use_store: Использовать локальное хранилище. Без хранилища курсы не накапливаются в памяти, что позволяет
+    получать отрезки любой длины
+
+    :raise: NotFoundIssuer
+    """
+
+    if issuer_code.upper() not in get_issuers():
         raise NotFoundIssuer()
 
-    # Индекс эмитента
-    index = ISSUER_LIST.get(issuer_code.upper())[1]
+    if not use_store:
+        return _iter_fetch_price(issuer_code, Period(period), dt_left, dt_right)
+
+    return _iter_price(issuer_code, dt_left, dt_right, Period(period))
+
+
+def _iter_price(issuer_code: str, dt_left: datetime.date, dt_right: datetime.date,
+                period: Period) -> Iterator[Price]:
+    store = get_price_store()
+    closed_right = min(dt_right, datetime.today().date() - timedelta(days=1))
+
+    # Недельные и месячные свечи могут выходить за границы отрезка, поэтому в хранилище не сохраняются
+    if store is None or dt_left > closed_right or period > Period.DAY:
+        yield from _iter_fetch_price(issuer_code, period, dt_left, dt_right)
+        return
+
+    stored_list, missing_range_list = store.get(issuer_code, period, dt_left, closed_right)
+    stored_iter = iter(stored_list)
+    stored = next(stored_iter, None)
+
+    for left, right in missing_range_list:
+        while stored is not None and price_day(stored) < left:
+            yield stored
+            stored = next(stored_iter, None)
+
+        price_list = []
+        for price in _iter_fetch_price(issuer_code, period, left, right):
+            price_list.append(price)
+            yield price
+        store.put(issuer_code, period, left, right, price_list)
+
+    if stored is not None:
+        yield stored
+        yield from stored_iter
+
+    if dt_right > closed_right:
+        yield from _iter_fetch_price(issuer_code, period, closed_right + timedelta(days=1), dt_right)
+
+
+def get_price_many(issuer_code_list: List[str], dt_left: datetime.date, dt_right: datetime.date,
+                   period: Period = Period.DAY, max_workers: int = 8) -> Dict[str, Union[List[Price], Exception]]:
+    """
+    Получить курсы нескольких эмитентов за временной отрезок.
+    Курсы запрашиваются параллельно, ошибка по одному эмитенту не прерывает получение остальных.
+    Частота запросов к finam.ru ограничивается транспортом (см. transport).
+
+    :param issuer_code_list: Список кодов эмитентов
+    :param dt_left: Дата начала отрезка
+    :param dt_right: Дата конца отрезка
+    :param period: Детализация
+    :param max_workers: Максимальное кол-во одновременных запросов
+
+    :return: Словарь {Код эмитента: Список курсов или исключение}, в порядке списка кодов
+
+    >>> get_price_many(['XXX'], datetime.today().date(), datetime.today().date())
+    {'XXX': NotFoundIssuer()}
+    """
+
+    def _get_price(issuer_code: str) -> Union[List[Price], Exception]:
+        try:
+            return get_price(issuer_code, dt_left, dt_right, period)
+        except Exception as err:
+            return err
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(zip(issuer_code_list, executor.map(_get_price, issuer_code_list)))
+
+
+def _iter_fetch_price(issuer_code: str, period: Period, dt_left: datetime.date,
+                      dt_right: datetime.date) -> Iterator[Price]:
+    """
+    Запросить курс за временной отрезок у finam.ru. Отрезок длиннее допустимого для детализации разбивается на
+    части, части запрашиваются параллельно и возвращаются по порядку.
+
+    :param issuer_code: Код эмитента
+    :param period: Детализация отрезка
+    :param dt_left: Дата начала отрезка
+    :param dt_right: Дата конца отрезка
+    """
+
+    chunk_days = _CHUNK_DAYS.get(period)
+    if chunk_days is None or (dt_right - dt_left).days < chunk_days:
+        yield from _iter_fetch_price_chunk(issuer_code, period, dt_left, dt_right)
+        return
+
+    chunk_list = []
+    while dt_left <= dt_right:
+        chunk_right = min(dt_left + timedelta(days=chunk_days - 1), dt_right)
+        chunk_list.append((dt_left, chunk_right))
+        dt_left = chunk_right + timedelta(days=1)
+
+    def _fetch_chunk(chunk: Tuple[date, date]) -> List[Price]:
+        return list(_iter_fetch_price_chunk(issuer_code, period, *chunk))
+
+    # Первая часть возвращается сразу после получения, последующие запрашиваются параллельно. Одновременно в памяти
+    # не более _CHUNK_WORKERS частей
+    with ThreadPoolExecutor(max_workers=_CHUNK_WORKERS) as executor:
+        future_queue = deque(executor.submit(_fetch_chunk, chunk) for chunk in chunk_list[1:_CHUNK_WORKERS])
+        yield from _iter_fetch_price_chunk(issuer_code, period, *chunk_list[0])
+
+        for chunk in chunk_list[_CHUNK_WORKERS:]:
+            future_queue.append(executor.submit(_fetch_chunk, chunk))
+            yield from future_queue.popleft().result()
+
+        while future_queue:
+            yield from future_queue.popleft().result()
+
+
+def _iter_fetch_price_chunk(issuer_code: str, period: Period, dt_left: datetime.date,
+                            dt_right: datetime.date) -> Iterator[Price]:
+    """
+    Запросить курс за временной отрезок у finam.ru. Курсы возвращаются после чтения ответа, соединение к этому
+    моменту уже возвращено в пул транспорта.
+
+    :param issuer_code: Код эмитента
+    :param period: Детализация отрезка
+    :param dt_left: Дата начала отрезка
+    :param dt_right: Дата конца отрезка
+    """
+
+    # Индекс и рынок эмитента
+    issuer = get_issuers()[issuer_code.upper()]
+    index, market = issuer[1], get_market(issuer)
 
     # Отрезок
     df, mf, yf, from_ = dt_left.day, dt_left.month - 1, dt_left.year, dt_left.strftime('%d.%m.%Y')
     dt, mt, yt, to_ = dt_right.day, dt_right.month - 1, dt_right.year, dt_right.strftime('%d.%m.%Y')
 
-    # Детализация отрезка. Варианты
+    # Детализация отрезка. Варианты (см. Period)
     # '1' - тики,    '2' - 1 мин., '3' - 5 мин., '4' - 10 мин.,  '5' - 15 мин.,
     # '6' - 30 мин., '7' - 1 час,  '8' - 1 день, '9' - 1 неделя, '10' - 1 месяц
-    period = 8
+    period = int(period)
 
     # Формат результата. Варианты 'txt', 'csv'
     result_ff = 'txt'
@@ -112,7 +297,7 @@ def get_price(issuer_code: str, dt_left: datetime.date, dt_right: datetime.date)
     result_df = 3
 
     # Формат времени результата. Варианты '1' — ччммсс, '2' — ччмм, '3' — чч: мм: сс, '4' — чч: мм
-    result_tf = 2
+    result_tf = 1
 
     # Московское время результата. Варианты '0' - не московское
     result_tm = 0
@@ -134,25 +319,81 @@ def get_price(issuer_code: str, dt_left: datetime.date, dt_right: datetime.date)
     # '4' — TICKER, PER, DATE, TIME, CLOSE
     # '5' — DATE, TIME, OPEN, HIGH, LOW, CLOSE, VOL
     # '6' — DATE, TIME, LAST, VOL, ID, OPER
-    result_data = 5
+    result_data = 6 if period == Period.TICK else 5
 
     # Наличие заголовка в результате. Варианты '0' - нет, '1' - да
     result_w_head = 0
 
-    url = f'http://export.finam.ru/result.txt?market=1&em={index}&code={issuer_code}&apply=0' \
-          f'&df={df}&mf={mf}&yf={yf}&from={from_}' \
-          f'&dt={dt}&mt={mt}&yt={yt}&to={to_}' \
-          f'&p={period}&f=result&e=.{result_ff}&cn={issuer_code}&dtf={result_df}&tmf={result_tf}' \
-          f'&MSOR={result_tc}&mstimever={result_tm}&sep={result_column_sep}&sep2={result_value_sep}' \
-          f'&datf={result_data}&at={result_w_head}'
-
-    result = []
-    with urllib.request.urlopen(url) as file:
-        for result_str in file.readlines():
-            result_values = result_str.decode().split(';')
-            result.append(Price(datetime.strptime(result_values[0], "%d%m%y").date(),
-                                Decimal(result_values[2]),
-                                Decimal(result_values[5]))
-                          )
-
-    return result
+    path = f'/result.txt?market={market}&em={index}&code={issuer_code}&apply=0' \
+           f'&df={df}&mf={mf}&yf={yf}&from={from_}' \
+           f'&dt={dt}&mt={mt}&yt={yt}&to={to_}' \
+           f'&p={period}&f=result&e=.{result_ff}&cn={issuer_code}&dtf={result_df}&tmf={result_tf}' \
+           f'&MSOR={result_tc}&mstimever={result_tm}&sep={result_column_sep}&sep2={result_value_sep}' \
+           f'&datf={result_data}&at={result_w_head}'
+
+    # Ответ читается и разбирается целиком до передачи курсов потребителю, чтобы медленный потребитель не занимал
+    # соединение пула транспорта. Время чтения и разбора учитываются раздельно
+    network_time = parse_time = 0.0
+    byte_count = 0
+    price_list = []
+    try:
+        start = time.perf_counter()
+        with get_transport().open(path) as file:
+            file_iter = iter(file)
+            while True:
+                result_str = next(file_iter, None)
+                read_end = time.perf_counter()
+                network_time += read_end - start
+                if result_str is None:
+                    break
+
+                price_list.append(_parse_price(result_str, period))
+                start = time.perf_counter()
+                parse_time += start - read_end
+                byte_count += len(result_str)
+    finally:
+        _FETCH_NETWORK_SECONDS.observe(network_time, period=Period(period).name)
+        _FETCH_PARSE_SECONDS.observe(parse_time, period=Period(period).name)
+        _FETCH_BYTES.inc(byte_count, period=Period(period).name)
+        _FETCH_ROWS.inc(len(price_list), period=Period(period).name)
+
+    yield from price_list
+
+
+def _parse_price(result_str: bytes, period: Period = Period.DAY) -> Price:
+    """
+    Разобрать строку ответа. Дата и время разбираются по фиксированным позициям, без strptime.
+    Для свечей строка вида 'ддммгг;ччммсс;открытие;максимум;минимум;закрытие;объем',
+    для тиков 'ддммгг;ччммсс;цена;объем;идентификатор;операция'.
+
+    >>> _parse_price(b'030119;000000;186.5;189.1;185.9;188.2;1000\\r\\n')
+    Price(dt=datetime.date(2019, 1, 3), open=Decimal('186.5'), close=Decimal('188.2'), high=Decimal('189.1'), \
+low=Decimal('185.9'), volume=1000)
+
+    >>> _parse_price(b'030119;100501;186.5;10;1;B\\r\\n', Period.TICK)
+    Price(dt=datetime.datetime(2019, 1, 3, 10, 5, 1), open=Decimal('186.5'), close=Decimal('186.5'), \
+high=Decimal('186.5'), low=Decimal('186.5'), volume=10)
+    """
+
+    result_values = result_str.decode().split(';', 6)
+
+    # Год в формате 'гг', аналогично strptime: 69-99 - 19xx, 00-68 - 20xx
+    year = int(result_str[4:6])
+    year += 1900 if year >= 69 else 2000
+
+    if period >= Period.DAY:
+        dt = date(year, int(result_str[2:4]), int(result_str[0:2]))
+    else:
+        dt = datetime(year, int(result_str[2:4]), int(result_str[0:2]),
+                      int(result_str[7:9]), int(result_str[9:11]), int(result_str[11:13]))
+
+    if period == Period.TICK:
+        last = Decimal(result_values[2])
+        return Price(dt, last, last, last, last, int(result_values[3]))
+
+    return Price(dt,
+                 Decimal(result_values[2]),
+                 Decimal(result_values[5]),
+                 Decimal(result_values[3]),
+                 Decimal(result_values[4]),
+                 int(result_values[6]))
@@ -0,0 +1,202 @@
+"""
+Технические индикаторы над рядами цен (см. series.PriceSeries).
+
+Индикаторы вычисляются векторными операциями NumPy над всем рядом за один проход. Результат - массив той же длины,
+что и исходный ряд, значения, для которых недостаточно истории, равны NaN.
+"""
+
+import math
+from typing import NamedTuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+_EWM_SCALE_MAX = 1e12
+"""
+Максимальный множитель при вычислении экспоненциального среднего блоками (ограничивает потерю точности)
+"""
+
+
+def sma(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Простое скользящее среднее
+
+    :param values: Значения
+    :param window: Окно, не менее 1
+
+    :raise: ValueError
+
+    >>> sma(np.array([1., 2., 3., 4.]), 2).tolist()
+    [nan, 1.5, 2.5, 3.5]
+    """
+
+    _check_window(window, 1)
+    result = np.full(len(values), np.nan)
+    if window <= len(values):
+        cumsum = np.cumsum(np.insert(values, 0, 0.0))
+        result[window - 1:] = (cumsum[window:] - cumsum[:-window]) / window
+    return result
+
+
+def ema(values: np.ndarray, span: int) -> np.ndarray:
+    """
+    Экспоненциальное скользящее среднее с коэффициентом 2 / (span + 1), начальное значение - первое значение ряда
+
+    :param values: Значения
+    :param span: Окно, не менее 1
+
+    :raise: ValueError
+
+    >>> ema(np.array([1., 2., 3.]), 3).tolist()
+    [1.0, 1.5, 2.25]
+    """
+
+    _check_window(span, 1)
+    return _ewm(values, 2.0 / (span + 1))
+
+
+def rsi(close: np.ndarray, period: int = 14) -> np.ndarray:
+    """
+    Индекс относительной силы (RSI) с усреднением Уайлдера
+
+    :param close: Цены закрытия
+    :param period: Период, не менее 1
+
+    :raise: ValueError
+
+    >>> rsi(np.array([1., 2., 3., 2., 3.]), 2).round(2).tolist()
+    [nan, nan, 100.0, 50.0, 75.0]
+    >>> rsi(np.array([1., 2.]), 0)
+    Traceback (most recent call last):
+    ...
+    ValueError: Окно 0 меньше 1!
+    """
+
+    _check_window(period, 1)
+    result = np.full(len(close), np.nan)
+    if len(close) <= period:
+        return result
+
+    change = np.diff(close)
+    gain, loss = np.clip(change, 0, None), np.clip(-change, 0, None)
+
+    # Начальное значение - простое среднее за период, далее экспоненциальное с коэффициентом 1 / period
+    avg_gain = _ewm(np.insert(gain[period:], 0, gain[:period].mean()), 1.0 / period)
+    avg_loss = _ewm(np.insert(loss[period:], 0, loss[:period].mean()), 1.0 / period)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result[period:] = np.where(avg_loss == 0, 100.0, 100.0 - 100.0 / (1.0 + avg_gain / avg_loss))
+    return result
+
+
+def log_returns(close: np.ndarray) -> np.ndarray:
+    """
+    Логарифмическая доходность. Для матрицы цен (дата x эмитент) вычисляется по столбцам. Доходность первой даты
+    и даты, у которой нет текущей либо предыдущей цены (NaN), равна NaN
+
+    :param close: Цены закрытия, ряд либо матрица
+
+    >>> log_returns(np.array([1., math.e, 1.])).round(2).tolist()
+    [nan, 1.0, -1.0]
+    >>> log_returns(np.array([[1., 1.], [math.e, np.nan], [1., 1.]])).round(2).tolist()
+    [[nan, nan], [1.0, nan], [-1.0, nan]]
+    """
+
+    result = np.full(np.shape(close), np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result[1:] = np.diff(np.log(close), axis=0)
+    return result
+
+
+def rolling_std(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Скользящее стандартное отклонение (выборочное). Окна, содержащие NaN, дают NaN
+
+    :param values: Значения
+    :param window: Окно, не менее 2
+
+    :raise: ValueError
+
+    >>> rolling_std(np.array([1., 2., 3., 5.]), 3).round(4).tolist()
+    [nan, nan, 1.0, 1.5275]
+    """
+
+    _check_window(window, 2)
+    result = np.full(len(values), np.nan)
+    if window <= len(values):
+        result[window - 1:] = sliding_window_view(values, window).std(axis=1, ddof=1)
+    return result
+
+
+class Drawdown(NamedTuple):
+    """
+    Максимальная просадка
+    """
+
+    value: float
+    """
+    Величина просадки, доля от максимума (отрицательная либо 0)
+    """
+
+    peak: int
+    """
+    Индекс максимума перед просадкой
+    """
+
+    trough: int
+    """
+    Индекс минимума просадки
+    """
+
+
+def max_drawdown(close: np.ndarray) -> Drawdown:
+    """
+    Максимальная просадка: наибольшее снижение цены от предшествующего максимума
+
+    :param close: Цены закрытия, не пустой массив
+
+    >>> max_drawdown(np.array([1., 4., 2., 3., 1., 5.]))
+    Drawdown(value=-0.75, peak=1, trough=4)
+    """
+
+    drawdown = close / np.maximum.accumulate(close) - 1.0
+    trough = int(np.argmin(drawdown))
+    peak = int(np.argmax(close[:trough + 1]))
+    return Drawdown(float(drawdown[trough]), peak, trough)
+
+
+def _check_window(window: int, window_min: int):
+    """
+    Проверить окно индикатора
+
+    :raise: ValueError
+    """
+
+    if window < window_min:
+        raise ValueError(f'Окно {window} меньше {window_min}!')
+
+
+def _ewm(values: np.ndarray, alpha: float) -> np.ndarray:
+    """
+    Экспоненциальное среднее y[i] = alpha * x[i] + (1 - alpha) * y[i - 1], y[0] = x[0].
+
+    Рекуррентная формула вычисляется в замкнутом виде блоками: внутри блока y[s + i] = q^(i + 1) * y[s - 1] +
+    alpha * q^i * сумма(x[s + j] / q^j, j <= i), где q = 1 - alpha. Длина блока ограничивает множитель 1 / q^j
+    """
+
+    values = np.asarray(values, dtype=np.float64)
+    if not len(values) or alpha >= 1.0:
+        return values.copy()
+
+    q = 1.0 - alpha
+    block = max(1, int(math.log(_EWM_SCALE_MAX) / -math.log(q)))
+
+    result = np.empty(len(values))
+    result[0] = values[0]
+    previous = values[0]
+    for start in range(1, len(values), block):
+        chunk = values[start:start + block]
+        power = q ** np.arange(len(chunk))
+        result[start:start + len(chunk)] = power * q * previous + alpha * power * np.cumsum(chunk / power)
+        previous = result[start + len(chunk) - 1]
+    return result
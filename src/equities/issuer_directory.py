@@ -0,0 +1,588 @@
+"""
+Справочник эмитентов в компактном двоичном файле.
+
+Справочник формируется из файла icharts.js finam.ru (см. refresh) по всем рынкам и открывается через mmap: файл не
+разбирается при открытии, данные эмитента читаются при обращении. Поиск по коду выполняется по хэш-таблице файла
+(O(1) независимо от кол-ва эмитентов). Поиск по коду и названию (см. issuer_index) выполняется по обратному индексу
+триграмм, хранящемуся в файле, и ключам названий в верхнем регистре, без построения индекса в памяти.
+
+Формат файла (little-endian):
+ * Заголовок _HEADER: сигнатура, версия, кол-во эмитентов, кол-во ячеек хэш-таблицы кодов, кол-во ячеек хэш-таблицы
+   триграмм
+ * Хэш-таблица кодов: ячейки uint32 - номер записи + 1 (0 - пустая ячейка), открытая адресация с линейным
+   пробированием, хэш - crc32 кода в верхнем регистре
+ * Хэш-таблица триграмм: ячейки _TRIGRAM_SLOT - смещение и длина строки триграммы, смещение и кол-во номеров записей
+   (0 - пустая ячейка), открытая адресация с линейным пробированием, хэш - crc32 триграммы
+ * Записи _RECORD: идентификатор finam.ru, рынок, смещения и длины строк (код, название, адрес страницы, ключ
+   названия)
+ * Номера записей триграмм: uint32 по возрастанию
+ * Строки в UTF-8
+
+Если файл справочника отсутствует, используется встроенный перечень акций (см. issuer_list).
+
+python -m src.equities.issuer_directory refresh <файл|url> [--output <файл>]
+"""
+
+import mmap
+import os
+import re
+import struct
+import sys
+import threading
+import time
+import zlib
+from collections.abc import Mapping
+from typing import Callable, Collection, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from src.equities.atomic_write import write_atomic
+from src.equities.issuer_index import IssuerSearch, get_trigram_set
+
+ICHARTS_URL = 'https://www.finam.ru/cache/icharts/icharts.js'
+"""
+Адрес файла icharts.js finam.ru
+"""
+
+MARKET_SHARES = 1
+"""
+Рынок finam.ru 'Акции МосБиржи'
+"""
+
+DIRECTORY_ENV = 'EQUITIES_ISSUER_DIRECTORY'
+"""
+Переменная окружения с путем файла справочника. По умолчанию - issuers.bin в каталоге хранилища курсов
+"""
+
+_MAGIC = b'EQID'
+
+_VERSION = 2
+
+_HEADER = struct.Struct('<4sHxxIII')
+
+_RECORD = struct.Struct('<IHxxIHxxIHxxIHxxIHxx')
+
+_SLOT = struct.Struct('<I')
+
+_TRIGRAM_SLOT = struct.Struct('<IHxxII')
+
+
+class Issuer(NamedTuple):
+    """
+    Эмитент. Первые поля совпадают с полями встроенного перечня (см. issuer_list)
+    """
+
+    name: str
+    """
+    Название
+    """
+
+    finam_id: int
+    """
+    Идентификатор finam.ru
+    """
+
+    url: str
+    """
+    Адрес страницы на finam.ru
+    """
+
+    market: int = MARKET_SHARES
+    """
+    Рынок finam.ru
+    """
+
+
+class IssuerDirectory(Mapping, IssuerSearch):
+    """
+    Справочник эмитентов {Код: Issuer}, открытый через mmap, с поиском эмитентов (см. IssuerSearch.search)
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: Путь файла справочника
+
+        :raise: OSError, ValueError
+        """
+
+        with open(path, 'rb') as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._mmap) < _HEADER.size:
+            raise ValueError('Некорректный формат справочника эмитентов!')
+
+        magic, version, self._count, self._slot_count, self._trigram_slot_count = _HEADER.unpack_from(self._mmap, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError('Некорректный формат справочника эмитентов!')
+
+        self._trigram_offset = _HEADER.size + self._slot_count * _SLOT.size
+        self._record_offset = self._trigram_offset + self._trigram_slot_count * _TRIGRAM_SLOT.size
+
+    def __getitem__(self, code: str) -> Issuer:
+        record = self._find(code)
+        if record is None:
+            raise KeyError(code)
+
+        finam_id, market, _, _, name_offset, name_size, url_offset, url_size, _, _ = self._read_record(record)
+        return Issuer(self._read_str(name_offset, name_size), finam_id, self._read_str(url_offset, url_size), market)
+
+    def __contains__(self, code: object) -> bool:
+        return isinstance(code, str) and self._find(code) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        for record in range(self._count):
+            _, _, code_offset, code_size, *_ = self._read_record(record)
+            yield self._read_str(code_offset, code_size)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def close(self):
+        """
+        Закрыть файл справочника
+        """
+        self._mmap.close()
+
+    def _find(self, code: str) -> Optional[int]:
+        """
+        Найти номер записи по коду. None, если эмитент не найден
+        """
+
+        code = code.upper()
+        slot = zlib.crc32(code.encode()) & (self._slot_count - 1)
+        while True:
+            record = _SLOT.unpack_from(self._mmap, _HEADER.size + slot * _SLOT.size)[0]
+            if record == 0:
+                return None
+
+            _, _, code_offset, code_size, *_ = self._read_record(record - 1)
+            if self._read_str(code_offset, code_size).upper() == code:
+                return record - 1
+            slot = (slot + 1) & (self._slot_count - 1)
+
+    def _get_size(self) -> int:
+        return self._count
+
+    def _get_item(self, pos: int) -> Tuple[str, str]:
+        _, _, code_offset, code_size, name_offset, name_size, *_ = self._read_record(pos)
+        return self._read_str(code_offset, code_size), self._read_str(name_offset, name_size)
+
+    def _get_keys(self, pos: int) -> Tuple[str, str]:
+        _, _, code_offset, code_size, _, _, _, _, key_offset, key_size = self._read_record(pos)
+        return self._read_str(code_offset, code_size).upper(), self._read_str(key_offset, key_size)
+
+    def _get_postings(self, trigram: str) -> Collection[int]:
+        data = trigram.encode()
+        slot = zlib.crc32(data) & (self._trigram_slot_count - 1)
+        while True:
+            str_offset, str_size, offset, count = _TRIGRAM_SLOT.unpack_from(
+                self._mmap, self._trigram_offset + slot * _TRIGRAM_SLOT.size)
+            if count == 0:
+                return ()
+            if self._mmap[str_offset:str_offset + str_size] == data:
+                return struct.unpack_from(f'<{count}I', self._mmap, offset)
+            slot = (slot + 1) & (self._trigram_slot_count - 1)
+
+    def _read_record(self, record: int) -> tuple:
+        return _RECORD.unpack_from(self._mmap, self._record_offset + record * _RECORD.size)
+
+    def _read_str(self, offset: int, size: int) -> str:
+        return self._mmap[offset:offset + size].decode()
+
+
+def write_directory(path: str, issuer_list: Dict[str, Issuer]):
+    """
+    Записать файл справочника. Файл заменяется атомарно, открытые справочники продолжают читать прежний файл
+
+    :param path: Путь файла справочника
+    :param issuer_list: Эмитенты {Код: Issuer}, коды уникальны без учета регистра
+
+    >>> import tempfile
+    >>> path = os.path.join(tempfile.mkdtemp(), 'issuers.bin')
+    >>> write_directory(path, {'SBER': Issuer('Сбербанк', 3, 'moex-akcii/sberbank')})
+    >>> directory = IssuerDirectory(path)
+    >>> directory['sber'], 'GAZP' in directory, list(directory)
+    (Issuer(name='Сбербанк', finam_id=3, url='moex-akcii/sberbank', market=1), False, ['SBER'])
+    >>> directory.search(['сбер'], 0), directory.search(['СБРБАНК'], 0, fuzzy=True), directory.search(['газ'], 0)
+    ([('SBER', 'Сбербанк')], [('SBER', 'Сбербанк')], [])
+    """
+
+    slot_count = _get_slot_count(len(issuer_list))
+
+    trigram_index: Dict[str, List[int]] = {}
+    for record, (code, issuer) in enumerate(issuer_list.items()):
+        for trigram in get_trigram_set(code.upper(), issuer.name.upper()):
+            trigram_index.setdefault(trigram, []).append(record)
+    trigram_slot_count = _get_slot_count(len(trigram_index))
+
+    posting_offset = _HEADER.size + slot_count * _SLOT.size + trigram_slot_count * _TRIGRAM_SLOT.size + \
+        len(issuer_list) * _RECORD.size
+    string_offset = posting_offset + sum(len(record_list) for record_list in trigram_index.values()) * _SLOT.size
+    record_list, string_list = [], []
+
+    def _add_str(value: str) -> Tuple[int, int]:
+        nonlocal string_offset
+        data = value.encode()
+        string_list.append(data)
+        string_offset += len(data)
+        return string_offset - len(data), len(data)
+
+    slot_list = [0] * slot_count
+    for record, (code, issuer) in enumerate(issuer_list.items()):
+        slot = zlib.crc32(code.upper().encode()) & (slot_count - 1)
+        while slot_list[slot]:
+            slot = (slot + 1) & (slot_count - 1)
+        slot_list[slot] = record + 1
+
+        record_list.append(_RECORD.pack(issuer.finam_id, issuer.market, *_add_str(code), *_add_str(issuer.name),
+                                        *_add_str(issuer.url), *_add_str(issuer.name.upper())))
+
+    trigram_slot_list: List[Optional[bytes]] = [None] * trigram_slot_count
+    posting_list = []
+    for trigram, trigram_record_list in trigram_index.items():
+        slot = zlib.crc32(trigram.encode()) & (trigram_slot_count - 1)
+        while trigram_slot_list[slot] is not None:
+            slot = (slot + 1) & (trigram_slot_count - 1)
+        trigram_slot_list[slot] = _TRIGRAM_SLOT.pack(*_add_str(trigram), posting_offset, len(trigram_record_list))
+
+        posting_list.append(struct.pack(f'<{len(trigram_record_list)}I', *trigram_record_list))
+        posting_offset += len(posting_list[-1])
+
+    empty_slot = _TRIGRAM_SLOT.pack(0, 0, 0, 0)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    write_atomic(path, [_HEADER.pack(_MAGIC, _VERSION, len(issuer_list), slot_count, trigram_slot_count),
+                        struct.pack(f'<{slot_count}I', *slot_list)] +
+                 [slot or empty_slot for slot in trigram_slot_list] + record_list + posting_list + string_list)
+
+
+def _get_slot_count(count: int) -> int:
+    """
+    Получить кол-во ячеек хэш-таблицы: степень 2, не менее удвоенного кол-ва элементов
+    """
+
+    result = 1
+    while result < 2 * count:
+        result *= 2
+    return result
+
+
+_JS_TOKEN = re.compile(r'\s*(\'(?:[^\'\\]|\\.)*\'|"(?:[^"\\]|\\.)*"|[^,:\]\)}\s]+)\s*([,:\]\)}])', re.S)
+"""
+Значение литерала массива (объекта) JavaScript и следующий за ним разделитель
+"""
+
+
+def parse_icharts(text: str) -> Dict[str, Issuer]:
+    """
+    Разобрать файл icharts.js finam.ru: массивы идентификаторов, названий, кодов, рынков и адресов страниц эмитентов.
+    Если код встречается на нескольких рынках, предпочтение отдается акциям МосБиржи, затем первому вхождению
+
+    :param text: Содержимое файла
+
+    :raise: ValueError
+
+    :return: Эмитенты {Код: Issuer}
+
+    >>> parse_icharts("var aEmitentIds=[3,16842];var aEmitentNames=['Сбербанк','Газпром'];"
+    ...               "var aEmitentCodes=['SBER','GAZP'];var aEmitentMarkets=[1,1];"
+    ...               "var aEmitentUrls = {3: 'moex-akcii/sberbank', 16842: 'moex-akcii/gazprom'};")['GAZP']
+    Issuer(name='Газпром', finam_id=16842, url='moex-akcii/gazprom', market=1)
+    """
+
+    id_list = [int(value) for value in _parse_js_list(text, 'aEmitentIds')]
+    name_list = _parse_js_list(text, 'aEmitentNames')
+    code_list = _parse_js_list(text, 'aEmitentCodes')
+    market_list = [int(value) for value in _parse_js_list(text, 'aEmitentMarkets')]
+    if not len(id_list) == len(name_list) == len(code_list) == len(market_list):
+        raise ValueError('Некорректный формат icharts.js: не совпадают длины массивов!')
+
+    url_list = _parse_js_list(text, 'aEmitentUrls', required=False)
+    if url_list and isinstance(url_list[0], tuple):
+        url_by_id = {int(key): value for key, value in url_list}
+        url_list = [url_by_id.get(finam_id, '') for finam_id in id_list]
+    elif len(url_list) != len(id_list):
+        url_list = [''] * len(id_list)
+
+    result = {}
+    for finam_id, name, code, market, url in zip(id_list, name_list, code_list, market_list, url_list):
+        code = code.upper()
+        if code and (code not in result or market == MARKET_SHARES != result[code].market):
+            result[code] = Issuer(name, finam_id, url, market)
+    return result
+
+
+def _parse_js_list(text: str, name: str, required: bool = True) -> list:
+    """
+    Разобрать массив (либо объект) JavaScript с литералами чисел и строк: var <name> = [...] | new Array(...) | {...}
+
+    :raise: ValueError
+
+    :return: Значения массива, для объекта - пары (Ключ, Значение)
+    """
+
+    match = re.search(rf'\b{name}\s*=\s*(\[|new\s+Array\s*\(|{{)', text)
+    if match is None:
+        if required:
+            raise ValueError(f'Некорректный формат icharts.js: не найден массив {name}!')
+        return []
+
+    result, key, pos = [], None, match.end()
+    if re.match(r'\s*[\])}]', text[pos:pos + 64]):
+        return result
+
+    while True:
+        token = _JS_TOKEN.match(text, pos)
+        if token is None:
+            raise ValueError(f'Некорректный формат icharts.js: ошибка разбора массива {name}!')
+
+        value, separator, pos = _parse_js_value(token[1]), token[2], token.end()
+        if separator == ':':
+            key = value
+            continue
+
+        result.append(value if key is None else (key, value))
+        key = None
+        if separator != ',':
+            return result
+
+
+def _parse_js_value(token: str) -> str:
+    """
+    Получить значение литерала JavaScript: строки - без кавычек и экранирования, иначе - как есть
+    """
+
+    if not token or token[0] not in '\'"':
+        return token
+    return re.sub(r'\\(u[0-9a-fA-F]{4}|x[0-9a-fA-F]{2}|.)',
+                  lambda m: chr(int(m[1][1:], 16)) if len(m[1]) > 1 else m[1], token[1:-1], flags=re.S)
+
+
+def refresh(source: str = ICHARTS_URL, path: str = None) -> int:
+    """
+    Обновить файл справочника из файла icharts.js. Открытый справочник (см. get_issuers) заменяется новым, в других
+    процессах - при следующей проверке замены файла (см. DIRECTORY_CHECK_SECONDS)
+
+    :param source: Путь файла либо адрес (http, https)
+    :param path: Путь файла справочника. По умолчанию - см. get_directory_path
+
+    :raise: OSError, ValueError
+
+    :return: Кол-во эмитентов
+    """
+
+    if re.match(r'https?://', source):
+        import urllib.request
+
+        with urllib.request.urlopen(source, timeout=30) as response:
+            data = response.read()
+    else:
+        with open(source, 'rb') as file:
+            data = file.read()
+
+    # finam.ru отдает файл в кодировке cp1251
+    try:
+        text = data.decode('utf-8')
+    except UnicodeDecodeError:
+        text = data.decode('cp1251')
+
+    issuer_list = parse_icharts(text)
+    if not issuer_list:
+        raise ValueError('В icharts.js отсутствуют эмитенты!')
+
+    path = path or get_directory_path()
+    write_directory(path, issuer_list)
+    if path == get_directory_path():
+        set_issuers(None)
+    return len(issuer_list)
+
+
+def get_directory_path() -> str:
+    """
+    Получить путь файла справочника
+    """
+
+    return os.environ.get(DIRECTORY_ENV) or os.path.join(
+        os.environ.get('EQUITIES_CACHE_DIR') or os.path.join(os.path.expanduser('~'), '.cache', 'equities'),
+        'issuers.bin')
+
+
+DIRECTORY_CHECK_SECONDS = 1.0
+"""
+Периодичность проверки замены файла справочника (в секундах). Файл может быть заменен другим процессом, например
+обновлением по расписанию либо другим процессом web сервера, открытый справочник заменяется при следующем обращении
+"""
+
+_issuers: Optional[Mapping] = None
+
+_issuers_auto = True
+"""
+Справочник открывается из файла и заменяется при замене файла (не задан явно, см. set_issuers)
+"""
+
+_issuers_file: Optional[Tuple[int, int]] = None
+"""
+Идентификатор открытого файла справочника (inode, время изменения). None - используется встроенный перечень
+"""
+
+_issuers_checked = 0.0
+
+_retired_list: List[Tuple[IssuerDirectory, float]] = []
+"""
+Замененные справочники из файла и время замены. Справочник закрывается не ранее DIRECTORY_CHECK_SECONDS после
+замены, чтобы обращения, начатые до замены, успели завершиться
+"""
+
+_retired_lock = threading.Lock()
+
+_listener_list: List[Callable[[], None]] = []
+
+
+def get_issuers() -> Mapping:
+    """
+    Получить справочник эмитентов {Код: (Название, Идентификатор finam.ru, Адрес страницы[, Рынок])}.
+    Справочник открывается при первом обращении, если файл справочника отсутствует - встроенный перечень акций.
+    Не чаще DIRECTORY_CHECK_SECONDS проверяется замена файла, при замене справочник открывается заново
+    """
+
+    global _issuers, _issuers_file, _issuers_checked
+    if not _issuers_auto:
+        return _issuers
+
+    now = time.monotonic()
+    if _issuers is not None and now - _issuers_checked < DIRECTORY_CHECK_SECONDS:
+        return _issuers
+    _issuers_checked = now
+    _close_retired(now)
+
+    path = get_directory_path()
+    try:
+        stat = os.stat(path)
+        file_id = (stat.st_ino, stat.st_mtime_ns)
+    except OSError:
+        file_id = None
+
+    if _issuers is not None and file_id == _issuers_file:
+        return _issuers
+
+    changed = _issuers is not None
+    _retire(_issuers, now)
+    try:
+        _issuers = IssuerDirectory(path) if file_id else None
+    except (OSError, ValueError):
+        _issuers = None
+    if _issuers is None:
+        from src.equities.issuer_list import ISSUER_LIST
+        _issuers, file_id = ISSUER_LIST, None
+    _issuers_file = file_id
+
+    if changed:
+        _notify()
+    return _issuers
+
+
+def set_issuers(issuers: Optional[Mapping]):
+    """
+    Установить справочник эмитентов
+
+    :param issuers: Справочник {Код: (Название, Идентификатор finam.ru, Адрес страницы[, Рынок])}. None - открыть
+    справочник из файла при следующем обращении
+    """
+
+    global _issuers, _issuers_auto
+    now = time.monotonic()
+    _close_retired(now)
+    if issuers is not _issuers:
+        _retire(_issuers, now)
+    _issuers, _issuers_auto = issuers, issuers is None
+    _notify()
+
+
+def _retire(issuers: Optional[Mapping], now: float):
+    """
+    Отметить справочник замененным (справочник из файла закрывается позднее, см. _close_retired)
+    """
+
+    if isinstance(issuers, IssuerDirectory):
+        with _retired_lock:
+            _retired_list.append((issuers, now))
+
+
+def _close_retired(now: float):
+    """
+    Закрыть справочники, замененные не менее DIRECTORY_CHECK_SECONDS назад
+    """
+
+    with _retired_lock:
+        for issuers, retired in list(_retired_list):
+            if now - retired >= DIRECTORY_CHECK_SECONDS:
+                _retired_list.remove((issuers, retired))
+                issuers.close()
+
+
+def add_listener(listener: Callable[[], None]):
+    """
+    Добавить обработчик замены справочника (например, очистку кэша результатов, сформированных по прежнему
+    справочнику). Обработчик вызывается при явной замене справочника и при обнаружении замены файла справочника
+
+    :param listener: Обработчик
+    """
+    _listener_list.append(listener)
+
+
+def _notify():
+    """
+    Вызвать обработчики замены справочника
+    """
+
+    for listener in _listener_list:
+        listener()
+
+
+def get_market(issuer: tuple) -> int:
+    """
+    Получить рынок эмитента справочника (у встроенного перечня рынок не указан - акции МосБиржи)
+    """
+    return issuer[3] if len(issuer) > 3 else MARKET_SHARES
+
+
+def get_code_list(market: Optional[int] = MARKET_SHARES) -> List[str]:
+    """
+    Получить коды эмитентов рынка
+
+    :param market: Рынок. None - все рынки
+    """
+
+    issuers = get_issuers()
+    if market is None:
+        return list(issuers)
+    return [code for code, issuer in issuers.items() if get_market(issuer) == market]
+
+
+def main(argv: List[str] = None) -> int:
+    """
+    Выполнить обновление справочника из командной строки
+
+    :param argv: Параметры командной строки
+    :return: Код завершения
+    """
+
+    import argparse
+
+    parser = argparse.ArgumentParser(prog='python -m src.equities.issuer_directory',
+                                     description='Справочник эмитентов')
+    subparsers = parser.add_subparsers(dest='action', required=True)
+    refresh_parser = subparsers.add_parser('refresh', help='Обновить справочник из icharts.js finam.ru')
+    refresh_parser.add_argument('source', nargs='?', default=ICHARTS_URL, help='Путь файла либо адрес icharts.js')
+    refresh_parser.add_argument('--output', help='Путь файла справочника')
+    args = parser.parse_args(argv)
+
+    try:
+        count = refresh(args.source, args.output)
+    except (OSError, ValueError) as err:
+        print(f'Ошибка! {str(err)}', file=sys.stderr)
+        return 1
+
+    print(f'Эмитентов в справочнике "{count}"')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
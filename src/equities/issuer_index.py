@@ -0,0 +1,206 @@
+"""
+Поисковый индекс по перечню эмитентов.
+
+Индекс строится один раз: нормализованные (в верхнем регистре) коды и названия, а также обратный индекс
+триграмм. Индекс хранится в памяти (IssuerIndex) либо в файле справочника эмитентов (см. issuer_directory). Результаты поиска ранжируются: точное совпадение кода, совпадение начала кода или названия,
+вхождение подстроки и, опционально, нечеткое совпадение по триграммам (устойчивое к опечаткам).
+"""
+
+from typing import Collection, Dict, List, Tuple, Set, Iterable
+
+RANK_EXACT, RANK_PREFIX, RANK_SUBSTRING, RANK_FUZZY = range(4)
+"""
+Ранги совпадения, в порядке убывания релевантности
+"""
+
+FUZZY_SIMILARITY_MIN = 0.3
+"""
+Минимальная доля общих триграмм для нечеткого совпадения
+"""
+
+
+def _trigram_set(value: str) -> Set[str]:
+    """
+    Получить множество триграмм строки (с обрамлением пробелами, чтобы учитывать начало и конец слова)
+
+    >>> sorted(_trigram_set('SBER'))
+    ['  S', ' SB', 'BER', 'ER ', 'SBE']
+    """
+    value = f'  {value} '
+    return {value[i:i + 3] for i in range(len(value) - 2)}
+
+
+def get_trigram_set(code_key: str, name_key: str) -> Set[str]:
+    """
+    Получить триграммы ключей поиска эмитента для обратного индекса
+
+    :param code_key: Код в верхнем регистре
+    :param name_key: Название в верхнем регистре
+    """
+    return _trigram_set(code_key) | _trigram_set(name_key)
+
+
+class IssuerSearch:
+    """
+    Поиск эмитентов по ключам поиска (код и название в верхнем регистре) и обратному индексу триграмм. Хранение
+    ключей и индекса определяет наследник (см. IssuerIndex, issuer_directory.IssuerDirectory), позиция эмитента -
+    номер от 0 до кол-ва эмитентов
+    """
+
+    def search(self, search_str_list: List[str], result_max: int, fuzzy: bool = False) -> List[Tuple[str, str]]:
+        """
+        Получить список ценных бумаг по поисковой строке, в порядке убывания релевантности.
+        Поиск проиходит по коду или названию без учета регистра, должны совпасть все строки поиска.
+
+        :param search_str_list: Список строк поиска. Если список пуст, соответствие щитается безуусловным.
+        :param result_max: Максимальный результат. Если 0, без ограничений.
+        :param fuzzy: Если точных совпадений нет, искать нечеткие совпадения по триграммам
+
+        :return: Список кортежей (Код, Название)
+        """
+
+        key_list = [search_str.upper() for search_str in search_str_list]
+        if not key_list:
+            result = list(range(self._get_size()))
+        else:
+            result = self._search(key_list)
+            if not result and fuzzy:
+                result = self._search_fuzzy(key_list)
+
+        if result_max:
+            result = result[:result_max]
+
+        return [self._get_item(pos) for pos in result]
+
+    def _get_size(self) -> int:
+        """
+        Получить кол-во эмитентов
+        """
+        raise NotImplementedError()
+
+    def _get_item(self, pos: int) -> Tuple[str, str]:
+        """
+        Получить код и название эмитента
+        """
+        raise NotImplementedError()
+
+    def _get_keys(self, pos: int) -> Tuple[str, str]:
+        """
+        Получить ключи поиска эмитента: код и название в верхнем регистре
+        """
+        raise NotImplementedError()
+
+    def _get_postings(self, trigram: str) -> Collection[int]:
+        """
+        Получить позиции эмитентов, ключи поиска которых содержат триграмму
+        """
+        raise NotImplementedError()
+
+    def _candidate_set(self, key: str) -> Iterable[int]:
+        """
+        Получить позиции, которые могут содержать подстроку (надмножество результата)
+        """
+
+        if len(key) < 3:
+            return range(self._get_size())
+
+        result = None
+        for trigram in (key[i:i + 3] for i in range(len(key) - 2)):
+            pos_list = self._get_postings(trigram)
+            if not pos_list:
+                return ()
+            result = set(pos_list) if result is None else result.intersection(pos_list)
+
+        return result
+
+    def _rank(self, pos: int, key: str) -> int:
+        """
+        Получить ранг совпадения. None, если совпадения нет
+        """
+
+        code_key, name_key = self._get_keys(pos)
+        if code_key == key:
+            return RANK_EXACT
+        if code_key.startswith(key) or name_key.startswith(key):
+            return RANK_PREFIX
+        if key in code_key or key in name_key:
+            return RANK_SUBSTRING
+        return None
+
+    def _search(self, key_list: List[str]) -> List[int]:
+        # Начинаем с самой длинной строки поиска, у нее наименьшее кол-во кандидатов
+        key_list = sorted(key_list, key=len, reverse=True)
+
+        rank_dict = {}
+        for pos in self._candidate_set(key_list[0]):
+            rank_list = [self._rank(pos, key) for key in key_list]
+            if None not in rank_list:
+                rank_dict[pos] = max(rank_list)
+
+        return sorted(rank_dict, key=lambda pos: (rank_dict[pos], pos))
+
+    def _search_fuzzy(self, key_list: List[str]) -> List[int]:
+        score_dict = {}
+        for key in key_list:
+            trigram_set = _trigram_set(key)
+
+            hit_dict = {}
+            for trigram in trigram_set:
+                for pos in self._get_postings(trigram):
+                    hit_dict[pos] = hit_dict.get(pos, 0) + 1
+
+            for pos, hit in hit_dict.items():
+                similarity = hit / len(trigram_set)
+                if similarity >= FUZZY_SIMILARITY_MIN:
+                    score_dict.setdefault(pos, []).append(similarity)
+
+        # Должны совпасть все строки поиска, оценка совпадения - наихудшая из оценок
+        score_dict = {pos: min(score_list) for pos, score_list in score_dict.items()
+                      if len(score_list) == len(key_list)}
+        return sorted(score_dict, key=lambda pos: (-score_dict[pos], pos))
+
+
+class IssuerIndex(IssuerSearch):
+    """
+    Поисковый индекс эмитентов в памяти.
+
+    >>> index = IssuerIndex({'SBER': ('Сбербанк',), 'SBERP': ('Сбербанк-п',), 'CBOM': ('МКБ ао',)})
+    >>> index.search(['SBERP'], 0)
+    [('SBERP', 'Сбербанк-п')]
+    >>> index.search(['сбер'], 1)
+    [('SBER', 'Сбербанк')]
+    >>> index.search(['СБРБАНК'], 0, fuzzy=True)
+    [('SBER', 'Сбербанк'), ('SBERP', 'Сбербанк-п')]
+    """
+
+    def __init__(self, issuer_list: Dict[str, tuple]):
+        """
+        :param issuer_list: Перечень эмитентов {Код: (Название, ...)}
+        """
+
+        self._code_list: List[str] = []
+        self._name_list: List[str] = []
+        self._code_key_list: List[str] = []
+        self._name_key_list: List[str] = []
+        self._trigram_index: Dict[str, Set[int]] = {}
+
+        for pos, (code, data) in enumerate(issuer_list.items()):
+            self._code_list.append(code)
+            self._name_list.append(data[0])
+            self._code_key_list.append(code.upper())
+            self._name_key_list.append(data[0].upper())
+
+            for trigram in get_trigram_set(code.upper(), data[0].upper()):
+                self._trigram_index.setdefault(trigram, set()).add(pos)
+
+    def _get_size(self) -> int:
+        return len(self._code_list)
+
+    def _get_item(self, pos: int) -> Tuple[str, str]:
+        return self._code_list[pos], self._name_list[pos]
+
+    def _get_keys(self, pos: int) -> Tuple[str, str]:
+        return self._code_key_list[pos], self._name_key_list[pos]
+
+    def _get_postings(self, trigram: str) -> Collection[int]:
+        return self._trigram_index.get(trigram, ())
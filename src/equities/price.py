@@ -0,0 +1,79 @@
+"""
+Курс ценной бумаги.
+"""
+
+from datetime import date, datetime
+from decimal import Decimal
+from enum import IntEnum
+from typing import NamedTuple, Union
+
+
+class Price(NamedTuple):
+    """
+    Курс ценной бумаги
+    """
+
+    dt: Union[date, datetime]
+    """
+    Дата (для детализации от дня) либо дата и время начала свечи (для внутридневной детализации)
+    """
+
+    open: Decimal
+    """
+    Цена на начало дня
+    """
+
+    close: Decimal
+    """
+    Цена на окончания дня
+    """
+
+    high: Decimal = None
+    """
+    Максимальная цена
+    """
+
+    low: Decimal = None
+    """
+    Минимальная цена
+    """
+
+    volume: int = None
+    """
+    Объем
+    """
+
+
+class Period(IntEnum):
+    """
+    Детализация курса
+    """
+
+    TICK = 1
+    MIN1 = 2
+    MIN5 = 3
+    MIN10 = 4
+    MIN15 = 5
+    MIN30 = 6
+    HOUR = 7
+    DAY = 8
+    WEEK = 9
+    MONTH = 10
+
+
+PERIOD_BY_NAME = {'tick': Period.TICK, '1m': Period.MIN1, '5m': Period.MIN5, '10m': Period.MIN10,
+                  '15m': Period.MIN15, '30m': Period.MIN30, '1h': Period.HOUR, '1d': Period.DAY, '1w': Period.WEEK,
+                  '1mo': Period.MONTH}
+"""
+Детализация курса по краткому названию
+"""
+
+
+def price_day(price: Price) -> date:
+    """
+    Получить день курса
+
+    >>> price_day(Price(datetime(2019, 1, 3, 10, 0), Decimal(1), Decimal(1)))
+    datetime.date(2019, 1, 3)
+    """
+    return price.dt.date() if isinstance(price.dt, datetime) else price.dt
@@ -0,0 +1,360 @@
+"""
+Локальное хранилище курсов ценных бумаг.
+
+Хранилище содержит курсы по ключу (код эмитента, детализация) и перечень отрезков, за которые курсы уже были
+получены. Это позволяет запрашивать у источника только недостающие отрезки.
+
+Хранятся только закрытые (прошедшие) дни, курс за которые больше не изменится.
+
+Хранилище по умолчанию отключено и включается явно (см. enable_price_store).
+
+Хранилище могут одновременно использовать несколько процессов (процессы web сервера, обновление по расписанию,
+командная строка): чтение и изменение файлов ключа выполняются под блокировкой файла ключа (fcntl.flock).
+Файлы изменяются только дописыванием в конец либо атомарной заменой, поэтому файлы, открытые для чтения, остаются
+корректными.
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+from datetime import date, timedelta
+from typing import Iterator, List, Tuple, Optional
+
+from src.equities.atomic_write import write_atomic
+from src.equities.bar_file import BarFile, append_bars, pack_price, unpack_price, write_bars
+from src.equities.price import Period, price_day
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: блокировка только между потоками процесса
+    fcntl = None
+
+Range = Tuple[date, date]
+"""
+Отрезок дат (включительно)
+"""
+
+
+class PriceStore:
+    """
+    Хранилище курсов на диске.
+
+    Для каждого ключа (код эмитента, детализация) используются файлы:
+     * <код>_<детализация>.bars - курсы в двоичном формате с записями фиксированной длины (см. bar_file). Курсы
+       за отрезок дат читаются двоичным поиском без разбора файла, новые курсы дописываются в конец файла
+     * <код>_<детализация>.cov - полученные отрезки, строки вида 'гггг-мм-дд;гггг-мм-дд'
+     * <код>_<детализация>.lock - файл блокировки ключа
+    """
+
+    def __init__(self, root: str):
+        """
+        :param root: Каталог хранилища
+        """
+        self._root = root
+        self._lock = threading.Lock()
+
+    def get(self, issuer_code: str, period: int, dt_left: date, dt_right: date) -> Tuple[list, List[Range]]:
+        """
+        Получить курсы за отрезок из хранилища.
+
+        :param issuer_code: Код эмитента
+        :param period: Детализация
+        :param dt_left: Дата начала отрезка
+        :param dt_right: Дата конца отрезка
+
+        :return: Кортеж (Курсы из хранилища, Отрезки отсутствующие в хранилище)
+        """
+
+        with self._locked(issuer_code, period, exclusive=False):
+            coverage = self._read_coverage(issuer_code, period)
+            data = self._read_bars(issuer_code, period, dt_left, dt_right)
+
+        missing_range_list = subtract_range((dt_left, dt_right), coverage)
+        price_list = unpack_price(data, _is_intraday(period))
+
+        # Курсы за отсутствующие отрезки (остаток прерванной записи) не возвращаются, отрезки запрашиваются заново
+        if missing_range_list and price_list:
+            price_list = [price for price in price_list
+                          if not any(left <= price_day(price) <= right for left, right in missing_range_list)]
+
+        return price_list, missing_range_list
+
+    def get_bars(self, issuer_code: str, period: int, dt_left: date, dt_right: date) -> Optional[bytes]:
+        """
+        Получить записи курсов за отрезок (см. bar_file.RECORD) без преобразования в Price
+
+        :param issuer_code: Код эмитента
+        :param period: Детализация
+        :param dt_left: Дата начала отрезка
+        :param dt_right: Дата конца отрезка
+
+        :return: Записи по возрастанию времени. None, если курсы получены не за весь отрезок
+        """
+
+        with self._locked(issuer_code, period, exclusive=False):
+            if subtract_range((dt_left, dt_right), self._read_coverage(issuer_code, period)):
+                return None
+            return self._read_bars(issuer_code, period, dt_left, dt_right)
+
+    def put(self, issuer_code: str, period: int, dt_left: date, dt_right: date, price_list: list):
+        """
+        Добавить в хранилище курсы полученные за отрезок. Имеющиеся курсы за отрезок заменяются. Если отрезок следует
+        за последним курсом, курсы дописываются в конец файла
+
+        :param issuer_code: Код эмитента
+        :param period: Детализация
+        :param dt_left: Дата начала отрезка
+        :param dt_right: Дата конца отрезка
+        :param price_list: Курсы за отрезок
+        """
+
+        data = pack_price(sorted(price_list, key=lambda price: price.dt))
+
+        with self._locked(issuer_code, period):
+            path = self._bars_path(issuer_code, period)
+            coverage = merge_range(self._read_coverage(issuer_code, period) + [(dt_left, dt_right)])
+
+            data_list = None
+            if os.path.exists(path):
+                with BarFile(path) as bar_file:
+                    left, right = bar_file.find_range(dt_left, dt_right)
+                    if left < len(bar_file):
+                        data_list = [bar_file.read_bytes(0, left), data, bar_file.read_bytes(right, len(bar_file))]
+
+            if data_list is None:
+                append_bars(path, _is_intraday(period), data)
+            else:
+                write_bars(path, _is_intraday(period), data_list)
+
+            self._write_coverage(issuer_code, period, coverage)
+
+    def covers(self, issuer_code: str, period: int, dt_left: date, dt_right: date) -> bool:
+        """
+        Проверить, получены ли курсы за весь отрезок
+
+        :param issuer_code: Код эмитента
+        :param period: Детализация
+        :param dt_left: Дата начала отрезка
+        :param dt_right: Дата конца отрезка
+        """
+
+        with self._locked(issuer_code, period, exclusive=False):
+            coverage = self._read_coverage(issuer_code, period)
+        return not subtract_range((dt_left, dt_right), coverage)
+
+    def get_last_date(self, issuer_code: str, period: int) -> Optional[date]:
+        """
+        Получить дату конца последнего полученного отрезка. None, если курсов в хранилище нет
+
+        :param issuer_code: Код эмитента
+        :param period: Детализация
+        """
+
+        with self._locked(issuer_code, period, exclusive=False):
+            coverage = self._read_coverage(issuer_code, period)
+        return coverage[-1][1] if coverage else None
+
+    def append(self, issuer_code: str, period: int, dt_left: date, dt_right: date, price_list: list):
+        """
+        Добавить в хранилище курсы, полученные за отрезок после последнего полученного отрезка (см. get_last_date).
+        Курсы дописываются в конец файла, имеющиеся курсы не читаются. Если отрезок не следует за последним
+        полученным, курсы добавляются через put.
+
+        :param issuer_code: Код эмитента
+        :param period: Детализация
+        :param dt_left: Дата начала отрезка
+        :param dt_right: Дата конца отрезка
+        :param price_list: Курсы за отрезок, в порядке возрастания даты
+        """
+
+        with self._locked(issuer_code, period):
+            coverage = self._read_coverage(issuer_code, period)
+            last_date = coverage[-1][1] if coverage else None
+
+            if last_date is not None and dt_left > last_date:
+                path = self._bars_path(issuer_code, period)
+                data = pack_price(price_list)
+
+                # Записи после последнего полученного отрезка (остаток прерванной записи) отбрасываются перезаписью
+                # файла: файл не усекается, т.к. может быть открыт для чтения
+                data_list = None
+                if os.path.exists(path):
+                    with BarFile(path) as bar_file:
+                        count = bar_file.find_range(last_date, last_date)[1]
+                        if count < len(bar_file):
+                            data_list = [bar_file.read_bytes(0, count), data]
+
+                if data_list is None:
+                    append_bars(path, _is_intraday(period), data)
+                else:
+                    write_bars(path, _is_intraday(period), data_list)
+                self._write_coverage(issuer_code, period, merge_range(coverage + [(dt_left, dt_right)]))
+                return
+
+        self.put(issuer_code, period, dt_left, dt_right, price_list)
+
+    def _path(self, issuer_code: str, period: int, ext: str) -> str:
+        return os.path.join(self._root, f'{issuer_code.upper()}_{period}.{ext}')
+
+    @contextmanager
+    def _locked(self, issuer_code: str, period: int, exclusive: bool = True) -> Iterator[None]:
+        """
+        Заблокировать ключ хранилища. Блокировка файла действует между процессами и между потоками (у каждого вызова
+        свой дескриптор файла блокировки). Без fcntl - только между потоками процесса.
+
+        :param issuer_code: Код эмитента
+        :param period: Детализация
+        :param exclusive: Исключительная блокировка (изменение), иначе - разделяемая (чтение)
+        """
+
+        if fcntl is None:
+            with self._lock:
+                yield
+            return
+
+        if exclusive:
+            os.makedirs(self._root, exist_ok=True)
+
+        try:
+            fd = os.open(self._path(issuer_code, period, 'lock'), os.O_RDWR | os.O_CREAT, 0o644)
+        except FileNotFoundError:
+            # Каталога хранилища нет, читать нечего
+            yield
+            return
+
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            yield
+        finally:
+            os.close(fd)
+
+    def _bars_path(self, issuer_code: str, period: int) -> str:
+        return self._path(issuer_code, period, 'bars')
+
+    def _read_bars(self, issuer_code: str, period: int, dt_left: date, dt_right: date) -> bytes:
+        """
+        Прочитать записи курсов за отрезок двоичным поиском
+        """
+
+        path = self._bars_path(issuer_code, period)
+        try:
+            bar_file = BarFile(path)
+        except FileNotFoundError:
+            return b''
+
+        with bar_file:
+            return bar_file.read_bytes(*bar_file.find_range(dt_left, dt_right))
+
+    def _read_lines(self, path: str) -> List[str]:
+        try:
+            with open(path, encoding='utf-8') as file:
+                return [line.rstrip('\n') for line in file if line.strip()]
+        except FileNotFoundError:
+            return []
+
+    def _read_coverage(self, issuer_code: str, period: int) -> List[Range]:
+        result = []
+        for line in self._read_lines(self._path(issuer_code, period, 'cov')):
+            left, right = line.split(';')
+            result.append((_parse_date(left), _parse_date(right)))
+        return result
+
+    def _write_coverage(self, issuer_code: str, period: int, coverage: List[Range]):
+        self._write(self._path(issuer_code, period, 'cov'),
+                    [f'{left.isoformat()};{right.isoformat()}' for left, right in coverage])
+
+    def _write(self, path: str, lines: List[str]):
+        """
+        Атомарно перезаписать файл
+        """
+        write_atomic(path, [''.join(f'{line}\n' for line in lines).encode()])
+
+
+def _is_intraday(period: int) -> bool:
+    return period < Period.DAY
+
+
+def _parse_date(value: str) -> date:
+    return date.fromisoformat(value)
+
+
+def merge_range(range_list: List[Range]) -> List[Range]:
+    """
+    Объединить пересекающиеся и смежные отрезки.
+
+    >>> merge_range([(date(2019, 1, 5), date(2019, 1, 9)), (date(2019, 1, 1), date(2019, 1, 4))])
+    [(datetime.date(2019, 1, 1), datetime.date(2019, 1, 9))]
+    """
+
+    result = []
+    for left, right in sorted(range_list):
+        if result and left <= result[-1][1] + timedelta(days=1):
+            result[-1] = (result[-1][0], max(result[-1][1], right))
+        else:
+            result.append((left, right))
+    return result
+
+
+def subtract_range(range_: Range, range_list: List[Range]) -> List[Range]:
+    """
+    Получить части отрезка, не покрытые перечнем отрезков.
+
+    >>> subtract_range((date(2019, 1, 1), date(2019, 1, 31)), [(date(2019, 1, 10), date(2019, 1, 20))])
+    [(datetime.date(2019, 1, 1), datetime.date(2019, 1, 9)), (datetime.date(2019, 1, 21), datetime.date(2019, 1, 31))]
+    """
+
+    result = []
+    left, right = range_
+    for cov_left, cov_right in merge_range(range_list):
+        if cov_right < left or cov_left > right:
+            continue
+        if cov_left > left:
+            result.append((left, cov_left - timedelta(days=1)))
+        left = cov_right + timedelta(days=1)
+        if left > right:
+            return result
+
+    result.append((left, right))
+    return result
+
+
+STORE_DIR_ENV = 'EQUITIES_CACHE_DIR'
+"""
+Переменная окружения с каталогом хранилища (см. enable_price_store), по умолчанию ~/.cache/equities
+"""
+
+_store: Optional[PriceStore] = None
+
+
+def enable_price_store(root: str = None) -> PriceStore:
+    """
+    Включить хранилище курсов. По умолчанию хранилище отключено, курсы всегда запрашиваются у finam.ru; хранилище
+    включают точки входа приложения (командная строка, web сервер, обновление по расписанию).
+
+    :param root: Каталог хранилища. Если не задан, из переменной окружения STORE_DIR_ENV либо ~/.cache/equities
+
+    :return: Хранилище
+    """
+
+    store = PriceStore(root or os.environ.get(STORE_DIR_ENV) or
+                       os.path.join(os.path.expanduser('~'), '.cache', 'equities'))
+    set_price_store(store)
+    return store
+
+
+def get_price_store() -> Optional[PriceStore]:
+    """
+    Получить текущее хранилище курсов. None, если хранилище отключено
+    """
+    return _store
+
+
+def set_price_store(store: Optional[PriceStore]):
+    """
+    Установить хранилище курсов.
+
+    :param store: Хранилище. None - отключить хранилище
+    """
+    global _store
+    _store = store
@@ -0,0 +1,219 @@
+"""
+Построение курсов крупной детализации (неделя, месяц, квартал, N минут) из курсов более мелкой детализации.
+
+Свеча крупной детализации объединяет подряд идущие свечи с одинаковым началом интервала: цена открытия - первой
+свечи, цена закрытия - последней, максимум и минимум - по всем свечам, объем - сумма объемов. Курсы обрабатываются
+потоково, в памяти хранится только текущая свеча.
+"""
+
+import re
+from datetime import date, datetime, timedelta
+from typing import Callable, Iterable, Iterator, NamedTuple, Optional, Union
+
+from src.equities.finam import iter_price
+from src.equities.price import Price, Period, PERIOD_BY_NAME
+from src.equities.price_store import get_price_store
+
+DateOrTime = Union[date, datetime]
+
+Bucket = Callable[[DateOrTime], DateOrTime]
+"""
+Функция, возвращающая по дате (дате и времени) курса начало интервала свечи крупной детализации
+"""
+
+
+class Timeframe(NamedTuple):
+    """
+    Детализация, получаемая объединением свечей
+    """
+
+    period: Period
+    """
+    Детализация исходных курсов
+    """
+
+    bucket: Bucket
+    """
+    Начало интервала свечи по дате курса
+    """
+
+
+def week_start(dt: DateOrTime) -> date:
+    """
+    Получить начало недели (понедельник)
+
+    >>> week_start(date(2019, 1, 3))
+    datetime.date(2018, 12, 31)
+    """
+    return _date(dt) - timedelta(days=dt.weekday())
+
+
+def month_start(dt: DateOrTime) -> date:
+    """
+    Получить начало месяца
+
+    >>> month_start(date(2019, 1, 3))
+    datetime.date(2019, 1, 1)
+    """
+    return _date(dt).replace(day=1)
+
+
+def quarter_start(dt: DateOrTime) -> date:
+    """
+    Получить начало квартала
+
+    >>> quarter_start(date(2019, 5, 3))
+    datetime.date(2019, 4, 1)
+    """
+    return date(dt.year, (dt.month - 1) // 3 * 3 + 1, 1)
+
+
+def minute_bucket(minutes: int) -> Bucket:
+    """
+    Получить функцию начала интервала длиной в кол-во минут, интервалы отсчитываются от начала суток
+
+    >>> minute_bucket(45)(datetime(2019, 1, 3, 10, 50))
+    datetime.datetime(2019, 1, 3, 10, 30)
+    """
+
+    def bucket(dt: datetime) -> datetime:
+        minute = (dt.hour * 60 + dt.minute) // minutes * minutes
+        return datetime(dt.year, dt.month, dt.day, minute // 60, minute % 60)
+
+    return bucket
+
+
+def _date(dt: DateOrTime) -> date:
+    return dt.date() if isinstance(dt, datetime) else dt
+
+
+_MINUTE_PERIODS = ((60, Period.HOUR), (30, Period.MIN30), (15, Period.MIN15), (10, Period.MIN10),
+                   (5, Period.MIN5), (1, Period.MIN1))
+"""
+Внутридневная детализация finam.ru по длительности в минутах, по убыванию
+"""
+
+TIMEFRAME_BY_NAME = {
+    '1w': Timeframe(Period.DAY, week_start),
+    '1mo': Timeframe(Period.DAY, month_start),
+    '1q': Timeframe(Period.DAY, quarter_start),
+}
+"""
+Детализация от дня, получаемая объединением дневных свечей, по краткому названию
+"""
+
+
+def get_timeframe(name: str) -> Optional[Timeframe]:
+    """
+    Получить детализацию, получаемую объединением свечей, по краткому названию: 1w, 1mo, 1q либо <N>m, <N>h.
+    Для N минут исходной является наиболее крупная детализация finam.ru, длительность которой кратна N.
+    None, если название некорректно
+
+    >>> get_timeframe('45m').period
+    <Period.MIN15: 5>
+    >>> get_timeframe('2h').period
+    <Period.HOUR: 7>
+    """
+
+    name = name.lower()
+    if name in TIMEFRAME_BY_NAME:
+        return TIMEFRAME_BY_NAME[name]
+
+    match = re.fullmatch(r'(\d+)([mh])', name)
+    if not match or int(match[1]) == 0:
+        return None
+
+    minutes = int(match[1]) * (60 if match[2] == 'h' else 1)
+    if minutes > 24 * 60:
+        return None
+
+    period = next(period for length, period in _MINUTE_PERIODS if minutes % length == 0)
+    return Timeframe(period, minute_bucket(minutes))
+
+
+def iter_price_by_name(issuer_code: str, dt_left: date, dt_right: date, name: str) -> Iterator[Price]:
+    """
+    Получить курс за временной отрезок потоково, с детализацией по краткому названию: детализация finam.ru
+    (см. PERIOD_BY_NAME) либо детализация, получаемая объединением свечей (см. get_timeframe).
+    Недельные и месячные курсы строятся из дневных, если дневные курсы за прошедшие дни отрезка есть в хранилище,
+    иначе запрашиваются у finam.ru. Свечи, получаемые объединением дневных, строятся за периоды целиком: первая
+    свеча включает дни периода до даты начала отрезка, последняя - дни до даты конца отрезка.
+
+    :param issuer_code: Код эмитента
+    :param dt_left: Дата начала отрезка
+    :param dt_right: Дата конца отрезка
+    :param name: Краткое название детализации
+
+    :raise: NotFoundIssuer, ValueError
+    """
+
+    timeframe = get_timeframe(name)
+    if timeframe is not None and timeframe.period == Period.DAY:
+        dt_left_period = timeframe.bucket(dt_left)
+    else:
+        dt_left_period = dt_left
+
+    period = PERIOD_BY_NAME.get(name.lower())
+    if period is not None and \
+            (period < Period.WEEK or not _is_stored(issuer_code, Period.DAY, dt_left_period, dt_right)):
+        return iter_price(issuer_code, dt_left, dt_right, period)
+
+    if timeframe is None:
+        raise ValueError(f'Детализация "{name}" не поддерживается!')
+
+    return resample(iter_price(issuer_code, dt_left_period, dt_right, timeframe.period), timeframe.bucket)
+
+
+def _is_stored(issuer_code: str, period: Period, dt_left: date, dt_right: date) -> bool:
+    """
+    Проверить, есть ли в хранилище курсы за прошедшие дни отрезка
+    """
+
+    store = get_price_store()
+    closed_right = min(dt_right, datetime.today().date() - timedelta(days=1))
+    return store is not None and dt_left <= closed_right and store.covers(issuer_code, period, dt_left, closed_right)
+
+
+def resample(price_iter: Iterable[Price], bucket: Bucket) -> Iterator[Price]:
+    """
+    Объединить свечи. Курсы должны быть упорядочены по возрастанию даты
+
+    :param price_iter: Курсы
+    :param bucket: Функция начала интервала свечи
+
+    >>> from decimal import Decimal as D
+    >>> list(resample([Price(date(2019, 1, 3), D(10), D(12), D(13), D(9), 100),
+    ...                Price(date(2019, 1, 4), D(12), D(11), D(14), D(10), 50)], week_start))
+    [Price(dt=datetime.date(2018, 12, 31), open=Decimal('10'), close=Decimal('11'), high=Decimal('14'), \
+low=Decimal('9'), volume=150)]
+    """
+
+    key = current = None
+    for price in price_iter:
+        price_key = bucket(price.dt)
+        if current is not None and price_key == key:
+            current = Price(key, current.open, price.close, max(current.high, _high(price)),
+                            min(current.low, _low(price)), _add(current.volume, price.volume))
+            continue
+
+        if current is not None:
+            yield current
+        key = price_key
+        current = Price(key, price.open, price.close, _high(price), _low(price), price.volume)
+
+    if current is not None:
+        yield current
+
+
+def _high(price: Price):
+    return price.high if price.high is not None else max(price.open, price.close)
+
+
+def _low(price: Price):
+    return price.low if price.low is not None else min(price.open, price.close)
+
+
+def _add(left: Optional[int], right: Optional[int]) -> Optional[int]:
+    if left is None or right is None:
+        return right if left is None else left
+    return left + right
@@ -0,0 +1,203 @@
+"""
+Механизмы устойчивости запросов к внешнему источнику:
+ * Объединение одновременных одинаковых запросов (single-flight)
+ * Повтор запроса с экспоненциальной задержкой
+ * Предохранитель (circuit breaker), прекращающий запросы к недоступному источнику
+"""
+
+import random
+import threading
+import time
+from typing import Callable, Hashable, Iterable, Iterator, List, Optional, TypeVar
+
+T = TypeVar('T')
+
+
+class SingleFlight:
+    """
+    Объединение одновременных одинаковых запросов: пока запрос по ключу выполняется, остальные запросы по тому же
+    ключу ожидают и получают его результат (либо исключение).
+    """
+
+    class _Call:
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error = None
+
+    def __init__(self):
+        self._call_dict = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, func: Callable[[], T]) -> T:
+        """
+        Выполнить запрос
+
+        :param key: Ключ запроса
+        :param func: Функция запроса
+        """
+
+        with self._lock:
+            call = self._call_dict.get(key)
+            leader = call is None
+            if leader:
+                call = self._call_dict[key] = self._Call()
+
+        if not leader:
+            call.done.wait()
+        else:
+            try:
+                call.result = func()
+            except Exception as err:
+                call.error = err
+            finally:
+                with self._lock:
+                    del self._call_dict[key]
+                call.done.set()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def do_iter(self, key: Hashable, func: Callable[[], Iterable[T]], size_max: int,
+                on_done: Callable[[List[T]], None] = None) -> Iterator[T]:
+        """
+        Выполнить запрос, результат которого формируется по частям. Ведущий запрос получает части по мере
+        формирования, остальные запросы по тому же ключу ожидают его завершения и получают все части сразу.
+        Если ведущий запрос прерван получателем либо результат больше size_max частей, ожидающие запросы выполняются
+        самостоятельно
+
+        :param key: Ключ запроса
+        :param func: Функция запроса
+        :param size_max: Максимальное кол-во частей результата, передаваемого ожидающим запросам
+        :param on_done: Функция, получающая результат ведущего запроса, если он не больше size_max частей
+
+        >>> flight = SingleFlight()
+        >>> list(flight.do_iter('a', lambda: iter('xyz'), 10, print))
+        ['x', 'y', 'z']
+        ['x', 'y', 'z']
+        """
+
+        with self._lock:
+            call = self._call_dict.get(key)
+            leader = call is None
+            if leader:
+                call = self._call_dict[key] = self._Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            yield from (call.result if call.result is not None else func())
+            return
+
+        result: Optional[List[T]] = []
+        try:
+            for item in func():
+                if result is not None:
+                    result.append(item)
+                    if len(result) > size_max:
+                        result = None
+                yield item
+            call.result = result
+        except Exception as err:
+            call.error = err
+            raise
+        finally:
+            with self._lock:
+                del self._call_dict[key]
+            call.done.set()
+
+        if result is not None and on_done is not None:
+            on_done(result)
+
+
+class CircuitOpen(Exception):
+    """
+    Исключение 'Источник недоступен, запросы временно прекращены'
+    """
+    def __init__(self):
+        super().__init__('Источник данных временно недоступен!')
+
+
+class CircuitBreaker:
+    """
+    Предохранитель. После failure_max ошибок подряд запросы прекращаются на reset_timeout секунд (CircuitOpen),
+    затем пропускается один пробный запрос: при успехе предохранитель закрывается, при ошибке снова размыкается.
+
+    >>> breaker = CircuitBreaker(failure_max=1, reset_timeout=60)
+    >>> breaker.call(lambda: 1 / 0)
+    Traceback (most recent call last):
+    ...
+    ZeroDivisionError: division by zero
+    >>> breaker.call(lambda: 1)
+    Traceback (most recent call last):
+    ...
+    src.equities.resilience.CircuitOpen: Источник данных временно недоступен!
+    """
+
+    def __init__(self, failure_max: int = 5, reset_timeout: float = 30.0):
+        """
+        :param failure_max: Кол-во ошибок подряд, после которого предохранитель размыкается
+        :param reset_timeout: Время в секундах, на которое прекращаются запросы
+        """
+
+        self._failure_max = failure_max
+        self._reset_timeout = reset_timeout
+        self._failure_count = 0
+        self._open_until = 0.0
+        self._probe = False
+        self._lock = threading.Lock()
+
+    def call(self, func: Callable[[], T]) -> T:
+        """
+        Выполнить запрос через предохранитель
+
+        :param func: Функция запроса
+        :raise: CircuitOpen
+        """
+
+        with self._lock:
+            if self._failure_count >= self._failure_max:
+                if self._probe or time.monotonic() < self._open_until:
+                    raise CircuitOpen()
+                self._probe = True
+
+        try:
+            result = func()
+        except Exception:
+            with self._lock:
+                self._probe = False
+                self._failure_count += 1
+                if self._failure_count >= self._failure_max:
+                    self._open_until = time.monotonic() + self._reset_timeout
+            raise
+
+        with self._lock:
+            self._probe = False
+            self._failure_count = 0
+
+        return result
+
+
+def retry(func: Callable[[], T], retry_on: Callable[[Exception], bool], attempts: int = 3, backoff: float = 0.5,
+          backoff_max: float = 8.0) -> T:
+    """
+    Выполнить запрос с повтором при ошибке. Задержка перед повтором растет экспоненциально, со случайным
+    разбросом (чтобы повторы разных клиентов не совпадали по времени).
+
+    :param func: Функция запроса
+    :param retry_on: Функция, определяющая по исключению, нужно ли повторить запрос
+    :param attempts: Максимальное кол-во попыток
+    :param backoff: Задержка перед первым повтором в секундах
+    :param backoff_max: Максимальная задержка в секундах
+    """
+
+    for attempt in range(attempts):
+        try:
+            return func()
+        except Exception as err:
+            if attempt == attempts - 1 or not retry_on(err):
+                raise
+
+        time.sleep(random.uniform(0, min(backoff_max, backoff * 2 ** attempt)))
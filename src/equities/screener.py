@@ -0,0 +1,163 @@
+"""
+Сравнение эмитентов между собой: ранжирование по доходности, волатильности и объему, матрица корреляций доходностей.
+
+Ряды курсов выравниваются по общему индексу дат в матрицу (строка - дата, столбец - эмитент), отсутствующие
+значения равны NaN. Показатели по всем эмитентам вычисляются матричными операциями NumPy.
+"""
+
+from typing import Dict, List, NamedTuple, Tuple
+
+import numpy as np
+
+from src.equities.indicators import log_returns
+from src.equities.series import PriceSeries
+
+METRIC_LIST = ('return', 'volatility', 'volume')
+"""
+Показатели ранжирования: доходность за отрезок, стандартное отклонение дневной логарифмической доходности,
+суммарный объем
+"""
+
+
+class AlignedSeries(NamedTuple):
+    """
+    Ряды курсов нескольких эмитентов, выровненные по общему индексу дат
+    """
+
+    code: List[str]
+    """
+    Коды эмитентов (столбцы)
+    """
+
+    dt: np.ndarray
+    """
+    Общий индекс дат (строки), по возрастанию
+    """
+
+    close: np.ndarray
+    """
+    Цены закрытия, матрица float64 (дата x эмитент), NaN - нет курса
+    """
+
+    volume: np.ndarray
+    """
+    Объемы, матрица float64 (дата x эмитент), NaN - нет данных
+    """
+
+
+def align(series_by_code: Dict[str, PriceSeries]) -> AlignedSeries:
+    """
+    Выровнять ряды курсов по общему индексу дат (объединению дат всех рядов)
+
+    :param series_by_code: Словарь {Код эмитента: Ряд курсов}
+
+    >>> from datetime import date
+    >>> from decimal import Decimal as D
+    >>> from src.equities.price import Price
+    >>> aligned = align({'A': PriceSeries.from_price_list([Price(date(2019, 1, 3), D(1), D(2))]),
+    ...                  'B': PriceSeries.from_price_list([Price(date(2019, 1, 4), D(3), D(4))])})
+    >>> aligned.close.tolist()
+    [[2.0, nan], [nan, 4.0]]
+    """
+
+    code_list = list(series_by_code)
+    series_list = list(series_by_code.values())
+    dt = np.unique(np.concatenate([series.dt for series in series_list])) if series_list \
+        else np.array([], dtype='datetime64[D]')
+
+    close = np.full((len(dt), len(series_list)), np.nan)
+    volume = np.full((len(dt), len(series_list)), np.nan)
+    for column, series in enumerate(series_list):
+        row = np.searchsorted(dt, series.dt)
+        close[row, column] = series.close
+        volume[row, column] = np.where(series.volume < 0, np.nan, series.volume)
+
+    return AlignedSeries(code_list, dt, close, volume)
+
+
+def get_metric(aligned: AlignedSeries, metric: str) -> np.ndarray:
+    """
+    Вычислить показатель по каждому эмитенту (см. METRIC_LIST)
+
+    :param aligned: Выровненные ряды
+    :param metric: Показатель
+
+    :raise: ValueError
+
+    :return: Массив значений по эмитентам, NaN - недостаточно данных
+    """
+
+    close = aligned.close
+    if metric == 'return':
+        has_close = ~np.isnan(close)
+        if not len(close):
+            return np.full(close.shape[1], np.nan)
+        first = np.argmax(has_close, axis=0)
+        last = len(close) - 1 - np.argmax(has_close[::-1], axis=0)
+        column = np.arange(close.shape[1])
+        return close[last, column] / close[first, column] - 1.0
+
+    if metric == 'volatility':
+        returns = log_returns(close)
+        count = np.sum(~np.isnan(returns), axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = np.nansum(returns, axis=0) / count
+            result = np.sqrt(np.nansum((returns - mean) ** 2, axis=0) / (count - 1))
+        result[count < 2] = np.nan
+        return result
+
+    if metric == 'volume':
+        has_volume = np.any(~np.isnan(aligned.volume), axis=0)
+        return np.where(has_volume, np.nansum(aligned.volume, axis=0), np.nan)
+
+    raise ValueError(f'Показатель "{metric}" не поддерживается!')
+
+
+def rank(aligned: AlignedSeries, metric: str, ascending: bool = False) -> List[Tuple[str, float]]:
+    """
+    Ранжировать эмитентов по показателю. Эмитенты без значения показателя не включаются
+
+    :param aligned: Выровненные ряды
+    :param metric: Показатель (см. METRIC_LIST)
+    :param ascending: По возрастанию показателя
+
+    :raise: ValueError
+
+    :return: Список пар (Код эмитента, Значение)
+    """
+
+    value = get_metric(aligned, metric)
+    index = np.flatnonzero(~np.isnan(value))
+    index = index[np.argsort(value[index] if ascending else -value[index], kind='stable')]
+    return [(aligned.code[i], value[i].item()) for i in index]
+
+
+def correlation(returns: np.ndarray) -> np.ndarray:
+    """
+    Матрица попарных корреляций столбцов. Для каждой пары используются строки, где заданы оба значения
+    (pairwise complete), поэтому ряды разной длины не сокращают выборку остальных пар.
+    Суммы по парам вычисляются произведением матриц, без циклов по парам
+
+    :param returns: Матрица доходностей (дата x эмитент), NaN - нет значения
+
+    :return: Симметричная матрица (эмитент x эмитент), NaN - менее двух общих значений либо нулевая дисперсия
+
+    >>> correlation(np.array([[1., 2., 1.], [2., 4., np.nan], [3., 5., 0.]])).round(4).tolist()
+    [[1.0, 0.982, -1.0], [0.982, 1.0, -1.0], [-1.0, -1.0, 1.0]]
+    """
+
+    mask = (~np.isnan(returns)).astype(np.float64)
+    value = np.where(mask > 0, returns, 0.0)
+
+    count = mask.T @ mask
+    sum_x = value.T @ mask
+    sum_xx = (value * value).T @ mask
+    sum_xy = value.T @ value
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cov = sum_xy - sum_x * sum_x.T / count
+        var_x = sum_xx - sum_x * sum_x / count
+        result = cov / np.sqrt(var_x * var_x.T)
+
+    result[count < 2] = np.nan
+    return np.clip(result, -1.0, 1.0)
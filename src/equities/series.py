@@ -0,0 +1,253 @@
+"""
+Колоночное представление курсов ценной бумаги на массивах NumPy.
+
+В отличие от списка Price, ряд хранит даты и цены в непрерывных массивах, что позволяет выполнять векторные
+вычисления без циклов Python и получать срезы по датам без копирования.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, List, Iterable, Union
+
+import numpy as np
+
+from src.equities.bar_file import NO_VALUE, PRICE_DIGITS
+from src.equities.finam import Price, Period, iter_price
+from src.equities.price_store import get_price_store
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+"""
+Порядковый номер дня начала отсчета datetime64
+"""
+
+_BAR_DTYPE = np.dtype([('time', '<i8'), ('open', '<i8'), ('high', '<i8'), ('low', '<i8'), ('close', '<i8'),
+                       ('volume', '<i8')])
+"""
+Тип записи файла курсов (см. bar_file.RECORD)
+"""
+
+
+class PriceSeries:
+    """
+    Ряд курсов ценной бумаги (OHLCV), упорядоченный по дате.
+
+    >>> series = PriceSeries.from_price_list([Price(date(2019, 1, 3), Decimal('186.5'), Decimal('188.2')),
+    ...                                       Price(date(2019, 1, 4), Decimal('188.2'), Decimal('190'))])
+    >>> series.slice(date(2019, 1, 4), date(2019, 1, 31)).to_price_list()
+    [Price(dt=datetime.date(2019, 1, 4), open=Decimal('188.2'), close=Decimal('190.0'), high=None, low=None, \
+volume=None)]
+    """
+
+    __slots__ = ('dt', 'open', 'close', 'high', 'low', 'volume')
+
+    def __init__(self, dt: np.ndarray, open_: np.ndarray, close: np.ndarray, high: np.ndarray = None,
+                 low: np.ndarray = None, volume: np.ndarray = None):
+        """
+        :param dt: Даты, массив datetime64[D] (либо datetime64[s] для внутридневной детализации) по возрастанию
+        :param open_: Цены на начало дня, массив float64
+        :param close: Цены на окончание дня, массив float64
+        :param high: Максимальные цены, массив float64. Если не задан, заполняется NaN
+        :param low: Минимальные цены, массив float64. Если не задан, заполняется NaN
+        :param volume: Объемы, массив int64. Если не задан, заполняется -1
+
+        :raise: ValueError
+        """
+
+        high = np.full(len(dt), np.nan) if high is None else high
+        low = np.full(len(dt), np.nan) if low is None else low
+        volume = np.full(len(dt), -1, dtype=np.int64) if volume is None else volume
+
+        if not len(dt) == len(open_) == len(close) == len(high) == len(low) == len(volume):
+            raise ValueError('Некорректно заданы колонки ряда!')
+
+        self.dt: np.ndarray = dt
+        """
+        Даты
+        """
+
+        self.open: np.ndarray = open_
+        """
+        Цены на начало дня
+        """
+
+        self.close: np.ndarray = close
+        """
+        Цены на окончание дня
+        """
+
+        self.high: np.ndarray = high
+        """
+        Максимальные цены, NaN - нет данных
+        """
+
+        self.low: np.ndarray = low
+        """
+        Минимальные цены, NaN - нет данных
+        """
+
+        self.volume: np.ndarray = volume
+        """
+        Объемы, -1 - нет данных
+        """
+
+    @classmethod
+    def from_price_list(cls, price_list: Iterable[Price]) -> 'PriceSeries':
+        """
+        Сформировать ряд из курсов
+
+        :param price_list: Курсы по возрастанию даты
+        """
+
+        dt_list, open_list, close_list, high_list, low_list, volume_list = [], [], [], [], [], []
+        for price in price_list:
+            dt_list.append(price.dt)
+            open_list.append(price.open)
+            close_list.append(price.close)
+            high_list.append(np.nan if price.high is None else price.high)
+            low_list.append(np.nan if price.low is None else price.low)
+            volume_list.append(-1 if price.volume is None else price.volume)
+
+        if dt_list and isinstance(dt_list[0], datetime):
+            dt = np.array(dt_list, dtype='datetime64[s]')
+        else:
+            # Преобразование через порядковый номер дня в разы быстрее преобразования объектов date
+            dt = (np.fromiter(map(date.toordinal, dt_list), np.int64, len(dt_list)) - _EPOCH_ORDINAL) \
+                .astype('datetime64[D]')
+
+        return cls(dt,
+                   _to_float_array(open_list),
+                   _to_float_array(close_list),
+                   _to_float_array(high_list),
+                   _to_float_array(low_list),
+                   np.array(volume_list, dtype=np.int64))
+
+    @classmethod
+    def from_bars(cls, data: bytes, intraday: bool) -> 'PriceSeries':
+        """
+        Сформировать ряд из записей файла курсов (см. bar_file) без преобразования записей в Price
+
+        :param data: Записи по возрастанию времени
+        :param intraday: Внутридневная детализация
+
+        >>> from src.equities.bar_file import pack_price
+        >>> PriceSeries.from_bars(pack_price([Price(date(2019, 1, 3), Decimal('186.5'), Decimal('188.2'))]),
+        ...                       False).to_price_list()
+        [Price(dt=datetime.date(2019, 1, 3), open=Decimal('186.5'), close=Decimal('188.2'), high=None, low=None, \
+volume=None)]
+        """
+
+        bars = np.frombuffer(data, dtype=_BAR_DTYPE)
+        dt = bars['time'].astype('datetime64[s]') if intraday else (bars['time'] // 86400).astype('datetime64[D]')
+        return cls(dt, _from_fixed(bars['open']), _from_fixed(bars['close']), _from_fixed(bars['high']),
+                   _from_fixed(bars['low']), np.where(bars['volume'] == NO_VALUE, -1, bars['volume']))
+
+    def to_price_list(self) -> List[Price]:
+        """
+        Получить список курсов
+        """
+        return [self[i] for i in range(len(self))]
+
+    def slice(self, dt_left: date, dt_right: date) -> 'PriceSeries':
+        """
+        Получить срез ряда за отрезок дат (включительно). Колонки среза - представления колонок ряда, без копирования
+
+        :param dt_left: Дата начала отрезка
+        :param dt_right: Дата конца отрезка
+        """
+
+        left = np.searchsorted(self.dt, np.datetime64(dt_left, 'D'), side='left')
+        right = np.searchsorted(self.dt, np.datetime64(dt_right, 'D') + 1, side='left')
+        return self[left:right]
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Price, 'PriceSeries']:
+        if isinstance(index, slice):
+            return PriceSeries(self.dt[index], self.open[index], self.close[index], self.high[index],
+                               self.low[index], self.volume[index])
+
+        high, low, volume = self.high[index].item(), self.low[index].item(), self.volume[index].item()
+        return Price(self.dt[index].item(), _to_decimal(self.open[index].item()),
+                     _to_decimal(self.close[index].item()), _to_decimal(high), _to_decimal(low),
+                     None if volume < 0 else volume)
+
+    def __len__(self) -> int:
+        return len(self.dt)
+
+    def __repr__(self) -> str:
+        if not len(self):
+            return 'PriceSeries([])'
+        return f'PriceSeries({len(self)} x [{self.dt[0]} .. {self.dt[-1]}])'
+
+    def nbytes(self) -> int:
+        """
+        Получить объем памяти, занимаемый колонками ряда
+        """
+        return sum(getattr(self, column).nbytes for column in self.__slots__)
+
+
+def _from_fixed(value: np.ndarray) -> np.ndarray:
+    """
+    Преобразовать цены в фиксированной точке (см. bar_file) в массив float64, NO_VALUE - NaN
+    """
+    return np.where(value == NO_VALUE, np.nan, value / 10.0 ** PRICE_DIGITS)
+
+
+def _to_float_array(value_list: list) -> np.ndarray:
+    """
+    Преобразовать список цен (Decimal либо float) в массив float64
+    """
+    return np.fromiter(map(float, value_list), np.float64, len(value_list))
+
+
+def _to_decimal(value: float) -> Decimal:
+    """
+    Преобразовать цену в Decimal по кратчайшему десятичному представлению. NaN - None
+    """
+    return None if value != value else Decimal(repr(value))
+
+
+def get_price_series(issuer_code: str, dt_left: date, dt_right: date, period: Period = Period.DAY) -> PriceSeries:
+    """
+    Получить ряд курсов за временной отрезок (см. finam.iter_price)
+
+    :param issuer_code: Код эмитента
+    :param dt_left: Дата начала отрезка
+    :param dt_right: Дата конца отрезка
+    :param period: Детализация
+
+    :raise: NotFoundIssuer
+    """
+
+    # Курсы за прошедшие дни, полученные ранее, читаются из файла хранилища напрямую в массивы
+    store = get_price_store()
+    if store is not None and period <= Period.DAY and dt_right < datetime.today().date():
+        data = store.get_bars(issuer_code, period, dt_left, dt_right)
+        if data is not None:
+            return PriceSeries.from_bars(data, period < Period.DAY)
+
+    return PriceSeries.from_price_list(iter_price(issuer_code, dt_left, dt_right, period))
+
+
+def get_price_series_many(issuer_code_list: List[str], dt_left: date, dt_right: date, period: Period = Period.DAY,
+                          max_workers: int = 8) -> Dict[str, Union[PriceSeries, Exception]]:
+    """
+    Получить ряды курсов нескольких эмитентов за временной отрезок (см. finam.get_price_many).
+    Ряды загружаются параллельно, ошибка по одному эмитенту не прерывает получение остальных
+
+    :param issuer_code_list: Список кодов эмитентов
+    :param dt_left: Дата начала отрезка
+    :param dt_right: Дата конца отрезка
+    :param period: Детализация
+    :param max_workers: Максимальное кол-во одновременно загружаемых рядов
+
+    :return: Словарь {Код эмитента: Ряд курсов или исключение}, в порядке списка кодов
+    """
+
+    def _get_price_series(issuer_code: str) -> Union[PriceSeries, Exception]:
+        try:
+            return get_price_series(issuer_code, dt_left, dt_right, period)
+        except Exception as err:
+            return err
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(zip(issuer_code_list, executor.map(_get_price_series, issuer_code_list)))
@@ -0,0 +1,214 @@
+"""
+Транспорт запросов к finam.ru.
+
+Транспорт держит пул постоянных (keep-alive) HTTP соединений, общий для всех запросов к finam.ru. Текущий
+транспорт можно заменить, например на транспорт к локальному тестовому серверу (см. set_transport).
+
+Запросы повторяются при сетевых ошибках и ошибках сервера (5xx) с экспоненциальной задержкой. При серии ошибок
+предохранитель временно прекращает запросы к хосту (см. resilience).
+"""
+
+import http.client
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from src.equities.resilience import CircuitBreaker, retry
+from src.metrics import REGISTRY, Counter
+
+_RESPONSES = REGISTRY.add(Counter(
+    'transport_responses_total', 'Кол-во ответов по HTTP статусу, error - сетевая ошибка', ('host', 'status')))
+
+
+class TransportError(Exception):
+    """
+    Исключение 'Ошибка запроса'
+    """
+    def __init__(self, status: int, reason: str):
+        """
+        :param status: HTTP статус ответа
+        :param reason: Описание статуса
+        """
+        super().__init__(f'Ошибка запроса! {status} {reason}')
+        self.status = status
+
+
+class RateLimiter:
+    """
+    Ограничитель частоты запросов (равномерный интервал между запросами).
+    """
+
+    def __init__(self, rate: float):
+        """
+        :param rate: Максимальное кол-во запросов в секунду. Если 0, без ограничений.
+        """
+        self._interval = 1 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """
+        Дождаться возможности выполнить запрос
+        """
+
+        if not self._interval:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            at = max(now, self._next)
+            self._next = at + self._interval
+
+        if at > now:
+            time.sleep(at - now)
+
+
+class Transport:
+    """
+    HTTP транспорт с пулом постоянных соединений.
+    """
+
+    def __init__(self, host: str, port: int = 80, pool_size: int = 8, timeout: float = 30.0,
+                 rate_limit: float = 0, retry_attempts: int = 3, breaker: CircuitBreaker = None):
+        """
+        :param host: Хост
+        :param port: Порт
+        :param pool_size: Максимальное кол-во одновременно открытых соединений
+        :param timeout: Таймаут соединения и чтения в секундах
+        :param rate_limit: Максимальное кол-во запросов к хосту в секунду. Если 0, без ограничений.
+        :param retry_attempts: Максимальное кол-во попыток запроса
+        :param breaker: Предохранитель. Если не задан, используется предохранитель с параметрами по умолчанию
+
+        :raise: ValueError
+        """
+
+        if pool_size < 1:
+            raise ValueError('Некорректно задан размер пула!')
+
+        self._host = host
+        self._port = port
+        self._timeout = timeout
+
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(pool_size)
+        self._rate_limiter = RateLimiter(rate_limit)
+        self._retry_attempts = retry_attempts
+        self._breaker = breaker or CircuitBreaker()
+
+    def get_host(self) -> str:
+        """
+        Получить хост
+        """
+        return self._host
+
+    @contextmanager
+    def open(self, path: str) -> Iterator[http.client.HTTPResponse]:
+        """
+        Выполнить GET запрос. По завершении соединение возвращается в пул, если сервер его не закрывает.
+
+        :param path: Путь запроса с параметрами
+        :raise: TransportError, OSError, CircuitOpen
+
+        :return: Ответ (файлоподобный объект)
+        """
+
+        def _attempt():
+            self._rate_limiter.wait()
+            try:
+                conn_, response_ = self._request(path)
+            except OSError:
+                _RESPONSES.inc(host=self._host, status='error')
+                raise
+
+            _RESPONSES.inc(host=self._host, status=response_.status)
+            if response_.status >= 500:
+                conn_.close()
+                raise TransportError(response_.status, response_.reason)
+            return conn_, response_
+
+        with self._slots:
+            conn, response = retry(lambda: self._breaker.call(_attempt), _is_retryable, self._retry_attempts)
+            try:
+                if response.status != 200:
+                    raise TransportError(response.status, response.reason)
+                yield response
+            except BaseException:
+                conn.close()
+                raise
+
+            if response.will_close:
+                conn.close()
+                return
+
+            # Дочитываем остаток ответа, чтобы соединение можно было использовать повторно
+            response.read()
+            self._idle.put(conn)
+
+    def close(self):
+        """
+        Закрыть свободные соединения пула
+        """
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def _request(self, path: str):
+        """
+        Отправить запрос, при необходимости переоткрыв закрытое сервером соединение.
+        """
+
+        try:
+            conn = self._idle.get_nowait()
+            reused = True
+        except queue.Empty:
+            conn = http.client.HTTPConnection(self._host, self._port, timeout=self._timeout)
+            reused = False
+
+        try:
+            conn.request('GET', path, headers={'Connection': 'keep-alive'})
+            return conn, conn.getresponse()
+        except (http.client.RemoteDisconnected, ConnectionError):
+            conn.close()
+            if not reused:
+                raise
+
+        # Сервер закрыл простаивающее соединение, повторяем по новому соединению
+        conn = http.client.HTTPConnection(self._host, self._port, timeout=self._timeout)
+        try:
+            conn.request('GET', path, headers={'Connection': 'keep-alive'})
+            return conn, conn.getresponse()
+        except BaseException:
+            conn.close()
+            raise
+
+
+def _is_retryable(err: Exception) -> bool:
+    """
+    Проверить, нужно ли повторить запрос после ошибки: сетевые ошибки и ошибки сервера
+    """
+    return isinstance(err, (OSError, TransportError))
+
+
+_transport = Transport('export.finam.ru', rate_limit=20)
+
+
+def get_transport() -> Transport:
+    """
+    Получить текущий транспорт
+    """
+    return _transport
+
+
+def set_transport(transport: Transport):
+    """
+    Установить транспорт. Свободные соединения предыдущего транспорта закрываются.
+
+    :param transport: Транспорт
+    """
+    global _transport
+    _transport, previous = transport, _transport
+    previous.close()
@@ -0,0 +1,147 @@
+"""
+Ежедневное обновление локального хранилища курсов (см. price_store).
+
+Для каждого эмитента у finam.ru запрашиваются только курсы после последнего полученного отрезка по последний
+закрытый день, полученные курсы дописываются в хранилище. Эмитенты без курсов в хранилище пропускаются, если не
+задана дата начала истории.
+
+Запуск по расписанию (например, cron), код завершения 1 - если обновление хотя бы одного эмитента завершилось ошибкой:
+python -m src.equities.updater [--since <дд.мм.гг>] [--period <детализация>] [<код> ...]
+"""
+
+import argparse
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional, Union
+
+from src.equities.finam import iter_price
+from src.equities.issuer_directory import get_code_list
+from src.equities.price import Period, PERIOD_BY_NAME
+from src.equities.price_store import enable_price_store, get_price_store
+
+
+class UpdateError(Exception):
+    """
+    Исключение 'Обновление невозможно'
+    """
+    pass
+
+
+class Update(NamedTuple):
+    """
+    Обновление курсов эмитента
+    """
+
+    dt_left: date
+    """
+    Дата начала запрошенного отрезка
+    """
+
+    dt_right: date
+    """
+    Дата конца запрошенного отрезка
+    """
+
+    row_count: int
+    """
+    Кол-во добавленных курсов
+    """
+
+
+def update_price(issuer_code_list: Iterable[str] = None, period: Period = Period.DAY, dt_first: date = None,
+                 max_workers: int = 8) -> Dict[str, Union[Optional[Update], Exception]]:
+    """
+    Дополнить хранилище курсами эмитентов по последний закрытый день.
+
+    :param issuer_code_list: Список кодов эмитентов. Если не задан, все эмитенты
+    :param period: Детализация, не более дня
+    :param dt_first: Дата начала истории для эмитентов без курсов в хранилище. Если не задана, такие эмитенты
+    пропускаются
+    :param max_workers: Кол-во одновременно обновляемых эмитентов
+
+    :raise: UpdateError
+
+    :return: Словарь {Код эмитента: Обновление, None если обновление не требуется, либо исключение}
+    """
+
+    store = get_price_store()
+    if store is None:
+        raise UpdateError('Хранилище курсов отключено!')
+    if period > Period.DAY:
+        raise UpdateError('Недельные и месячные курсы в хранилище не сохраняются!')
+
+    dt_right = datetime.today().date() - timedelta(days=1)
+
+    def _update(issuer_code: str) -> Union[Optional[Update], Exception]:
+        try:
+            last_date = store.get_last_date(issuer_code, period)
+            dt_left = last_date + timedelta(days=1) if last_date is not None else dt_first
+            if dt_left is None or dt_left > dt_right:
+                return None
+
+            price_list = list(iter_price(issuer_code, dt_left, dt_right, period, use_store=False))
+            store.append(issuer_code, period, dt_left, dt_right, price_list)
+            return Update(dt_left, dt_right, len(price_list))
+        except Exception as err:
+            return err
+
+    code_list = list(dict.fromkeys(code.upper() for code in (issuer_code_list or get_code_list())))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(zip(code_list, executor.map(_update, code_list)))
+
+
+def format_update(result: Dict[str, Union[Optional[Update], Exception]]) -> List[str]:
+    """
+    Получить отчет об обновлении: строки по эмитентам с новыми курсами либо ошибкой и итоговая строка
+
+    :param result: Результат update_price
+
+    >>> format_update({'SBER': Update(date(2019, 1, 3), date(2019, 1, 4), 2), 'GAZP': None})
+    ['SBER: +2 (03.01.19 - 04.01.19)', 'Обновлено эмитентов "1" (курсов "2"), без изменений "1", с ошибкой "0"']
+    """
+
+    line_list, row_count, unchanged_count, error_count = [], 0, 0, 0
+    for issuer_code, value in result.items():
+        if isinstance(value, Exception):
+            line_list.append(f'{issuer_code}: Ошибка! {str(value) or type(value).__name__}')
+            error_count += 1
+        elif value is None or value.row_count == 0:
+            unchanged_count += 1
+        else:
+            line_list.append(f'{issuer_code}: +{value.row_count} '
+                             f'({value.dt_left.strftime("%d.%m.%y")} - {value.dt_right.strftime("%d.%m.%y")})')
+            row_count += value.row_count
+
+    return line_list + [f'Обновлено эмитентов "{len(result) - unchanged_count - error_count}" (курсов "{row_count}"), '
+                        f'без изменений "{unchanged_count}", с ошибкой "{error_count}"']
+
+
+def main(argv=None) -> int:
+    """
+    Запустить обновление с параметрами командной строки
+
+    :return: Код завершения
+    """
+
+    parser = argparse.ArgumentParser(description='Обновление хранилища курсов')
+    parser.add_argument('--since', type=lambda value: datetime.strptime(value, '%d.%m.%y').date(),
+                        help='Дата начала истории для эмитентов без курсов в хранилище, дд.мм.гг')
+    parser.add_argument('--period', choices=[name for name, period in PERIOD_BY_NAME.items() if period <= Period.DAY],
+                        default='1d', help='Детализация')
+    parser.add_argument('codes', nargs='*', help='Коды эмитентов, по умолчанию все эмитенты')
+    args = parser.parse_args(argv)
+
+    enable_price_store()
+    try:
+        result = update_price(args.codes, PERIOD_BY_NAME[args.period], args.since)
+    except UpdateError as err:
+        print(f'Ошибка! {str(err)}', file=sys.stderr)
+        return 1
+
+    print('\n'.join(format_update(result)))
+    return 1 if any(isinstance(value, Exception) for value in result.values()) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
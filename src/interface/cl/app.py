@@ -1,12 +1,47 @@
 """
 Реализация интерфейса 'командная строка'.
+
+Режимы работы:
+ * <команда> [параметры] [| <команда> [параметры] ...] - выполнить одну команду либо конвейер команд
+ (см. Manager.run_batch), разделитель конвейера экранируется: '|'
+ * --batch [<файл>] - выполнить пакет команд из файла либо стандартного ввода, по одной команде (конвейеру) на
+ строку. Команды выполняются параллельно, результаты выводятся в порядке команд
+ * --repl - читать команды из стандартного ввода, по одной на строку, до конца ввода либо команды 'exit'
+ * --serve <сокет> - запустить демон, выполняющий команды клиентов через unix сокет. Сокет, оставшийся после
+ аварийного завершения демона, заменяется; если демон на сокете работает либо путь занят файлом - ошибка
+ * --connect <сокет> <команда> [параметры] - выполнить команду в запущенном демоне
+ * --profile[=<файл.prof>] [--tracemalloc] <команда> [параметры] - выполнить одну команду под профилировщиком,
+ отчет о наиболее затратных функциях (и выделении памяти) выводится в stderr, профиль сохраняется в файл
+
+В режимах repl и serve реестр команд, кэши и соединения с источником данных переиспользуются между командами.
+Курсы за закрытые дни сохраняются в локальном хранилище (см. price_store.enable_price_store).
 """
 
+import os
+import stat
 import sys
 from os import linesep
 from typing import List
 
-from src.interface.core.commands.manager import Manager, UnknownCmd
+PROFILE_OPTION = '--profile'
+"""
+Параметр профилирования команды
+"""
+
+TRACEMALLOC_OPTION = '--tracemalloc'
+"""
+Параметр профилирования выделения памяти (вместе с PROFILE_OPTION)
+"""
+
+BATCH_OPTION = '--batch'
+"""
+Параметр пакетного выполнения команд
+"""
+
+REPL_EXIT = 'exit'
+"""
+Команда завершения режима repl
+"""
 
 
 def run():
@@ -14,16 +49,221 @@ def run():
     Запустить обработку параметров командной строки.
     """
 
-    if len(sys.argv) <= 1:
-        _print_result_cmd(Manager.help())
+    if len(sys.argv) > 2 and sys.argv[1] == '--connect':
+        _print_result_cmd(_run_client(sys.argv[2], sys.argv[3:]))
         return
 
-    try:
-        _print_result_cmd(Manager.run_cmd(sys.argv[1], sys.argv[2:]))
+    # Клиент демона (--connect) курсы не получает, хранилище курсов включается для остальных режимов
+    from src.equities.price_store import enable_price_store
+    enable_price_store()
+
+    if len(sys.argv) > 1 and sys.argv[1] == '--repl':
+        _run_repl()
+    elif len(sys.argv) > 2 and sys.argv[1] == '--serve':
+        _run_server(sys.argv[2])
+    elif len(sys.argv) > 1 and sys.argv[1] == BATCH_OPTION:
+        _run_batch(sys.argv[2] if len(sys.argv) > 2 else '-')
+    elif len(sys.argv) > 1 and sys.argv[1].split('=')[0] == PROFILE_OPTION:
+        _run_profiled(sys.argv[1:])
+    else:
+        _print_result_cmd(_execute(sys.argv[1:]))
+
+
+def _execute(params: List[str]) -> List[str]:
+    """
+    Выполнить команду
+
+    :param params: Имя команды и параметры. Если пусто, выполняется команда помощи
+    :return: Результат выполнения команды
+    """
+
+    # Импорт при выполнении, чтобы клиент демона (--connect) не загружал реестр команд
+    from src.interface.core.commands.manager import Manager, UnknownCmd, PIPE
+
+    if len(params) < 1:
+        return Manager.help()
+
+    if PIPE in params:
+        return Manager.run_batch([' '.join(params)])[0][1]
 
+    try:
+        return Manager.run_cmd(params[0], params[1:])
     except UnknownCmd as err:
-        print(f'Ошибка! {str(err)}')
-        _print_result_cmd(Manager.help())
+        return [f'Ошибка! {str(err)}'] + Manager.help()
+
+
+def _run_profiled(params: List[str]):
+    """
+    Выполнить команду под профилировщиком
+
+    :param params: Параметры профилирования, имя команды и параметры
+    """
+
+    from src.interface.core.profiling import run_profiled
+
+    output = params[0].partition('=')[2] or None
+    memory = len(params) > 1 and params[1] == TRACEMALLOC_OPTION
+    params = params[2:] if memory else params[1:]
+
+    _, report = run_profiled(lambda: _print_result_cmd(_execute(params)), output, memory)
+    print(linesep.join(report), file=sys.stderr)
+
+
+def _run_batch(path: str):
+    """
+    Выполнить пакет команд
+
+    :param path: Путь файла с командами, '-' - стандартный ввод
+    """
+
+    from src.interface.core.commands.manager import Manager
+
+    if path == '-':
+        cmd_line_list = sys.stdin.readlines()
+    else:
+        with open(path, encoding='utf-8') as file:
+            cmd_line_list = file.readlines()
+
+    for cmd_line, result in Manager.run_batch(cmd_line_list):
+        _print_result_cmd([f'> {cmd_line}'] + result)
+
+
+def _execute_safe(params: List[str]) -> List[str]:
+    """
+    Выполнить команду, ошибка выполнения возвращается строкой результата (для режимов repl и serve, где ошибка
+    одной команды не должна прерывать работу)
+    """
+
+    try:
+        return _execute(params)
+    except Exception as err:
+        return [f'Ошибка! {str(err)}']
+
+
+def _clear_cache_on_issuers_change():
+    """
+    Очищать кэш результатов при замене справочника эмитентов, например его обновлении по расписанию (для режимов
+    repl и serve, где кэш сохраняется между командами)
+    """
+
+    from src.equities.issuer_directory import add_listener
+    from src.interface.core.commands.manager import Manager
+
+    add_listener(Manager.clear_cache)
+
+
+def _run_repl():
+    """
+    Выполнять команды из стандартного ввода
+    """
+
+    _clear_cache_on_issuers_change()
+
+    prompt = '> ' if sys.stdin.isatty() else ''
+    while True:
+        try:
+            params = input(prompt).split()
+        except EOFError:
+            return
+
+        if params == [REPL_EXIT]:
+            return
+
+        _print_result_cmd(_execute_safe(params))
+        sys.stdout.flush()
+
+
+def _run_server(path: str):
+    """
+    Запустить демон. Существующий сокет заменяется, только если запустивший его демон не работает
+
+    :param path: Путь unix сокета
+    """
+
+    import socketserver
+
+    class _CmdHandler(socketserver.StreamRequestHandler):
+        """
+        Обработчик соединения клиента: одна строка с командой, в ответ - результат выполнения
+        """
+
+        def handle(self):
+            line = self.rfile.readline()
+            # Соединение без команды - проверка работы демона (см. _remove_stale_socket)
+            if not line:
+                return
+            self.wfile.write(linesep.join(_execute_safe(line.decode().split())).encode())
+
+    _clear_cache_on_issuers_change()
+
+    error = _remove_stale_socket(path)
+    if error:
+        _print_result_cmd([f'Ошибка! {error}'])
+        sys.exit(1)
+
+    with socketserver.ThreadingUnixStreamServer(path, _CmdHandler) as server:
+        server.daemon_threads = True
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.remove(path)
+
+
+def _remove_stale_socket(path: str) -> str:
+    """
+    Удалить сокет демона, который не работает (сокет остался после аварийного завершения)
+
+    :param path: Путь unix сокета
+    :return: Текст ошибки, если путь занят файлом либо работающим демоном. Пустая строка, если путь свободен
+    """
+
+    import socket
+
+    try:
+        mode = os.lstat(path).st_mode
+    except FileNotFoundError:
+        return ''
+
+    if not stat.S_ISSOCK(mode):
+        return f'Путь "{path}" занят файлом, не являющимся сокетом!'
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(path)
+        except ConnectionRefusedError:
+            os.remove(path)
+            return ''
+        except OSError as err:
+            return f'Сокет "{path}" недоступен: {err}!'
+
+    return f'Демон уже запущен на сокете "{path}"!'
+
+
+def _run_client(path: str, params: List[str]) -> List[str]:
+    """
+    Выполнить команду в демоне. Если демон не доступен, выводится ошибка и работа завершается с кодом 1
+
+    :param path: Путь unix сокета
+    :param params: Имя команды и параметры
+    :return: Результат выполнения команды
+    """
+
+    import socket
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(path)
+            sock.sendall(f'{" ".join(params)}\n'.encode())
+            sock.shutdown(socket.SHUT_WR)
+
+            with sock.makefile('rb') as file:
+                return file.read().decode().split(linesep)
+    except OSError as err:
+        _print_result_cmd([f'Ошибка! Демон на сокете "{path}" не доступен ({err.strerror or err}), '
+                           f'запустите демон: --serve {path}'])
+        sys.exit(1)
 
 
 def _print_result_cmd(str_list: List[str]):
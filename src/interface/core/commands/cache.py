@@ -0,0 +1,151 @@
+"""
+Кэш результатов выполнения команд.
+
+Кэш ограничен по размеру, при переполнении вытесняются давно не использованные записи (LRU). Время жизни записи
+определяется политикой кэширования команды (см. Manager.register). Результат из кэша получают все выполнения команды,
+поэтому результаты хранятся неизменяемыми (кортежами).
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import List, Callable, Optional, Hashable, NamedTuple
+
+CachePolicy = Callable[[List[str]], Optional[float]]
+"""
+Политика кэширования команды: функция, возвращающая по параметрам команды время жизни результата в секундах.
+None - результат не кэшируется. Результат кэшируемой команды не должен зависеть от регистра параметров (коды
+эмитентов, названия детализаций): параметры ключа кэша приводятся к верхнему регистру
+"""
+
+CACHE_FOREVER = float('inf')
+"""
+Время жизни 'бессрочно'
+"""
+
+
+CURRENT_TTL = 60
+"""
+Время жизни результата за отрезок, включающий текущий день (в секундах)
+"""
+
+
+def cache_forever(_: List[str]) -> float:
+    """
+    Политика кэширования 'бессрочно'
+    """
+    return CACHE_FOREVER
+
+
+def closed_range_ttl(dt_right: date, ttl: float = CURRENT_TTL) -> float:
+    """
+    Время жизни результата за отрезок: за закрытые дни результат не изменится и кэшируется бессрочно, результат за
+    отрезок, включающий текущий день, - ttl секунд
+
+    :param dt_right: Дата конца отрезка
+    :param ttl: Время жизни результата, включающего текущий день
+
+    >>> closed_range_ttl(date(2019, 1, 1)), closed_range_ttl(date.today())
+    (inf, 60)
+    """
+
+    return CACHE_FOREVER if dt_right < date.today() else ttl
+
+
+class CacheStats(NamedTuple):
+    """
+    Статистика кэша
+    """
+
+    hits: int
+    """
+    Кол-во попаданий
+    """
+
+    misses: int
+    """
+    Кол-во промахов
+    """
+
+    size: int
+    """
+    Кол-во записей
+    """
+
+
+class ResultCache:
+    """
+    Кэш результатов с ограниченным размером и временем жизни записей. Результаты хранятся и возвращаются без
+    копирования, поэтому должны быть неизменяемыми.
+
+    >>> cache = ResultCache(1)
+    >>> cache.put('a', ('1',), CACHE_FOREVER)
+    >>> cache.put('b', ('2',), CACHE_FOREVER)
+    >>> cache.get('a'), cache.get('b')
+    (None, ('2',))
+    >>> cache.get_stats()
+    CacheStats(hits=1, misses=1, size=1)
+    """
+
+    def __init__(self, max_size: int = 1024):
+        """
+        :param max_size: Максимальное кол-во записей
+        """
+
+        self._max_size = max_size
+        self._entry_dict = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key: Hashable) -> Optional[object]:
+        """
+        Получить результат. None, если результата нет или истекло время его жизни
+
+        :param key: Ключ
+        """
+
+        with self._lock:
+            entry = self._entry_dict.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                del self._entry_dict[key]
+                entry = None
+
+            if entry is None:
+                self._misses += 1
+                return None
+
+            self._entry_dict.move_to_end(key)
+            self._hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, value: object, ttl: float):
+        """
+        Сохранить результат
+
+        :param key: Ключ
+        :param value: Неизменяемый результат, например кортеж строк
+        :param ttl: Время жизни в секундах
+        """
+
+        with self._lock:
+            self._entry_dict[key] = (time.monotonic() + ttl, value)
+            self._entry_dict.move_to_end(key)
+
+            while len(self._entry_dict) > self._max_size:
+                self._entry_dict.popitem(last=False)
+
+    def clear(self):
+        """
+        Очистить кэш
+        """
+        with self._lock:
+            self._entry_dict.clear()
+
+    def get_stats(self) -> CacheStats:
+        """
+        Получить статистику
+        """
+        with self._lock:
+            return CacheStats(self._hits, self._misses, len(self._entry_dict))
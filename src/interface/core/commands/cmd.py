@@ -1,10 +1,14 @@
 """
 Команда предоставляет интерфейс:
  * Получения имени, описания, синтаксиса
- * Выполнение
+ * Выполнение. Реализация команды может загружаться отложенно, при первом выполнении
+ * Получение результата в структурированном виде (записи), если команда это поддерживает
 """
 
-from typing import List, Callable
+import importlib
+from typing import List, Callable, Iterable, NamedTuple, Optional
+
+from src.interface.core.commands.cache import CachePolicy
 
 
 class Cmd:
@@ -12,13 +16,19 @@ class Cmd:
     Команда.
     """
 
-    def __init__(self, name: str, aliases: List[str], description: str, syntax: str, run_func: Callable):
+    def __init__(self, name: str, aliases: List[str], description: str, syntax: str, run_func: Optional[Callable],
+                 cache_policy: CachePolicy = None, module: str = None, web: bool = True):
         """
         :param name: Имя
         :param description: Описание
         :param syntax: Синтаксис
-        :param run_func: Функция выполнения
+        :param run_func: Функция выполнения, возвращает список строк либо итератор строк (для выдачи результата по
+        мере получения, см. iter). Если не задана, загружается из модуля реализации
         :param syntax: Синонимы
+        :param cache_policy: Политика кэширования результата. Если не задана, результат не кэшируется
+        :param module: Модуль реализации, загружаемый при первом выполнении (см. bind)
+        :param web: Команда доступна в web интерфейсе. Команды, изменяющие файлы либо общие данные сервера,
+        доступны только в интерфейсе командной строки
 
         :raise: ValueError
         """
@@ -37,7 +47,15 @@ class Cmd:
 
         self._names: List[str] = [name] + aliases
 
+        if run_func is None and not module:
+            raise ValueError('Некорректно задана реализация!')
         self._run_func = run_func
+        self._cache_policy = cache_policy
+        self._module = module
+        self._web = web
+
+        self._data_func: Optional[Callable] = None
+        self._data_cache_policy: CachePolicy = None
 
     def get_name(self) -> str:
         """
@@ -51,6 +69,100 @@ class Cmd:
         """
         return self._description
 
+    def get_names(self) -> List[str]:
+        """
+        Получить название и синонимы
+        """
+        return self._names
+
+    def is_web(self) -> bool:
+        """
+        Проверить, доступна ли команда в web интерфейсе
+        """
+        return self._web
+
+    def bind(self, run_func: Callable, cache_policy: CachePolicy = None):
+        """
+        Задать реализацию команды (вызывается модулем реализации при загрузке)
+
+        :param run_func: Функция выполнения
+        :param cache_policy: Политика кэширования результата. Если не задана, результат не кэшируется
+        """
+        self._run_func = run_func
+        self._cache_policy = cache_policy
+
+    def bind_data(self, data_func: Callable, cache_policy: CachePolicy = None):
+        """
+        Задать функцию получения результата в структурированном виде (вызывается модулем реализации при загрузке)
+
+        :param data_func: Функция получения записей результата (объектов, сериализуемых в json)
+        :param cache_policy: Политика кэширования результата. Если не задана, результат не кэшируется
+        """
+        self._data_func = data_func
+        self._data_cache_policy = cache_policy
+
+    def has_data(self, params: List[str]) -> bool:
+        """
+        Проверить, поддерживает ли команда получение результата в структурированном виде
+
+        :param params: Параметры
+        """
+
+        if len(params) == 1 and params[0] == CMD_PARAM_HELP:
+            return False
+
+        self._load()
+        return self._data_func is not None
+
+    def get_data_cache_ttl(self, params: List[str]) -> Optional[float]:
+        """
+        Получить время жизни структурированного результата в кэше в секундах. None, если результат не кэшируется
+
+        :param params: Параметры
+        """
+
+        if self._data_cache_policy is None:
+            return None
+        return self._data_cache_policy(params)
+
+    def run_data(self, params: List[str]) -> list:
+        """
+        Получить результат в структурированном виде (см. has_data)
+
+        :param params: Параметры
+        :raise: InvalidCmdParams, CmdResultNotFound
+
+        :return: Записи результата
+        """
+
+        self._load()
+        return list(self._data_func(params))
+
+    def get_cache_ttl(self, params: List[str]) -> Optional[float]:
+        """
+        Получить время жизни результата в кэше в секундах. None, если результат не кэшируется
+
+        :param params: Параметры
+        """
+
+        if len(params) == 1 and params[0] == CMD_PARAM_HELP:
+            return None
+
+        self._load()
+        if self._cache_policy is None:
+            return None
+        return self._cache_policy(params)
+
+    def _load(self):
+        """
+        Загрузить модуль реализации, если реализация еще не задана
+        """
+
+        if self._run_func is None:
+            importlib.import_module(self._module)
+            if self._run_func is None:
+                raise ValueError(f'Реализация команды "{self._name}" не найдена в модуле "{self._module}"!')
+
     def run(self, params) -> List[str]:
         """
         Выполнить команду
@@ -61,10 +173,25 @@ class Cmd:
         :return: Результат выполнения команды, или синтаксис команды если переданный параметр равен '?'
         """
 
+        result = self.iter(params)
+        return result if isinstance(result, list) else list(result)
+
+    def iter(self, params) -> Iterable[str]:
+        """
+        Выполнить команду с получением строк результата по мере их формирования (если функция выполнения возвращает
+        итератор). Ошибка выполнения, в т.ч. InvalidCmdParams, может возникнуть при получении строк
+
+        :param list[str] params: Параметры
+        :raise: InvalidCmdParams
+
+        :return: Строки результата выполнения команды, или синтаксис команды если переданный параметр равен '?'
+        """
+
         if len(params) == 1 and params[0] == CMD_PARAM_HELP and self._syntax:
             names = '|'.join(self._names)
             return [self._description, f'{names} {self._syntax}']
 
+        self._load()
         return self._run_func(params)
 
 
@@ -80,3 +207,22 @@ class InvalidCmdParams(Exception):
     """
     def __init__(self):
         super().__init__(f'Параметры команды введены не верно!')
+
+
+class CmdResultNotFound(Exception):
+    """
+    Исключение 'Объект запроса не найден' (например, эмитент), при получении результата в структурированном виде
+    """
+    pass
+
+
+class CmdData(NamedTuple):
+    """
+    Результат команды в структурированном виде
+    """
+
+    items: tuple
+    """
+    Записи результата. Для команд без структурированного результата - строки результата. Результат из кэша общий
+    для всех получателей, поэтому записи не изменяются
+    """
@@ -1,12 +1,48 @@
 """
 Менеджер команд, предоставляет:
  * Декоратор для регистрации команды
- * Поиск и выполненеи команды по входным данным
+ * Объявление команды с отложенной загрузкой реализации
+ * Поиск и выполненеи команды по входным данным, в т.ч. с получением результата по мере формирования либо в
+ структурированном виде
+ * Кэширование результата выполнения команды, объединение одновременных одинаковых команд
+ * Пакетное выполнение команд, в т.ч. конвейеров (результат одной команды - параметры следующей)
+ * Метрики выполнения команд (кол-во, длительность, ошибки)
  * Команду помощи
 """
 
-from typing import List, Callable
-from src.interface.core.commands.cmd import Cmd, InvalidCmdParams, CMD_PARAM_HELP
+import time
+from typing import TYPE_CHECKING, List, Callable, Iterable, Iterator, Tuple
+from src.equities.resilience import SingleFlight
+from src.interface.core.commands.cache import CachePolicy, ResultCache, CacheStats
+from src.interface.core.commands.cmd import Cmd, CmdData, InvalidCmdParams, CMD_PARAM_HELP
+from src.metrics import REGISTRY, Counter, Gauge, Histogram
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+
+STREAM_CACHE_LINES_MAX = 10_000
+"""
+Максимальное кол-во строк результата, получаемого по мере формирования (см. Manager.iter_cmd), для сохранения в
+кэше. Результат большего размера не кэшируется, чтобы не накапливать его в памяти
+"""
+
+BATCH_WORKERS = 8
+"""
+Кол-во одновременно выполняемых команд пакета (см. Manager.run_batch)
+"""
+
+PIPE = '|'
+"""
+Разделитель команд конвейера
+"""
+
+PIPE_VALUE = '{}'
+"""
+Параметр команды конвейера, заменяемый значением из результата предыдущей команды
+"""
+
+CMD_SECONDS = REGISTRY.add(Histogram('cmd_seconds', 'Длительность выполнения команды', ('cmd',)))
+CMD_ERRORS = REGISTRY.add(Counter('cmd_errors_total', 'Кол-во ошибок выполнения команды', ('cmd', 'error')))
 
 
 class UnknownCmd(Exception):
@@ -20,6 +56,17 @@ class UnknownCmd(Exception):
         super().__init__(f'Команда "{name}" не найдена!')
 
 
+class UnavailableCmd(Exception):
+    """
+    Исключение 'Команда недоступна в web интерфейсе'
+    """
+    def __init__(self, name: str):
+        """
+        :param name: Название команды.
+        """
+        super().__init__(f'Команда "{name}" доступна только в интерфейсе командной строки!')
+
+
 class Manager:
     """
     Менеджер команд
@@ -27,8 +74,13 @@ class Manager:
 
     _cmd_list = {}
 
+    _cache = ResultCache()
+
+    _flight = SingleFlight()
+
     @classmethod
-    def register(cls, name: str, aliases: List[str], description: str, syntax: str) -> Callable:
+    def register(cls, name: str, aliases: List[str], description: str, syntax: str,
+                 cache: CachePolicy = None) -> Callable:
         """
         Декоратор регистрации команды
 
@@ -36,18 +88,89 @@ class Manager:
         :param aliases: Синонинмы
         :param description: Описание
         :param syntax: Синтаксис
+        :param cache: Политика кэширования результата (см. cache). Если не задана, результат не кэшируется
         """
 
         def decorator(func: Callable):
-            cmd = Cmd(name, aliases, description, syntax, func)
+            cmd = Cmd(name, aliases, description, syntax, func, cache)
             for alias in [name] + aliases:
                 cls._cmd_list[alias.lower()] = cmd
         return decorator
 
+    @classmethod
+    def declare(cls, name: str, aliases: List[str], description: str, syntax: str, module: str, web: bool = True):
+        """
+        Объявить команду. Модуль реализации загружается при первом выполнении команды и должен задать
+        реализацию декоратором implement.
+
+        :param name: Название команды
+        :param aliases: Синонинмы
+        :param description: Описание
+        :param syntax: Синтаксис
+        :param module: Модуль реализации
+        :param web: Команда доступна в web интерфейсе (см. check_web)
+        """
+
+        cmd = Cmd(name, aliases, description, syntax, None, module=module, web=web)
+        for alias in [name] + aliases:
+            cls._cmd_list[alias.lower()] = cmd
+
+    @classmethod
+    def implement(cls, name: str, cache: CachePolicy = None) -> Callable:
+        """
+        Декоратор реализации объявленной команды (см. declare)
+
+        :param name: Название команды
+        :param cache: Политика кэширования результата (см. cache). Если не задана, результат не кэшируется
+
+        :raise: UnknownCmd
+        """
+
+        if name.lower() not in cls._cmd_list:
+            raise UnknownCmd(name)
+
+        def decorator(func: Callable):
+            cls._cmd_list[name.lower()].bind(func, cache)
+            return func
+        return decorator
+
+    @classmethod
+    def implement_data(cls, name: str, cache: CachePolicy = None) -> Callable:
+        """
+        Декоратор функции получения результата объявленной команды в структурированном виде (см. get_data). Функция
+        получает параметры команды и возвращает записи (объекты, сериализуемые в json)
+
+        :param name: Название команды
+        :param cache: Политика кэширования результата (см. cache). Если не задана, результат не кэшируется
+
+        :raise: UnknownCmd
+        """
+
+        if name.lower() not in cls._cmd_list:
+            raise UnknownCmd(name)
+
+        def decorator(func: Callable):
+            cls._cmd_list[name.lower()].bind_data(func, cache)
+            return func
+        return decorator
+
+    @classmethod
+    def check_web(cls, cmd_name: str):
+        """
+        Проверить, доступна ли команда в web интерфейсе. Web интерфейс должен проверять каждую выполняемую команду
+
+        :param cmd_name: Имя команды
+        :raise: UnknownCmd, UnavailableCmd
+        """
+
+        if not cls._get_cmd(cmd_name).is_web():
+            raise UnavailableCmd(cmd_name)
+
     @classmethod
     def run_cmd(cls, cmd_name: str, cmd_params: List[str]) -> List[str]:
         """
         Выполнить команду. Формат командной строки: <имя_команды> + [параметры]
+        Результат команды с политикой кэширования сохраняется в кэше и при повторном выполнении берется из него.
 
         :param cmd_name: Имя команды
         :param cmd_params:  Параметры команды
@@ -55,16 +178,273 @@ class Manager:
         :return: Результат выполнения команды
         """
 
-        if cmd_name.lower() not in Manager._cmd_list:
+        cmd = cls._get_cmd(cmd_name)
+
+        start = time.perf_counter()
+        try:
+            return cls._run_cmd(cmd, cmd_params)
+        except Exception as err:
+            CMD_ERRORS.inc(cmd=cmd.get_name(), error=type(err).__name__)
+            raise
+        finally:
+            CMD_SECONDS.observe(time.perf_counter() - start, cmd=cmd.get_name())
+
+    @classmethod
+    def iter_cmd(cls, cmd_name: str, cmd_params: List[str]) -> Iterator[str]:
+        """
+        Выполнить команду с получением строк результата по мере их формирования (для команд, функция выполнения
+        которых возвращает итератор). Результат команды с политикой кэширования сохраняется в кэше после получения
+        всех строк, если их не более STREAM_CACHE_LINES_MAX. Одновременные одинаковые команды с политикой
+        кэширования выполняются однократно, если результат не более STREAM_CACHE_LINES_MAX строк.
+
+        :param cmd_name: Имя команды
+        :param cmd_params:  Параметры команды
+        :raise: UnknownCmd
+        :return: Строки результата выполнения команды. Ошибка выполнения возникает при получении строк
+        """
+
+        return cls._iter_cmd(cls._get_cmd(cmd_name), cmd_params)
+
+    @classmethod
+    def get_data(cls, cmd_name: str, cmd_params: List[str]) -> CmdData:
+        """
+        Выполнить команду с получением результата в структурированном виде. Для команд без функции получения
+        структурированного результата (см. implement_data) записями результата являются строки результата.
+        Результат команды с политикой кэширования сохраняется в кэше.
+
+        :param cmd_name: Имя команды
+        :param cmd_params:  Параметры команды
+        :raise: UnknownCmd, InvalidCmdParams, CmdResultNotFound
+        :return: Результат выполнения команды
+        """
+
+        cmd = cls._get_cmd(cmd_name)
+        if not cmd.has_data(cmd_params):
+            return CmdData(tuple(cls.run_cmd(cmd_name, cmd_params)))
+
+        start = time.perf_counter()
+        try:
+            ttl = cmd.get_data_cache_ttl(cmd_params)
+            if ttl is None:
+                return CmdData(tuple(cmd.run_data(cmd_params)))
+
+            cache_key = cls._get_cache_key(cmd, cmd_params) + ('data',)
+            result = cls._cache.get(cache_key)
+            if result is None:
+                result = cls._flight.do(cache_key, lambda: CmdData(tuple(cmd.run_data(cmd_params))))
+                cls._cache.put(cache_key, result, ttl)
+            return result
+        except Exception as err:
+            CMD_ERRORS.inc(cmd=cmd.get_name(), error=type(err).__name__)
+            raise
+        finally:
+            CMD_SECONDS.observe(time.perf_counter() - start, cmd=cmd.get_name())
+
+    @classmethod
+    def run_batch(cls, cmd_line_list: Iterable[str], max_workers: int = BATCH_WORKERS,
+                  web: bool = False) -> List[Tuple[str, List[str]]]:
+        """
+        Выполнить пакет команд. Команды выполняются параллельно, результаты возвращаются в порядке команд. Ошибка
+        выполнения команды возвращается строкой ее результата и не прерывает выполнение остальных команд.
+        Пустые строки и строки, начинающиеся с '#', пропускаются.
+
+        Строка пакета может быть конвейером: <команда> [параметры] | <команда> [параметры] ... Следующая команда
+        выполняется для каждого значения результата предыдущей (параллельно): кода из записей структурированного
+        результата (см. get_data), иначе первого слова строки результата. Значение подставляется вместо параметра
+        PIPE_VALUE, при его отсутствии - первым параметром. Например, 'find газ | price {} 01.01.19 31.01.19'.
+
+        :param cmd_line_list: Строки команд
+        :param max_workers: Максимальное кол-во одновременно выполняемых команд
+        :param web: Пакет из web интерфейса: строка с командой, недоступной в web интерфейсе (см. check_web), не
+        выполняется
+        :return: Список пар (Строка команды, Результат выполнения)
+        """
+
+        # Импорт при выполнении, т.к. пул потоков нужен только пакетному выполнению (время запуска)
+        from concurrent.futures import ThreadPoolExecutor
+
+        cmd_line_list = [line.strip() for line in cmd_line_list]
+        cmd_line_list = [line for line in cmd_line_list if line and not line.startswith('#')]
+
+        # Команды конвейеров выполняются в отдельном пуле, т.к. строки пакета ожидают их завершения
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='batch') as executor, \
+                ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='pipe') as pipe_executor:
+            result_list = executor.map(lambda line: cls._run_pipe(line, pipe_executor, web), cmd_line_list)
+            return list(zip(cmd_line_list, result_list))
+
+    @classmethod
+    def _run_pipe(cls, cmd_line: str, executor: 'Executor', web: bool = False) -> List[str]:
+        """
+        Выполнить конвейер команд (см. run_batch)
+
+        :param cmd_line: Строка команд
+        :param executor: Пул выполнения команд, получающих значения из результата предыдущей команды
+        :param web: Конвейер из web интерфейса
+        :return: Строки с ошибками промежуточных команд и результаты последней команды по значениям
+        """
+
+        stage_list = [stage.split() for stage in cmd_line.split(PIPE)]
+        if any(not stage for stage in stage_list):
+            return [f'Ошибка! Конвейер "{cmd_line}" задан не верно!']
+
+        if web:
+            for cmd_name, *_ in stage_list:
+                try:
+                    cls.check_web(cmd_name)
+                except (UnknownCmd, UnavailableCmd) as err:
+                    return [f'Ошибка! {str(err)}']
+
+        error_list, value_list = [], None
+        for i, (cmd_name, *cmd_params) in enumerate(stage_list):
+            params_list = [cmd_params] if value_list is None else \
+                [_pipe_params(cmd_params, value) for value in value_list]
+
+            if i == len(stage_list) - 1:
+                result_list = _map(executor, lambda params: cls._run_safe(cmd_name, params), params_list)
+                if value_list is None:
+                    return result_list[0]
+                if not value_list:
+                    return error_list or ['Результат конвейера отсутствует!']
+
+                # Результат команды для каждого значения предваряется строкой со значением
+                return error_list + [line for value, result in zip(value_list, result_list)
+                                     for line in [f'{value}:'] + result]
+
+            value_list = []
+            for values, errors in _map(executor, lambda params: cls._get_pipe_values(cmd_name, params), params_list):
+                value_list.extend(values)
+                error_list.extend(errors)
+
+    @classmethod
+    def _run_safe(cls, cmd_name: str, cmd_params: List[str]) -> List[str]:
+        """
+        Выполнить команду, ошибка выполнения возвращается строкой результата
+        """
+
+        try:
+            return cls.run_cmd(cmd_name, cmd_params)
+        except Exception as err:
+            return [f'Ошибка! {str(err) or type(err).__name__}']
+
+    @classmethod
+    def _get_pipe_values(cls, cmd_name: str, cmd_params: List[str]) -> Tuple[List[str], List[str]]:
+        """
+        Выполнить промежуточную команду конвейера
+
+        :return: Кортеж (Значения для следующей команды, Строки с ошибками)
+        """
+
+        try:
+            items = cls.get_data(cmd_name, cmd_params).items
+        except InvalidCmdParams as err:
+            return [], [f'Ошибка! {cmd_name}: {str(err)}']
+        except Exception as err:
+            return [], [f'{cmd_name}: {str(err) or type(err).__name__}']
+
+        value_list = []
+        for item in items:
+            if isinstance(item, dict):
+                value = item.get('code')
+            else:
+                value = next(iter(str(item).split(',')[0].split()), None)
+            if value is not None:
+                value_list.append(str(value))
+        return value_list, []
+
+    @classmethod
+    def _get_cmd(cls, cmd_name: str) -> Cmd:
+        """
+        Найти команду по имени
+
+        :raise: UnknownCmd
+        """
+
+        if cmd_name.lower() not in cls._cmd_list:
             raise UnknownCmd(cmd_name)
+        return cls._cmd_list[cmd_name.lower()]
 
-        cmd = cls._cmd_list[cmd_name]
+    @classmethod
+    def _run_cmd(cls, cmd: Cmd, cmd_params: List[str]) -> List[str]:
+        """
+        Выполнить команду с учетом кэша результатов. Одновременные одинаковые команды с политикой кэширования
+        выполняются однократно
+        """
+
+        ttl = cmd.get_cache_ttl(cmd_params)
+        cache_key = cls._get_cache_key(cmd, cmd_params)
+        if ttl is not None:
+            result = cls._cache.get(cache_key)
+            if result is not None:
+                return list(result)
 
         try:
-            return cmd.run(cmd_params)
+            if ttl is None:
+                return cmd.run(cmd_params)
+            result = cls._flight.do(cache_key, lambda: tuple(cmd.run(cmd_params)))
         except InvalidCmdParams as err:
+            CMD_ERRORS.inc(cmd=cmd.get_name(), error=type(err).__name__)
             return [f'Ошибка! {str(err)}', ''] + cmd.run(['?'])
 
+        cls._cache.put(cache_key, result, ttl)
+        return list(result)
+
+    @classmethod
+    def _iter_cmd(cls, cmd: Cmd, cmd_params: List[str]) -> Iterator[str]:
+        """
+        Выполнить команду с учетом кэша результатов, строки результата возвращаются по мере формирования.
+        Одновременные одинаковые команды с политикой кэширования выполняются однократно
+        """
+
+        start = time.perf_counter()
+        try:
+            ttl = cmd.get_cache_ttl(cmd_params)
+            cache_key = cls._get_cache_key(cmd, cmd_params)
+            if ttl is not None:
+                result = cls._cache.get(cache_key)
+                if result is not None:
+                    yield from result
+                    return
+
+            try:
+                if ttl is None:
+                    yield from cmd.iter(cmd_params)
+                else:
+                    # Одновременные одинаковые команды выполняются однократно: строки получает первая команда,
+                    # остальные - весь результат после ее завершения
+                    yield from cls._flight.do_iter(cache_key + ('iter',), lambda: cmd.iter(cmd_params),
+                                                   STREAM_CACHE_LINES_MAX,
+                                                   lambda result: cls._cache.put(cache_key, tuple(result), ttl))
+            except InvalidCmdParams as err:
+                CMD_ERRORS.inc(cmd=cmd.get_name(), error=type(err).__name__)
+                yield from [f'Ошибка! {str(err)}', ''] + cmd.run(['?'])
+        except Exception as err:
+            CMD_ERRORS.inc(cmd=cmd.get_name(), error=type(err).__name__)
+            raise
+        finally:
+            CMD_SECONDS.observe(time.perf_counter() - start, cmd=cmd.get_name())
+
+    @classmethod
+    def _get_cache_key(cls, cmd: Cmd, cmd_params: List[str]) -> Tuple[str, Tuple[str, ...]]:
+        """
+        Получить ключ кэша результата команды. Параметры приводятся к верхнему регистру, чтобы, например, 'price sber'
+        и 'price SBER' использовали один результат (см. CachePolicy)
+        """
+        return cmd.get_name(), tuple(param.upper() for param in cmd_params)
+
+    @classmethod
+    def get_cache_stats(cls) -> CacheStats:
+        """
+        Получить статистику кэша результатов
+        """
+        return cls._cache.get_stats()
+
+    @classmethod
+    def clear_cache(cls):
+        """
+        Очистить кэш результатов (например, после обновления справочника эмитентов)
+        """
+        cls._cache.clear()
+
     @classmethod
     def help(cls) -> List[str]:
         """
@@ -80,6 +460,35 @@ class Manager:
         return list(set(cls._cmd_list.values()))
 
 
+def _pipe_params(cmd_params: List[str], value: str) -> List[str]:
+    """
+    Получить параметры команды конвейера: значение подставляется вместо PIPE_VALUE, при его отсутствии - первым
+    параметром
+
+    >>> _pipe_params(['{}', '01.01.19'], 'SBER'), _pipe_params(['rsi'], 'SBER')
+    (['SBER', '01.01.19'], ['SBER', 'rsi'])
+    """
+
+    if PIPE_VALUE in cmd_params:
+        return [value if param == PIPE_VALUE else param for param in cmd_params]
+    return [value] + cmd_params
+
+
+def _map(executor: 'Executor', func: Callable, args_list: list) -> list:
+    """
+    Выполнить функцию для каждого аргумента, в пуле - если аргументов несколько
+    """
+
+    if len(args_list) == 1:
+        return [func(args_list[0])]
+    return list(executor.map(func, args_list))
+
+
+REGISTRY.add(Gauge('cmd_cache_hits', 'Кол-во попаданий в кэш результатов', lambda: Manager.get_cache_stats().hits))
+REGISTRY.add(Gauge('cmd_cache_misses', 'Кол-во промахов кэша результатов', lambda: Manager.get_cache_stats().misses))
+REGISTRY.add(Gauge('cmd_cache_size', 'Кол-во записей кэша результатов', lambda: Manager.get_cache_stats().size))
+
+
 @Manager.register('help', ['h', '?'], 'Получить список команд', '')
 def _run_help(_: List[str]) -> List[str]:
     """
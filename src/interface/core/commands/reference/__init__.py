@@ -1,7 +1,72 @@
 """
 Пакет содержит справочник команд.
-Модуль с командой должен быть подгружен
+Команды объявляются метаданными (имя, синонимы, описание, синтаксис), модуль реализации команды загружается при
+первом ее выполнении. Команды, записывающие файлы по пути из параметров либо изменяющие общие данные, объявляются
+недоступными в web интерфейсе (web=False).
 """
 
-import src.interface.core.commands.reference.price
-import src.interface.core.commands.reference.find
\ No newline at end of file
+from src.equities.price import PERIOD_BY_NAME
+from src.interface.core.commands.manager import Manager
+
+Manager.declare('find',
+                ['search'],
+                'Поиск эмитента по названию или идентификатору',
+                '[~]<строка_поиска (миниму 3 символа)>, "~" - с учетом опечаток, если точных совпадений нет',
+                'src.interface.core.commands.reference.find')
+
+Manager.declare('price',
+                [],
+                'Получить курс за отрезок, в формате <дата> <цена_открытия> <цена_закрытия>',
+                '<код> [<дата1> [<дата2> [<детализация>]]], дата в формате dd.mm.yy, если не указана то за '
+                f'текущий день, детализация {"|".join(PERIOD_BY_NAME)}|1q|<N>m|<N>h (по умолчанию 1d)',
+                'src.interface.core.commands.reference.price')
+
+Manager.declare('indicator',
+                ['ind'],
+                'Рассчитать технический индикатор по ценам закрытия за отрезок',
+                '<индикатор> <код> <дата1> <дата2> [<окно> [<детализация>]], индикатор '
+                'sma|ema|rsi|logret|stdev|drawdown (stdev - по логарифмической доходности), дата в формате dd.mm.yy, '
+                'окно не менее 1 (rsi, stdev - не менее 2), детализация как в команде price (по умолчанию 1d)',
+                'src.interface.core.commands.reference.indicator')
+
+Manager.declare('screen',
+                [],
+                'Ранжировать эмитентов по показателю за отрезок',
+                '[-]<показатель> <дата1> <дата2> [<кол-во> [<код> ...]], показатель return|volatility|volume '
+                '(доходность, стандартное отклонение дневной доходности, объем), "-" - по возрастанию, дата в формате '
+                'dd.mm.yy, кол-во по умолчанию 10, если коды не указаны - все эмитенты',
+                'src.interface.core.commands.reference.screen')
+
+Manager.declare('corr',
+                [],
+                'Рассчитать матрицу корреляций дневных логарифмических доходностей эмитентов за отрезок',
+                '<дата1> <дата2> [<код> <код> ...], дата в формате dd.mm.yy, если коды не указаны - все эмитенты',
+                'src.interface.core.commands.reference.corr')
+
+Manager.declare('export',
+                [],
+                'Выгрузить дневные курсы эмитентов в файлы (по файлу на эмитента) с возможностью продолжения',
+                '<каталог> <дата1> <дата2> [<формат> [<код> ...]], дата в формате dd.mm.yy, формат '
+                'csv|parquet|arrow (по умолчанию csv), если коды не указаны - все эмитенты',
+                'src.interface.core.commands.reference.export',
+                web=False)
+
+Manager.declare('update',
+                [],
+                'Дополнить локальное хранилище дневными курсами эмитентов по последний закрытый день',
+                '[<дата_начала>], дата в формате dd.mm.yy - начало истории для эмитентов без курсов в хранилище',
+                'src.interface.core.commands.reference.update',
+                web=False)
+
+Manager.declare('issuers',
+                [],
+                'Получить сведения о справочнике эмитентов либо обновить справочник из icharts.js finam.ru',
+                '[refresh [<файл|url>]], по умолчанию icharts.js загружается с finam.ru',
+                'src.interface.core.commands.reference.issuers',
+                web=False)
+
+Manager.declare('stats',
+                [],
+                'Получить статистику выполнения команд, кэша результатов и запросов к finam.ru',
+                '',
+                'src.interface.core.commands.reference.stats')
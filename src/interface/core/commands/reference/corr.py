@@ -0,0 +1,120 @@
+"""
+Команда 'Рассчитать матрицу корреляций доходностей'
+"""
+
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.interface.core.commands.cache import closed_range_ttl
+from src.interface.core.commands.cmd import CmdResultNotFound, InvalidCmdParams
+from src.equities.issuer_directory import get_code_list
+from src.equities.indicators import log_returns
+from src.equities.screener import align, correlation
+from src.equities.series import get_price_series_many
+from src.interface.core.commands.manager import Manager
+
+
+def _cache_ttl(params: List[str]) -> Optional[float]:
+    """
+    Политика кэширования: по дате конца отрезка (см. closed_range_ttl)
+
+    :param params: Параметры команды
+    """
+
+    try:
+        dt_right = _parse_params(params)[1]
+    except InvalidCmdParams:
+        return None
+
+    return closed_range_ttl(dt_right)
+
+
+@Manager.implement('corr', _cache_ttl)
+def _run(params: List[str]) -> List[str]:
+    """
+    Рассчитать матрицу корреляций дневных логарифмических доходностей эмитентов за отрезок
+
+    :param list[str] params: Параметры <Дата1> <Дата2> [<Код> ...]
+    :raise: InvalidCmdParams
+
+    :return: Строка с кодами эмитентов (столбцы) и строки вида 'Код Корреляция1 Корреляция2 ...'. Если курсы
+    эмитентов получить не удалось, возвращается строка с ошибкой
+    """
+
+    try:
+        code_list, matrix, failed = _correlation(params)
+    except CmdResultNotFound as err:
+        return [str(err)]
+
+    result = [' '.join(['-'] + code_list)]
+    result.extend(' '.join([code] + ['-' if value != value else f'{value:.2f}' for value in row])
+                  for code, row in zip(code_list, matrix.tolist()))
+    if failed:
+        result.append(f'Не удалось получить курсы эмитентов: {", ".join(failed)}')
+    return result
+
+
+@Manager.implement_data('corr', _cache_ttl)
+def _data(params: List[str]) -> List[Dict[str, object]]:
+    """
+    Рассчитать матрицу корреляций, результат в структурированном виде (см. _run)
+
+    :param list[str] params: Параметры <Дата1> <Дата2> [<Код> ...]
+    :raise: InvalidCmdParams, CmdResultNotFound
+
+    :return: Записи вида {'code': Код эмитента, 'corr': {Код эмитента: Корреляция либо None}}
+    """
+
+    code_list, matrix, _ = _correlation(params)
+    return [{'code': code, 'corr': {column: None if value != value else value for column, value in zip(code_list, row)}}
+            for code, row in zip(code_list, matrix.tolist())]
+
+
+def _correlation(params: List[str]) -> Tuple[List[str], np.ndarray, List[str]]:
+    """
+    Рассчитать матрицу корреляций
+
+    :raise: InvalidCmdParams, CmdResultNotFound
+
+    :return: Кортеж (Коды эмитентов, Матрица корреляций, Коды эмитентов, курсы которых получить не удалось)
+    """
+
+    dt_left, dt_right, issuer_code_list = _parse_params(params)
+
+    series_by_code = get_price_series_many(issuer_code_list, dt_left, dt_right)
+    failed = [code for code, series in series_by_code.items() if isinstance(series, Exception)]
+    for code in failed:
+        del series_by_code[code]
+
+    if not series_by_code:
+        raise CmdResultNotFound('Курсы эмитентов не найдены!')
+
+    aligned = align(series_by_code)
+    return aligned.code, correlation(log_returns(aligned.close)), failed
+
+
+def _parse_params(params: List[str]) -> Tuple[date, date, List[str]]:
+    """
+    Разобрать параметры <Дата1> <Дата2> [<Код> ...]
+
+    :raise: InvalidCmdParams
+
+    :return: Кортеж (Дата начала, Дата конца, Коды эмитентов)
+    """
+
+    if len(params) < 2:
+        raise InvalidCmdParams()
+
+    try:
+        dt_left = datetime.strptime(params[0], '%d.%m.%y').date()
+        dt_right = datetime.strptime(params[1], '%d.%m.%y').date()
+    except ValueError:
+        raise InvalidCmdParams()
+
+    issuer_code_list = list(dict.fromkeys(code.upper() for code in params[2:])) or get_code_list()
+    if len(issuer_code_list) < 2:
+        raise InvalidCmdParams()
+
+    return dt_left, dt_right, issuer_code_list
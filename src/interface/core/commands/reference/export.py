@@ -0,0 +1,45 @@
+"""
+Команда 'Выгрузить курсы в файлы'
+"""
+
+from datetime import datetime
+from typing import List
+
+from src.interface.core.commands.cmd import InvalidCmdParams
+from src.equities.export import export_price, ExportError, EXPORT_FORMATS
+from src.equities.issuer_directory import get_code_list
+from src.interface.core.commands.manager import Manager
+
+
+@Manager.implement('export')
+def _run(params: List[str]) -> List[str]:
+    """
+    Выгрузить дневные курсы эмитентов в каталог, каждого эмитента в отдельный файл. Если коды эмитентов не переданы,
+    выгружаются все эмитенты. Прерванная выгрузка продолжается повторным выполнением команды с теми же параметрами
+
+    :param list[str] params: Параметры <Каталог> <Дата1> <Дата2> [<Формат> [<Код> ...]]
+    :raise: InvalidCmdParams
+
+    :return: Строки с ошибками выгрузки и итоговая строка
+    """
+
+    if len(params) < 3:
+        raise InvalidCmdParams()
+
+    try:
+        dt_left = datetime.strptime(params[1], '%d.%m.%y').date()
+        dt_right = datetime.strptime(params[2], '%d.%m.%y').date()
+    except ValueError:
+        raise InvalidCmdParams()
+
+    fmt = params[3].lower() if len(params) > 3 else EXPORT_FORMATS[0]
+    issuer_code_list = params[4:] or get_code_list()
+
+    try:
+        result = export_price(issuer_code_list, dt_left, dt_right, params[0], fmt=fmt)
+    except ExportError as err:
+        return [f'Ошибка! {str(err)}']
+
+    return [f'{code}: Ошибка! {str(err) or type(err).__name__}' for code, err in result.failed.items()] + [
+        f'Выгружено эмитентов "{len(result.exported)}" (строк "{sum(result.exported.values())}"), '
+        f'выгружено ранее "{len(result.skipped)}", с ошибкой "{len(result.failed)}"']
@@ -2,20 +2,24 @@
 Команда 'Поиск по ценным бумагам'
 """
 
-from typing import List
+from typing import Dict, List, Tuple
 
+from src.interface.core.commands.cache import cache_forever
 from src.interface.core.commands.cmd import InvalidCmdParams
 from src.equities.finam import get_issuer_list
 from src.interface.core.commands.manager import Manager
 
+FUZZY_PREFIX = '~'
+"""
+Префикс строки поиска 'Если точных совпадений нет, искать с учетом опечаток'
+"""
+
 
-@Manager.register('find',
-                  ['search'],
-                  'Поиск эмитента по названию или идентификатору',
-                  '<строка_поиска (миниму 3 символа)>')
+@Manager.implement('find', cache_forever)
 def _run(params: List[str]) -> List[str]:
     """
-    Выполнить поиск. Поиск происходит в случае если кол-во параметров >= 3 либо один из параметров длинной >= 3
+    Выполнить поиск. Поиск происходит в случае если кол-во параметров >= 3 либо один из параметров длинной >= 3.
+    Если первая строка поиска начинается с '~' и точных совпадений нет, выполняется поиск с учетом опечаток
 
     :param params: Параметры
     :raise: InvalidCmdParams
@@ -23,10 +27,41 @@ def _run(params: List[str]) -> List[str]:
     return: В случае успеха возвращаются строки вида 'Код ценной бумаги, Наименование', иначе строка с ошибкой об
     отсутствии результата
     """
+
+    issuer_list = _search(params)
+    if issuer_list:
+        return [f'{issuer[0]}, {issuer[1]}' for issuer in issuer_list]
+    return ['Результат поиска отсутствует!']
+
+
+@Manager.implement_data('find', cache_forever)
+def _data(params: List[str]) -> List[Dict[str, str]]:
+    """
+    Выполнить поиск, результат в структурированном виде (см. _run)
+
+    :param params: Параметры
+    :raise: InvalidCmdParams
+
+    :return: Записи вида {'code': Код ценной бумаги, 'name': Наименование}
+    """
+    return [{'code': code, 'name': name} for code, name in _search(params)]
+
+
+def _search(params: List[str]) -> List[Tuple[str, str]]:
+    """
+    Выполнить поиск: по умолчанию точный, с префиксом FUZZY_PREFIX - с учетом опечаток, если точных совпадений нет
+
+    :raise: InvalidCmdParams
+
+    :return: Список кортежей (Код, Название)
+    """
+
+    fuzzy = bool(params) and params[0].startswith(FUZZY_PREFIX)
+    if fuzzy:
+        params = [params[0][len(FUZZY_PREFIX):]] + params[1:]
+    params = [param for param in params if param]
+
     if len(params) >= 3 or any(len(p) >= 3 for p in params):
-        issuer_list = get_issuer_list(params, 5)
-        if issuer_list:
-            return [f'{issuer[0]}, {issuer[1]}' for issuer in issuer_list]
-        return ['Результат поиска отсутствует!']
+        return get_issuer_list(params, 5, fuzzy)
 
     raise InvalidCmdParams()
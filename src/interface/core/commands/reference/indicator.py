@@ -0,0 +1,143 @@
+"""
+Команда 'Рассчитать технический индикатор'
+"""
+
+from datetime import date, datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.interface.core.commands.cache import closed_range_ttl
+from src.interface.core.commands.cmd import CmdResultNotFound, InvalidCmdParams
+from src.equities.finam import NotFoundIssuer
+from src.equities.indicators import sma, ema, rsi, log_returns, rolling_std, max_drawdown
+from src.equities.price import PERIOD_BY_NAME
+from src.equities.resample import get_timeframe, iter_price_by_name
+from src.equities.series import PriceSeries
+from src.interface.core.commands.manager import Manager
+
+INDICATOR_BY_NAME: Dict[str, Tuple[Callable[[PriceSeries, int], np.ndarray], int, int]] = {
+    'sma': (lambda series, window: sma(series.close, window), 20, 1),
+    'ema': (lambda series, window: ema(series.close, window), 20, 1),
+    'rsi': (lambda series, window: rsi(series.close, window), 14, 2),
+    'logret': (lambda series, _: log_returns(series.close), 0, 0),
+    'stdev': (lambda series, window: rolling_std(log_returns(series.close), window), 20, 2),
+}
+"""
+Индикаторы-ряды по названию: (Функция расчета по ряду цен и окну, Окно по умолчанию, Минимальное окно)
+"""
+
+DRAWDOWN = 'drawdown'
+"""
+Название индикатора 'Максимальная просадка'
+"""
+
+
+def _cache_ttl(params: List[str]) -> Optional[float]:
+    """
+    Политика кэширования: по дате конца отрезка (см. closed_range_ttl)
+
+    :param params: Параметры команды
+    """
+
+    try:
+        dt_right = _parse_params(params)[3]
+    except InvalidCmdParams:
+        return None
+
+    return closed_range_ttl(dt_right)
+
+
+@Manager.implement('indicator', _cache_ttl)
+def _run(params: List[str]) -> List[str]:
+    """
+    Рассчитать индикатор по ценам закрытия за отрезок
+
+    :param list[str] params: Параметры <Индикатор> <Код> <Дата1> <Дата2> [<Окно> [<Детализация>]]
+    :raise: InvalidCmdParams
+
+    :return: Строки вида 'Дата Значение' (для просадки - одна строка 'Просадка Дата_максимума Дата_минимума').
+    Если ценная бумага не найдена, возвращается строка с ошибкой
+    """
+
+    try:
+        item_list = _data(params)
+    except CmdResultNotFound as err:
+        return [str(err)]
+
+    if params[0].lower() == DRAWDOWN:
+        return [f'{item["value"] * 100:.2f}% {_format_dt(item["peak"])} {_format_dt(item["trough"])}'
+                for item in item_list]
+    return [f'{_format_dt(item["dt"])} {item["value"]:.4f}' for item in item_list]
+
+
+@Manager.implement_data('indicator', _cache_ttl)
+def _data(params: List[str]) -> List[Dict[str, object]]:
+    """
+    Рассчитать индикатор, результат в структурированном виде (см. _run)
+
+    :param list[str] params: Параметры <Индикатор> <Код> <Дата1> <Дата2> [<Окно> [<Детализация>]]
+    :raise: InvalidCmdParams, CmdResultNotFound
+
+    :return: Записи вида {'dt': Дата (ISO), 'value': Значение}, для просадки - {'value': Просадка (доля),
+    'peak': Дата максимума, 'trough': Дата минимума}. Значения, для которых недостаточно истории, не возвращаются
+    """
+
+    name, issuer_code, dt_left, dt_right, window, period_name = _parse_params(params)
+    try:
+        series = PriceSeries.from_price_list(iter_price_by_name(issuer_code, dt_left, dt_right, period_name))
+    except NotFoundIssuer:
+        raise CmdResultNotFound('Эмитент не найден!')
+
+    if not len(series):
+        return []
+
+    if name == DRAWDOWN:
+        drawdown = max_drawdown(series.close)
+        return [{'value': drawdown.value, 'peak': series.dt[drawdown.peak].item().isoformat(),
+                 'trough': series.dt[drawdown.trough].item().isoformat()}]
+
+    value = INDICATOR_BY_NAME[name][0](series, window)
+    index = np.flatnonzero(~np.isnan(value))
+    return [{'dt': dt.isoformat(), 'value': value} for dt, value in
+            zip(series.dt[index].tolist(), value[index].tolist())]
+
+
+def _parse_params(params: List[str]) -> Tuple[str, str, date, date, int, str]:
+    """
+    Разобрать параметры <Индикатор> <Код> <Дата1> <Дата2> [<Окно> [<Детализация>]]
+
+    :raise: InvalidCmdParams
+
+    :return: Кортеж (Индикатор, Код, Дата начала, Дата конца, Окно, Краткое название детализации)
+    """
+
+    if not 4 <= len(params) <= 6:
+        raise InvalidCmdParams()
+
+    name = params[0].lower()
+    if name not in INDICATOR_BY_NAME and name != DRAWDOWN:
+        raise InvalidCmdParams()
+
+    try:
+        dt_left = datetime.strptime(params[2], '%d.%m.%y').date()
+        dt_right = datetime.strptime(params[3], '%d.%m.%y').date()
+        window = int(params[4]) if len(params) > 4 else INDICATOR_BY_NAME.get(name, (None, 0))[1]
+    except ValueError:
+        raise InvalidCmdParams()
+
+    period_name = params[5].lower() if len(params) > 5 else '1d'
+    if window < INDICATOR_BY_NAME.get(name, (None, 0, 0))[2] or window < 0 or \
+            (period_name not in PERIOD_BY_NAME and get_timeframe(period_name) is None):
+        raise InvalidCmdParams()
+
+    return name, params[1], dt_left, dt_right, window, period_name
+
+
+def _format_dt(value: str) -> str:
+    """
+    Получить дату (дату и время) в формате 'dd.mm.yy' ('dd.mm.yy HH:MM:SS') по дате в формате ISO
+    """
+
+    dt = datetime.fromisoformat(value)
+    return dt.strftime('%d.%m.%y %H:%M:%S' if 'T' in value else '%d.%m.%y')
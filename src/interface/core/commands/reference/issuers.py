@@ -0,0 +1,38 @@
+"""
+Команда 'Справочник эмитентов'
+"""
+
+from typing import List
+
+from src.interface.core.commands.cmd import InvalidCmdParams
+from src.equities.issuer_directory import ICHARTS_URL, IssuerDirectory, get_directory_path, get_issuers, refresh
+from src.interface.core.commands.manager import Manager
+
+
+@Manager.implement('issuers')
+def _run(params: List[str]) -> List[str]:
+    """
+    Получить сведения о справочнике эмитентов либо обновить справочник из файла icharts.js finam.ru.
+    После обновления кэш результатов команд очищается
+
+    :param list[str] params: Параметры [refresh [<Файл либо адрес icharts.js>]]
+    :raise: InvalidCmdParams
+
+    :return: Строка с кол-вом эмитентов и источником справочника либо с ошибкой обновления
+    """
+
+    if not params:
+        issuers = get_issuers()
+        source = get_directory_path() if isinstance(issuers, IssuerDirectory) else 'встроенный перечень акций'
+        return [f'Эмитентов в справочнике "{len(issuers)}", источник "{source}"']
+
+    if params[0].lower() != 'refresh' or len(params) > 2:
+        raise InvalidCmdParams()
+
+    try:
+        count = refresh(params[1] if len(params) > 1 else ICHARTS_URL)
+    except (OSError, ValueError) as err:
+        return [f'Ошибка! {str(err)}']
+
+    Manager.clear_cache()
+    return [f'Эмитентов в справочнике "{count}"']
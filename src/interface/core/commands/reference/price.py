@@ -2,44 +2,111 @@
 Команда 'Получить курс ценной бумаги'
 """
 
-from datetime import datetime
-from typing import List
+from datetime import date, datetime
+from typing import Dict, Iterator, List, Optional, Tuple
 
-from src.interface.core.commands.cmd import InvalidCmdParams
-from src.equities.finam import get_price, NotFoundIssuer
+from src.interface.core.commands.cache import closed_range_ttl
+from src.interface.core.commands.cmd import CmdResultNotFound, InvalidCmdParams
+from src.equities.finam import NotFoundIssuer
+from src.equities.price import PERIOD_BY_NAME
+from src.equities.resample import get_timeframe, iter_price_by_name
 from src.interface.core.commands.manager import Manager
 
 
-@Manager.register('price',
-                  [],
-                  'Получить курс за отрезок, в формате <дата> <цена_открытия> <цена_закрытия>',
-                  '<код> [<дата1> [<дата2>]], дата в формате dd.mm.yy, если не указана то за текущий день')
-def _run(params: List[str]) -> List[str]:
+def _cache_ttl(params: List[str]) -> Optional[float]:
     """
-    Получить цену. Если дата не передана считаем текущей
+    Политика кэширования: по дате конца отрезка (см. closed_range_ttl)
 
-    :param list[str] params: Параметры <Код> [<Дата1> [<Дата2>]]
+    :param params: Параметры команды
+    """
+
+    try:
+        dt_left = datetime.strptime(params[1], '%d.%m.%y').date() if len(params) > 1 else datetime.today().date()
+        dt_right = datetime.strptime(params[2], '%d.%m.%y').date() if len(params) > 2 else dt_left
+    except ValueError:
+        return None
+
+    return closed_range_ttl(dt_right)
+
+
+@Manager.implement('price', _cache_ttl)
+def _run(params: List[str]) -> Iterator[str]:
+    """
+    Получить цену. Если дата не передана считаем текущей, если детализация не передана - день.
+    Строки возвращаются по мере получения курсов (см. Manager.iter_cmd)
+
+    :param list[str] params: Параметры <Код> [<Дата1> [<Дата2> [<Детализация>]]]
     :raise: InvalidCmdParams
 
     :return: Строки вида 'Дата ЦенаОткрытия ЦенаЗакрытия'. Если ценная бумага не найдена, возвращается
     строка с ошибкой
     """
 
-    if 1 <= len(params) <= 3:
-
-        try:
-            dt_left: datetime.date = datetime.strptime(params[1], '%d.%m.%y').date() \
-                if len(params) > 1 else datetime.today().date()
-
-            dt_right: datetime.date = datetime.strptime(params[2], '%d.%m.%y').date() \
-                if len(params) > 2 else dt_left
-        except:
-            raise InvalidCmdParams()
+    if 1 <= len(params) <= 4:
+        dt_left, dt_right, period_name = _parse_params(params)
 
         try:
-            price_list = get_price(params[0], dt_left, dt_right)
-            return [f'{price.dt.strftime("%d.%m.%y")} {price.open:.2f} {price.close:.2f}' for price in price_list]
+            price_iter = iter_price_by_name(params[0], dt_left, dt_right, period_name)
         except NotFoundIssuer:
-            return ['Эмитент не найден!']
+            yield 'Эмитент не найден!'
+            return
+
+        for price in price_iter:
+            dt_format = '%d.%m.%y %H:%M:%S' if isinstance(price.dt, datetime) else '%d.%m.%y'
+            yield f'{price.dt.strftime(dt_format)} {price.open:.2f} {price.close:.2f}'
     else:
         raise InvalidCmdParams()
+
+
+@Manager.implement_data('price', _cache_ttl)
+def _data(params: List[str]) -> Iterator[Dict[str, object]]:
+    """
+    Получить цену, результат в структурированном виде (см. _run)
+
+    :param list[str] params: Параметры <Код> [<Дата1> [<Дата2> [<Детализация>]]]
+    :raise: InvalidCmdParams, CmdResultNotFound
+
+    :return: Записи вида {'dt': Дата (ISO), 'open': ЦенаОткрытия, 'high': Максимум, 'low': Минимум,
+    'close': ЦенаЗакрытия, 'volume': Объем}
+    """
+
+    if not 1 <= len(params) <= 4:
+        raise InvalidCmdParams()
+
+    dt_left, dt_right, period_name = _parse_params(params)
+    try:
+        price_iter = iter_price_by_name(params[0], dt_left, dt_right, period_name)
+    except NotFoundIssuer:
+        raise CmdResultNotFound('Эмитент не найден!')
+
+    for price in price_iter:
+        yield {'dt': price.dt.isoformat(), 'open': float(price.open),
+               'high': None if price.high is None else float(price.high),
+               'low': None if price.low is None else float(price.low),
+               'close': float(price.close), 'volume': price.volume}
+
+
+def _parse_params(params: List[str]) -> Tuple[date, date, str]:
+    """
+    Разобрать параметры <Код> [<Дата1> [<Дата2> [<Детализация>]]]
+
+    :raise: InvalidCmdParams
+
+    :return: Кортеж (Дата начала, Дата конца, Краткое название детализации)
+    """
+
+    try:
+        dt_left: date = datetime.strptime(params[1], '%d.%m.%y').date() \
+            if len(params) > 1 else datetime.today().date()
+
+        dt_right: date = datetime.strptime(params[2], '%d.%m.%y').date() \
+            if len(params) > 2 else dt_left
+
+        period_name = params[3].lower() if len(params) > 3 else '1d'
+    except:
+        raise InvalidCmdParams()
+
+    if period_name not in PERIOD_BY_NAME and get_timeframe(period_name) is None:
+        raise InvalidCmdParams()
+
+    return dt_left, dt_right, period_name
@@ -0,0 +1,125 @@
+"""
+Команда 'Ранжировать эмитентов по показателю'
+"""
+
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+from src.interface.core.commands.cache import closed_range_ttl
+from src.interface.core.commands.cmd import InvalidCmdParams
+from src.equities.issuer_directory import get_code_list
+from src.equities.screener import METRIC_LIST, align, rank
+from src.equities.series import get_price_series_many
+from src.interface.core.commands.manager import Manager
+
+RESULT_MAX = 10
+"""
+Кол-во эмитентов в результате по умолчанию
+"""
+
+
+def _cache_ttl(params: List[str]) -> Optional[float]:
+    """
+    Политика кэширования: по дате конца отрезка (см. closed_range_ttl)
+
+    :param params: Параметры команды
+    """
+
+    try:
+        dt_right = _parse_params(params)[3]
+    except InvalidCmdParams:
+        return None
+
+    return closed_range_ttl(dt_right)
+
+
+@Manager.implement('screen', _cache_ttl)
+def _run(params: List[str]) -> List[str]:
+    """
+    Ранжировать эмитентов по показателю за отрезок
+
+    :param list[str] params: Параметры [-]<Показатель> <Дата1> <Дата2> [<Кол-во> [<Код> ...]]
+    :raise: InvalidCmdParams
+
+    :return: Строки вида 'Место. Код Значение' и строка с кол-вом эмитентов, курсы которых получить не удалось
+    """
+
+    metric = _parse_params(params)[0]
+    item_list, failed = _rank(params)
+
+    result = [f'{i}. {item["code"]} {_format_value(metric, item["value"])}' for i, item in enumerate(item_list, 1)]
+    if failed:
+        result.append(f'Не удалось получить курсы эмитентов "{failed}"')
+    return result or ['Результат отсутствует!']
+
+
+@Manager.implement_data('screen', _cache_ttl)
+def _data(params: List[str]) -> List[Dict[str, object]]:
+    """
+    Ранжировать эмитентов, результат в структурированном виде (см. _run)
+
+    :param list[str] params: Параметры [-]<Показатель> <Дата1> <Дата2> [<Кол-во> [<Код> ...]]
+    :raise: InvalidCmdParams
+
+    :return: Записи вида {'code': Код эмитента, 'value': Значение показателя}
+    """
+    return _rank(params)[0]
+
+
+def _rank(params: List[str]) -> Tuple[List[Dict[str, object]], int]:
+    """
+    Ранжировать эмитентов
+
+    :raise: InvalidCmdParams
+
+    :return: Кортеж (Записи {'code', 'value'}, Кол-во эмитентов, курсы которых получить не удалось)
+    """
+
+    metric, ascending, dt_left, dt_right, result_max, issuer_code_list = _parse_params(params)
+
+    series_by_code = get_price_series_many(issuer_code_list, dt_left, dt_right)
+    failed = [code for code, series in series_by_code.items() if isinstance(series, Exception)]
+    for code in failed:
+        del series_by_code[code]
+
+    item_list = rank(align(series_by_code), metric, ascending)[:result_max]
+    return [{'code': code, 'value': value} for code, value in item_list], len(failed)
+
+
+def _parse_params(params: List[str]) -> Tuple[str, bool, date, date, int, List[str]]:
+    """
+    Разобрать параметры [-]<Показатель> <Дата1> <Дата2> [<Кол-во> [<Код> ...]]
+
+    :raise: InvalidCmdParams
+
+    :return: Кортеж (Показатель, По возрастанию, Дата начала, Дата конца, Кол-во, Коды эмитентов)
+    """
+
+    if len(params) < 3:
+        raise InvalidCmdParams()
+
+    metric = params[0].lower()
+    ascending = metric.startswith('-')
+    metric = metric.lstrip('-')
+    if metric not in METRIC_LIST:
+        raise InvalidCmdParams()
+
+    try:
+        dt_left = datetime.strptime(params[1], '%d.%m.%y').date()
+        dt_right = datetime.strptime(params[2], '%d.%m.%y').date()
+        result_max = int(params[3]) if len(params) > 3 else RESULT_MAX
+    except ValueError:
+        raise InvalidCmdParams()
+
+    if result_max <= 0:
+        raise InvalidCmdParams()
+
+    issuer_code_list = list(dict.fromkeys(code.upper() for code in params[4:])) or get_code_list()
+    return metric, ascending, dt_left, dt_right, result_max, issuer_code_list
+
+
+def _format_value(metric: str, value: float) -> str:
+    """
+    Получить строковое представление значения показателя: доходность и волатильность в процентах, объем - целым
+    """
+    return f'{value:.0f}' if metric == 'volume' else f'{value * 100:.2f}%'
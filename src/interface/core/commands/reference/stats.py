@@ -0,0 +1,44 @@
+"""
+Команда 'Статистика выполнения'
+"""
+
+from typing import List
+
+from src.interface.core.commands.manager import Manager, CMD_SECONDS, CMD_ERRORS
+from src.metrics import REGISTRY
+
+
+@Manager.implement('stats')
+def _run(_: List[str]) -> List[str]:
+    """
+    Получить статистику выполнения команд, кэша результатов и запросов к finam.ru
+
+    :param _: Параметры
+
+    :return: Строки статистики
+    """
+
+    result = ['Команды:']
+    for (cmd_name,), (_, count, total) in CMD_SECONDS.items():
+        error_count = sum(value for (name, _), value in CMD_ERRORS.items() if name == cmd_name)
+        result.append(f'- {cmd_name}: кол-во {count}, ошибок {error_count:.0f}, среднее {total / count * 1000:.2f} мс, '
+                      f'p95 до {CMD_SECONDS.quantile(0.95, cmd=cmd_name) * 1000:g} мс')
+
+    cache_stats = Manager.get_cache_stats()
+    result.append(f'Кэш результатов: попаданий {cache_stats.hits}, промахов {cache_stats.misses}, '
+                  f'записей {cache_stats.size}')
+
+    network_seconds = REGISTRY.get('finam_fetch_network_seconds')
+    parse_seconds = REGISTRY.get('finam_fetch_parse_seconds')
+    if network_seconds is not None:
+        result.append('Запросы finam.ru:')
+        parse_dict = dict(parse_seconds.items())
+        for (period,), (_, count, total) in network_seconds.items():
+            parse_total = parse_dict[(period,)][2]
+            rows = REGISTRY.get('finam_fetch_rows_total').get(period=period)
+            size = REGISTRY.get('finam_fetch_bytes_total').get(period=period)
+            result.append(f'- {period}: запросов {count}, строк {rows:.0f}, байт {size:.0f}, '
+                          f'сеть в среднем {total / count * 1000:.2f} мс, разбор в среднем '
+                          f'{parse_total / count * 1000:.2f} мс')
+
+    return result
@@ -0,0 +1,35 @@
+"""
+Команда 'Обновить хранилище курсов'
+"""
+
+from datetime import datetime
+from typing import List
+
+from src.interface.core.commands.cmd import InvalidCmdParams
+from src.equities.updater import update_price, format_update, UpdateError
+from src.interface.core.commands.manager import Manager
+
+
+@Manager.implement('update')
+def _run(params: List[str]) -> List[str]:
+    """
+    Дополнить хранилище дневными курсами всех эмитентов после последнего полученного отрезка
+
+    :param list[str] params: Параметры [<Дата начала истории>]
+    :raise: InvalidCmdParams
+
+    :return: Строки по эмитентам с новыми курсами либо ошибкой и итоговая строка
+    """
+
+    if len(params) > 1:
+        raise InvalidCmdParams()
+
+    try:
+        dt_first = datetime.strptime(params[0], '%d.%m.%y').date() if params else None
+    except ValueError:
+        raise InvalidCmdParams()
+
+    try:
+        return format_update(update_price(dt_first=dt_first))
+    except UpdateError as err:
+        return [f'Ошибка! {str(err)}']
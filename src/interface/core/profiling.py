@@ -0,0 +1,63 @@
+"""
+Профилирование выполнения команды (cProfile и, опционально, tracemalloc).
+
+Профилирование включается пользовательским интерфейсом для отдельной команды, отчет содержит наиболее затратные
+функции и, при профилировании памяти, строки кода с наибольшим объемом выделенной памяти.
+"""
+
+import cProfile
+import io
+import pstats
+import tracemalloc
+from typing import Callable, List, Tuple, TypeVar
+
+T = TypeVar('T')
+
+REPORT_LIMIT = 25
+"""
+Кол-во строк отчета (функций, строк кода)
+"""
+
+
+def run_profiled(func: Callable[[], T], output: str = None, memory: bool = False,
+                 sort: str = 'cumulative') -> Tuple[T, List[str]]:
+    """
+    Выполнить функцию под профилировщиком
+
+    :param func: Функция
+    :param output: Файл для сохранения профиля (.prof, для snakeviz, pstats и т.п.). Если не задан, не сохраняется
+    :param memory: Профилировать выделение памяти
+    :param sort: Порядок функций в отчете (см. pstats.SortKey)
+
+    :return: Кортеж (Результат функции, Строки отчета)
+
+    >>> result, report = run_profiled(lambda: sum(range(10)))
+    >>> result, report[0]
+    (45, 'Профиль выполнения:')
+    """
+
+    tracing = memory and not tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.start()
+
+    profile = cProfile.Profile()
+    try:
+        result = profile.runcall(func)
+        snapshot = tracemalloc.take_snapshot() if memory else None
+    finally:
+        if tracing:
+            tracemalloc.stop()
+
+    stream = io.StringIO()
+    pstats.Stats(profile, stream=stream).strip_dirs().sort_stats(sort).print_stats(REPORT_LIMIT)
+    report = ['Профиль выполнения:'] + [line for line in stream.getvalue().splitlines() if line.strip()]
+
+    if output:
+        profile.dump_stats(output)
+        report.append(f'Профиль сохранен в файл "{output}"')
+
+    if snapshot is not None:
+        report.append('Выделение памяти:')
+        report.extend(str(stat) for stat in snapshot.statistics('lineno')[:REPORT_LIMIT])
+
+    return result, report
@@ -1,11 +1,83 @@
 """
 Реализация интерфейса 'web страница'
+
+Страница формируется потоково: строки результата команды отправляются браузеру по мере их получения, поэтому время
+до первой строки и расход памяти не зависят от объема результата.
+
+JSON API: GET /api/<команда>/<параметр1>/<параметр2>...?offset=<смещение>&limit=<кол-во> возвращает результат команды
+в структурированном виде (см. Manager.get_data) постранично. Ответ сжимается gzip и содержит заголовок ETag (хэш
+содержимого страницы), для записей с датами - заголовок Last-Modified (по дате последней записи). Неизменившийся
+результат возвращается ответом 304 без тела.
+
+Пакет команд: POST /batch с командами (конвейерами) в теле запроса, по одной на строку, возвращает результаты в
+порядке команд в текстовом виде (см. Manager.run_batch). Конвейер можно выполнить и с web страницы.
+
+Команды, изменяющие файлы либо общие данные сервера (например, export), в web интерфейсе не выполняются
+(см. Manager.check_web), JSON API отвечает на них кодом 403.
+
+Администратор может выполнить запрос под профилировщиком, передав параметр profile (profile=memory - с профилированием
+выделения памяти) и заголовок PROFILE_TOKEN_HEADER со значением переменной окружения PROFILE_TOKEN_ENV. Вместо
+страницы возвращается отчет о наиболее затратных функциях выполнения команды и формирования страницы.
 """
 
+import argparse
+import gzip
+import hashlib
+import hmac
+import json
 import os
-from flask import Flask, render_template, request
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Iterable, Iterator, List, Optional
+from flask import Flask, Response, request, stream_template
+from werkzeug.http import is_resource_modified
+
+from src.equities.issuer_directory import add_listener
+from src.equities.price_store import enable_price_store
+from src.interface.core.commands.cmd import CmdResultNotFound, InvalidCmdParams
+from src.interface.core.commands.manager import UnknownCmd, UnavailableCmd, Manager, PIPE
+from src.interface.core.profiling import run_profiled
+from src.interface.webserver.server import serve
+from src.metrics import REGISTRY
+
+PROFILE_TOKEN_ENV = 'EQUITIES_PROFILE_TOKEN'
+"""
+Переменная окружения с ключом администратора для профилирования. Если не задана, профилирование отключено
+"""
+
+PROFILE_TOKEN_HEADER = 'X-Profile-Token'
+"""
+Заголовок запроса с ключом администратора
+"""
 
-from src.interface.core.commands.manager import UnknownCmd, Manager
+STREAM_CHUNK_SIZE = 8 * 1024
+"""
+Минимальный размер части страницы, отправляемой браузеру (в символах)
+"""
+
+API_PAGE_LIMIT = 1000
+"""
+Кол-во записей на странице ответа JSON API по умолчанию
+"""
+
+API_PAGE_LIMIT_MAX = 10_000
+"""
+Максимальное кол-во записей на странице ответа JSON API
+"""
+
+BATCH_LINES_MAX = 1000
+"""
+Максимальное кол-во команд в пакете
+"""
+
+GZIP_SIZE_MIN = 1024
+"""
+Минимальный размер ответа JSON API (в байтах) для сжатия
+"""
+
+enable_price_store()
+
+# Справочник эмитентов может быть обновлен другим процессом, результаты по прежнему справочнику не используются
+add_listener(Manager.clear_cache)
 
 app = Flask(__name__, template_folder=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates'))
 app.config.from_object(__name__)
@@ -17,27 +89,204 @@ def _index():
     Обработчик web страницы
     """
 
+    profile = request.values.get('profile')
+    if profile is not None and _is_admin():
+        _, report = run_profiled(lambda: ''.join(_render_index()), memory=profile == 'memory')
+        return Response('\n'.join(report), mimetype='text/plain')
+
+    return Response(_render_index(), mimetype='text/html')
+
+
+def _render_index() -> Iterator[str]:
+    """
+    Выполнить команду и сформировать web страницу. Страница формируется по частям по мере получения результата
+    """
+
     command_line = request.form.get('cl')
     params = str(command_line or '').split()
 
     result_list = []
     if len(params) < 1:
         result_list = Manager.help()
+    elif PIPE in command_line:
+        result_list = Manager.run_batch([command_line], web=True)[0][1]
     else:
         try:
-            result_list = (Manager.run_cmd(params[0], params[1:]))
+            Manager.check_web(params[0])
+            result_list = _iter_safe(Manager.iter_cmd(params[0], params[1:]))
         except UnknownCmd as err:
             result_list = [f'Ошибка! {str(err)}'] + Manager.help()
+        except UnavailableCmd as err:
+            result_list = [f'Ошибка! {str(err)}']
+
+    return _iter_chunk(stream_template('index.html', **locals()))
+
+
+def _iter_safe(str_iter: Iterator[str]) -> Iterator[str]:
+    """
+    Получить строки результата. Ошибка выполнения команды возвращается строкой результата, т.к. часть страницы уже
+    может быть отправлена
+    """
+
+    try:
+        yield from str_iter
+    except Exception as err:
+        yield f'Ошибка! {str(err) or type(err).__name__}'
+
+
+def _iter_chunk(str_iter: Iterable[str]) -> Iterator[str]:
+    """
+    Объединить части страницы в части размером не менее STREAM_CHUNK_SIZE
+    """
+
+    chunk, size = [], 0
+    for part in str_iter:
+        chunk.append(part)
+        size += len(part)
+        if size >= STREAM_CHUNK_SIZE:
+            yield ''.join(chunk)
+            chunk, size = [], 0
 
-    return render_template('index.html', **locals())
+    if chunk:
+        yield ''.join(chunk)
 
 
-def run():
+def _is_admin() -> bool:
     """
-    Запустить сервер
+    Проверить ключ администратора в запросе
     """
 
-    app.run(debug=True)
+    token = os.environ.get(PROFILE_TOKEN_ENV)
+    return bool(token) and hmac.compare_digest(request.headers.get(PROFILE_TOKEN_HEADER, ''), token)
+
+
+@app.route('/api/<cmd_name>', defaults={'cmd_path': ''}, methods=['get'])
+@app.route('/api/<cmd_name>/<path:cmd_path>', methods=['get'])
+def _api(cmd_name: str, cmd_path: str):
+    """
+    Обработчик JSON API
+    """
+
+    params = [param for param in cmd_path.split('/') if param]
+    try:
+        offset = max(int(request.args.get('offset', 0)), 0)
+        limit = min(max(int(request.args.get('limit', API_PAGE_LIMIT)), 0), API_PAGE_LIMIT_MAX)
+    except ValueError:
+        return _api_error(400, 'Параметры страницы введены не верно!')
+
+    try:
+        Manager.check_web(cmd_name)
+        data = Manager.get_data(cmd_name, params)
+    except UnknownCmd as err:
+        return _api_error(404, str(err))
+    except UnavailableCmd as err:
+        return _api_error(403, str(err))
+    except InvalidCmdParams as err:
+        return _api_error(400, str(err), syntax=Manager.run_cmd(cmd_name, ['?']))
+    except CmdResultNotFound as err:
+        return _api_error(404, str(err))
+
+    body = json.dumps({'cmd': cmd_name.lower(), 'params': params, 'total': len(data.items), 'offset': offset,
+                       'limit': limit, 'items': data.items[offset:offset + limit]},
+                      ensure_ascii=False, separators=(',', ':')).encode()
+
+    # Тег версии - хэш содержимого страницы, одинаковый у всех процессов сервера и после повторного получения
+    etag = hashlib.sha1(body).hexdigest()
+    last_modified = _get_last_modified(data.items)
+
+    response = Response(mimetype='application/json')
+    response.set_etag(etag, weak=True)
+    response.last_modified = last_modified
+    response.cache_control.no_cache = True
+    response.vary.add('Accept-Encoding')
+
+    if not is_resource_modified(request.environ, etag, last_modified=last_modified):
+        response.status_code = 304
+        return response
+
+    if len(body) >= GZIP_SIZE_MIN and 'gzip' in request.accept_encodings:
+        body = gzip.compress(body, compresslevel=5)
+        response.content_encoding = 'gzip'
+
+    response.set_data(body)
+    return response
+
+
+def _get_last_modified(item_list: list) -> Optional[datetime]:
+    """
+    Получить время изменения данных результата по дате последней записи (поле 'dt'): начало следующего дня, но не
+    позднее текущего времени, т.к. курс текущего дня может измениться
+
+    :param item_list: Записи результата
+    :return: Время изменения данных либо None, если записи не содержат дат
+    """
+
+    dt_list = [item['dt'] for item in item_list if isinstance(item, dict) and 'dt' in item]
+    if not dt_list:
+        return None
+
+    dt_next = datetime.combine(date.fromisoformat(max(dt_list)[:10]) + timedelta(days=1), time(), timezone.utc)
+    return min(dt_next, datetime.now(timezone.utc).replace(microsecond=0))
+
+
+def _api_error(status: int, message: str, **kwargs) -> Response:
+    """
+    Ответ JSON API с ошибкой
+
+    :param status: Код ответа
+    :param message: Текст ошибки
+    :param kwargs: Дополнительные поля ответа
+    """
+
+    return Response(json.dumps({'error': message, **kwargs}, ensure_ascii=False), status=status,
+                    mimetype='application/json')
+
+
+@app.route('/batch', methods=['post'])
+def _batch():
+    """
+    Обработчик пакета команд
+    """
+
+    cmd_line_list = request.get_data(as_text=True).splitlines()
+    if len(cmd_line_list) > BATCH_LINES_MAX:
+        return Response(f'Ошибка! Кол-во команд в пакете больше {BATCH_LINES_MAX}!', status=413,
+                        mimetype='text/plain')
+
+    result = []
+    for cmd_line, result_list in Manager.run_batch(cmd_line_list, web=True):
+        result.extend([f'> {cmd_line}'] + result_list)
+    return Response('\n'.join(result), mimetype='text/plain')
+
+
+@app.route('/metrics', methods=['get'])
+def _metrics():
+    """
+    Метрики в текстовом формате Prometheus
+    """
+
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+
+def run(argv: List[str] = None):
+    """
+    Запустить сервер. По умолчанию - сервер разработки, с параметром --workers - производственный режим
+    (см. server.serve)
+
+    :param argv: Параметры командной строки
+    """
+
+    parser = argparse.ArgumentParser(description='Веб сервер')
+    parser.add_argument('--host', default='127.0.0.1', help='Адрес')
+    parser.add_argument('--port', type=int, default=5000, help='Порт')
+    parser.add_argument('--workers', type=int, help='Кол-во процессов (производственный режим)')
+    parser.add_argument('--threads', type=int, default=32, help='Размер пула потоков процесса')
+    args = parser.parse_args(argv)
+
+    if args.workers is None:
+        app.run(args.host, args.port, debug=True)
+    else:
+        serve(app, args.host, args.port, args.workers, args.threads)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,186 @@
+"""
+Производственный режим работы веб сервера.
+
+Запросы обслуживаются несколькими процессами (workers), принимающими соединения с общего сокета, что позволяет
+использовать все ядра процессора. Каждый процесс выполняет запросы в пуле потоков: пока одни потоки ожидают ответа
+finam.ru, остальные обслуживают других пользователей. Процесс принимает соединение, только когда у него есть свободный
+поток, остальные соединения ожидают в очереди сокета и принимаются свободными процессами. Соединение закрывается после
+ответа, поэтому неактивный клиент не занимает поток. Кол-во одновременных запросов к finam.ru ограничивается
+транспортом (см. equities.transport), поэтому пул потоков процесса должен быть больше пула соединений транспорта.
+
+Метрики (/metrics) и кэш результатов команд у каждого процесса свои. Справочник эмитентов, обновленный в другом
+процессе, каждый процесс открывает заново при проверке замены файла справочника (см.
+issuer_directory.DIRECTORY_CHECK_SECONDS) и очищает свой кэш результатов.
+"""
+
+import os
+import signal
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+REQUEST_TIMEOUT = 5.0
+"""
+Время ожидания запроса в принятом соединении (в секундах), по истечении соединение закрывается и освобождает поток
+"""
+
+ACCEPT_WAIT_SECONDS = 0.5
+"""
+Время ожидания свободного потока перед приемом соединения (в секундах), по истечении проверяется остановка сервера
+"""
+
+
+class _RequestHandler(WSGIRequestHandler):
+    """
+    Обработчик соединения с потоковой передачей ответа (HTTP/1.1). Соединение обслуживает один запрос
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    timeout = REQUEST_TIMEOUT
+
+    def handle_one_request(self):
+        super().handle_one_request()
+        self.close_connection = True
+
+    def log_request(self, *_):
+        pass
+
+
+class _PooledWSGIServer(BaseWSGIServer):
+    """
+    WSGI сервер, выполняющий запросы в пуле потоков ограниченного размера. Соединение принимается только при наличии
+    свободного потока
+    """
+
+    multithread = True
+
+    def __init__(self, app, threads: int, fd: int):
+        """
+        :param app: WSGI приложение
+        :param threads: Размер пула потоков
+        :param fd: Дескриптор сокета, принимающего соединения
+        """
+
+        super().__init__('127.0.0.1', 0, app, handler=_RequestHandler, fd=fd)
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='request')
+        self._slots = threading.BoundedSemaphore(threads)
+
+        # Соединение, принятое другим процессом, не блокирует прием
+        self.socket.setblocking(False)
+
+    def get_request(self):
+        if not self._slots.acquire(timeout=ACCEPT_WAIT_SECONDS):
+            raise BlockingIOError()
+        try:
+            return super().get_request()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def shutdown_request(self, request):
+        try:
+            super().shutdown_request(request)
+        finally:
+            self._slots.release()
+
+    def process_request(self, request, client_address):
+        self._executor.submit(self._process_request, request, client_address)
+
+    def _process_request(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def close(self):
+        """
+        Закрыть сокет и пул потоков
+        """
+        self.server_close()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def serve(app, host: str = '127.0.0.1', port: int = 5000, workers: int = 1, threads: int = 32):
+    """
+    Запустить сервер. Выполнение продолжается до прерывания (Ctrl+C) либо сигнала SIGTERM
+
+    :param app: WSGI приложение
+    :param host: Адрес
+    :param port: Порт
+    :param workers: Кол-во процессов. На платформах без fork - один процесс
+    :param threads: Размер пула потоков процесса
+    """
+
+    with socket.create_server((host, port), backlog=1024) as sock:
+        sock.set_inheritable(True)
+        print(f'Сервер запущен: http://{host}:{sock.getsockname()[1]}/ (процессов {workers}, потоков {threads})')
+
+        if workers <= 1 or not hasattr(os, 'fork'):
+            _serve_worker(app, sock, threads)
+            return
+
+        pid_list = []
+        for _ in range(workers):
+            pid = os.fork()
+            if pid == 0:
+                try:
+                    signal.signal(signal.SIGINT, signal.SIG_IGN)
+                    _serve_worker(app, sock, threads)
+                finally:
+                    os._exit(0)
+            pid_list.append(pid)
+
+        signal.signal(signal.SIGTERM, _exit)
+        try:
+            for pid in pid_list:
+                os.waitpid(pid, 0)
+        except (KeyboardInterrupt, SystemExit):
+            _stop(pid_list)
+
+
+def _serve_worker(app, sock: socket.socket, threads: int):
+    """
+    Обслуживать запросы процессом
+    """
+
+    server = _PooledWSGIServer(app, threads, sock.fileno())
+    signal.signal(signal.SIGTERM, _exit)
+    try:
+        server.serve_forever()
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        server.close()
+
+
+def _exit(*_):
+    """
+    Обработчик сигнала SIGTERM: завершить ожидание в основном потоке
+    """
+    raise SystemExit()
+
+
+def _stop(pid_list: List[int]):
+    """
+    Остановить процессы
+
+    :param pid_list: Идентификаторы процессов
+    """
+
+    for pid in pid_list:
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+
+    for pid in pid_list:
+        try:
+            os.waitpid(pid, 0)
+        except ChildProcessError:
+            pass
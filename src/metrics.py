@@ -0,0 +1,244 @@
+"""
+Метрики приложения: счетчики, гистограммы и вычисляемые показатели с метками.
+
+Все метрики регистрируются в общем реестре REGISTRY и выводятся в текстовом формате Prometheus (см. Registry.render).
+
+>>> registry = Registry()
+>>> requests = registry.add(Counter('requests_total', 'Кол-во запросов', ('status',)))
+>>> requests.inc(status='200')
+>>> print(registry.render(), end='')
+# HELP requests_total Кол-во запросов
+# TYPE requests_total counter
+requests_total{status="200"} 1
+"""
+
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+"""
+Границы интервалов гистограммы длительности (в секундах)
+"""
+
+LabelValues = Tuple[str, ...]
+
+
+class _Metric:
+    """
+    Метрика с метками
+    """
+
+    type_name = ''
+
+    def __init__(self, name: str, description: str, label_names: Sequence[str] = ()):
+        """
+        :param name: Имя
+        :param description: Описание
+        :param label_names: Имена меток
+        """
+        self.name = name
+        self.description = description
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+
+    def _label_values(self, labels: Dict[str, object]) -> LabelValues:
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def _format_labels(self, label_values: LabelValues, extra: str = '') -> str:
+        pair_list = [f'{name}="{value}"' for name, value in zip(self.label_names, label_values)]
+        if extra:
+            pair_list.append(extra)
+        return '{' + ','.join(pair_list) + '}' if pair_list else ''
+
+    def render(self) -> List[str]:
+        """
+        Получить строки метрики в текстовом формате Prometheus
+        """
+        return [f'# HELP {self.name} {self.description}', f'# TYPE {self.name} {self.type_name}'] + self._render()
+
+    def _render(self) -> List[str]:
+        raise NotImplementedError()
+
+
+class Counter(_Metric):
+    """
+    Счетчик
+    """
+
+    type_name = 'counter'
+
+    def __init__(self, name: str, description: str, label_names: Sequence[str] = ()):
+        super().__init__(name, description, label_names)
+        self._value_dict: Dict[LabelValues, float] = {}
+
+    def inc(self, value: float = 1, **labels):
+        """
+        Увеличить счетчик
+
+        :param value: Величина
+        :param labels: Значения меток
+        """
+        key = self._label_values(labels)
+        with self._lock:
+            self._value_dict[key] = self._value_dict.get(key, 0) + value
+
+    def get(self, **labels) -> float:
+        """
+        Получить значение
+
+        :param labels: Значения меток
+        """
+        return self._value_dict.get(self._label_values(labels), 0)
+
+    def items(self) -> List[Tuple[LabelValues, float]]:
+        """
+        Получить значения по меткам
+        """
+        with self._lock:
+            return sorted(self._value_dict.items())
+
+    def _render(self) -> List[str]:
+        return [f'{self.name}{self._format_labels(key)} {_format_value(value)}' for key, value in self.items()]
+
+
+class Histogram(_Metric):
+    """
+    Гистограмма
+    """
+
+    type_name = 'histogram'
+
+    def __init__(self, name: str, description: str, label_names: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        """
+        :param buckets: Верхние границы интервалов по возрастанию
+        """
+        super().__init__(name, description, label_names)
+        self.buckets = tuple(buckets)
+        self._value_dict: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, **labels):
+        """
+        Добавить наблюдение
+
+        :param value: Величина
+        :param labels: Значения меток
+        """
+        key = self._label_values(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._value_dict.get(key)
+            if state is None:
+                state = self._value_dict[key] = [[0] * (len(self.buckets) + 1), 0, 0.0]
+            state[0][index] += 1
+            state[1] += 1
+            state[2] += value
+
+    def items(self) -> List[Tuple[LabelValues, Tuple[List[int], int, float]]]:
+        """
+        Получить значения по меткам: (Кол-во наблюдений по интервалам, Кол-во наблюдений, Сумма)
+        """
+        with self._lock:
+            return sorted((key, (list(state[0]), state[1], state[2])) for key, state in self._value_dict.items())
+
+    def quantile(self, q: float, **labels) -> float:
+        """
+        Получить оценку квантиля (верхняя граница интервала, в который попадает квантиль)
+
+        :param q: Квантиль, от 0 до 1
+        :param labels: Значения меток
+        """
+
+        with self._lock:
+            state = self._value_dict.get(self._label_values(labels))
+            if state is None:
+                return 0.0
+            bucket_counts, count = list(state[0]), state[1]
+
+        rank, total = q * count, 0
+        for bound, bucket_count in zip(self.buckets + (float('inf'),), bucket_counts):
+            total += bucket_count
+            if total >= rank:
+                return bound
+        return float('inf')
+
+    def _render(self) -> List[str]:
+        result = []
+        for key, (bucket_counts, count, total) in self.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), bucket_counts):
+                cumulative += bucket_count
+                le = 'le="' + _format_value(bound) + '"'
+                result.append(f'{self.name}_bucket{self._format_labels(key, le)} {cumulative}')
+            result.append(f'{self.name}_count{self._format_labels(key)} {count}')
+            result.append(f'{self.name}_sum{self._format_labels(key)} {_format_value(total)}')
+        return result
+
+
+class Gauge(_Metric):
+    """
+    Показатель, вычисляемый при выводе
+    """
+
+    type_name = 'gauge'
+
+    def __init__(self, name: str, description: str, func: Callable[[], float]):
+        """
+        :param func: Функция вычисления значения
+        """
+        super().__init__(name, description)
+        self._func = func
+
+    def _render(self) -> List[str]:
+        return [f'{self.name} {_format_value(self._func())}']
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+M = TypeVar('M', bound=_Metric)
+
+
+class Registry:
+    """
+    Реестр метрик
+    """
+
+    def __init__(self):
+        self._metric_dict: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def add(self, metric: M) -> M:
+        """
+        Зарегистрировать метрику. Если метрика с таким именем уже зарегистрирована, возвращается она
+
+        :param metric: Метрика
+        """
+        with self._lock:
+            return self._metric_dict.setdefault(metric.name, metric)
+
+    def get(self, name: str) -> Optional[_Metric]:
+        """
+        Получить метрику по имени. None, если метрика не зарегистрирована
+
+        :param name: Имя метрики
+        """
+        return self._metric_dict.get(name)
+
+    def render(self) -> str:
+        """
+        Получить метрики в текстовом формате Prometheus
+        """
+        with self._lock:
+            metric_list = sorted(self._metric_dict.values(), key=lambda metric: metric.name)
+        return '\n'.join(line for metric in metric_list for line in metric.render()) + '\n'
+
+
+REGISTRY = Registry()
+"""
+Общий реестр метрик
+"""
@@ -0,0 +1,63 @@
+"""
+Общие фикстуры тестов: локальный заменитель finam.ru, хранилище курсов во временном каталоге, встроенный перечень
+эмитентов
+"""
+
+import pytest
+
+from benchmarks.finam_stub import FinamStub
+from src.equities.issuer_directory import DIRECTORY_ENV, set_issuers
+from src.equities.price_store import STORE_DIR_ENV, PriceStore, get_price_store, set_price_store
+from src.equities.resilience import CircuitBreaker
+from src.equities.transport import get_transport, set_transport
+
+
+@pytest.fixture(autouse=True)
+def issuers(tmp_path, monkeypatch):
+    """
+    Встроенный перечень эмитентов (файл справочника отсутствует)
+    """
+
+    monkeypatch.setenv(DIRECTORY_ENV, str(tmp_path / 'issuers.bin'))
+    set_issuers(None)
+    yield
+    set_issuers(None)
+
+
+@pytest.fixture(autouse=True)
+def no_store(tmp_path, monkeypatch):
+    """
+    Хранилище курсов отключено (включается, например, при загрузке web интерфейса), каталог по умолчанию - временный
+    """
+
+    monkeypatch.setenv(STORE_DIR_ENV, str(tmp_path / 'default_store'))
+    previous = get_price_store()
+    set_price_store(None)
+    yield
+    set_price_store(previous)
+
+
+@pytest.fixture
+def store(tmp_path):
+    """
+    Хранилище курсов во временном каталоге
+    """
+
+    previous = get_price_store()
+    result = PriceStore(str(tmp_path / 'store'))
+    set_price_store(result)
+    yield result
+    set_price_store(previous)
+
+
+@pytest.fixture
+def stub():
+    """
+    Локальный заменитель finam.ru, запросы выполняются без повторов через отдельный предохранитель
+    """
+
+    previous = get_transport()
+    with FinamStub() as result:
+        set_transport(result.transport(retry_attempts=1, breaker=CircuitBreaker()))
+        yield result
+        set_transport(previous)
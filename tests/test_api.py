@@ -0,0 +1,83 @@
+"""
+Тесты JSON API web интерфейса: постраничная выдача, сжатие, условные запросы (см. interface.webserver.app)
+"""
+
+import gzip
+import json
+
+import pytest
+
+from src.interface.core.commands.manager import Manager
+from src.interface.webserver.app import app
+
+
+@pytest.fixture
+def client(stub, store):
+    """
+    Клиент web интерфейса с пустым кэшем результатов команд
+    """
+
+    Manager.clear_cache()
+    yield app.test_client()
+    Manager.clear_cache()
+
+
+def test_paging(client):
+    """
+    Записи результата возвращаются постранично, кол-во записей не более limit
+    """
+
+    first = client.get('/api/price/SBER/01.01.19/31.01.19?limit=5').get_json()
+    second = client.get('/api/price/SBER/01.01.19/31.01.19?offset=5&limit=5').get_json()
+
+    assert first['total'] == second['total'] == 23
+    assert [item['dt'] for item in first['items']] == ['2019-01-01', '2019-01-02', '2019-01-03', '2019-01-04',
+                                                       '2019-01-07']
+    assert second['items'][0]['dt'] == '2019-01-08' and len(second['items']) == 5
+    assert client.get('/api/price/SBER/01.01.19/31.01.19?limit=x').status_code == 400
+
+
+def test_errors(client):
+    """
+    Ошибки команды возвращаются кодом ответа
+    """
+
+    assert client.get('/api/unknown').status_code == 404
+    assert client.get('/api/price/UNKNOWN/01.01.19').status_code == 404
+    assert client.get('/api/export/SBER').status_code == 403
+
+    response = client.get('/api/price')
+    assert response.status_code == 400
+    assert response.get_json()['syntax']
+
+
+def test_gzip(client):
+    """
+    Ответ сжимается, если клиент поддерживает сжатие
+    """
+
+    plain = client.get('/api/price/SBER/01.01.19/31.12.19')
+    packed = client.get('/api/price/SBER/01.01.19/31.12.19', headers={'Accept-Encoding': 'gzip'})
+
+    assert plain.content_encoding is None
+    assert packed.content_encoding == 'gzip'
+    assert json.loads(gzip.decompress(packed.get_data())) == plain.get_json()
+
+
+def test_not_modified(client):
+    """
+    Неизменившийся результат возвращается ответом 304, в т.ч. после повторного получения результата
+    """
+
+    response = client.get('/api/price/SBER/01.01.19/31.01.19')
+    etag = response.headers['ETag']
+    assert response.headers['Last-Modified'] == 'Fri, 01 Feb 2019 00:00:00 GMT'
+
+    # Результат получен заново (другой процесс сервера либо истечение срока хранения в кэше)
+    Manager.clear_cache()
+    assert client.get('/api/price/SBER/01.01.19/31.01.19', headers={'If-None-Match': etag}).status_code == 304
+    assert client.get('/api/price/SBER/01.01.19/31.01.19',
+                      headers={'If-Modified-Since': response.headers['Last-Modified']}).status_code == 304
+
+    # Другая страница - другое содержимое
+    assert client.get('/api/price/SBER/01.01.19/31.01.19?limit=5', headers={'If-None-Match': etag}).status_code == 200
@@ -0,0 +1,91 @@
+"""
+Тесты двоичного файла курсов (см. equities.bar_file)
+"""
+
+import os
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+from src.equities.bar_file import RECORD, BarFile, append_bars, pack_price, to_timestamp, unpack_price, write_bars
+from src.equities.price import Price
+
+_PRICE_LIST = [Price(date(2019, 1, 3), Decimal('186.5'), Decimal('188.2'), Decimal('189'), Decimal('0.00000001'), 0),
+               Price(date(2019, 1, 4), Decimal('-1.25'), Decimal('12345678901.5')),
+               Price(date(2019, 1, 9), Decimal('1E+3'), Decimal('0'), volume=2 ** 40)]
+
+
+def test_round_trip():
+    """
+    Цены в фиксированной точке и отсутствующие значения восстанавливаются без потерь
+    """
+
+    data = pack_price(_PRICE_LIST)
+    assert len(data) == 3 * RECORD.size
+    assert unpack_price(data, False) == _PRICE_LIST
+
+    intraday = [Price(datetime(2019, 1, 3, 10, 0, 1), Decimal(1), Decimal(2)),
+                Price(datetime(2019, 1, 3, 18, 59, 59), Decimal(2), Decimal(3))]
+    assert unpack_price(pack_price(intraday), True) == intraday
+
+    with pytest.raises(ValueError):
+        pack_price([Price(date(2019, 1, 3), Decimal('0.000000001'), Decimal(1))])
+
+
+def test_find_range(tmp_path):
+    """
+    Отрезок дат включает все курсы граничных дней, в т.ч. внутридневные
+    """
+
+    path = str(tmp_path / 'SBER_8.bars')
+    write_bars(path, False, [pack_price(_PRICE_LIST)])
+    with BarFile(path) as bar_file:
+        assert not bar_file.intraday and len(bar_file) == 3
+        assert bar_file.find_range(date(2019, 1, 4), date(2019, 1, 8)) == (1, 2)
+        assert bar_file.find_range(date(2019, 1, 10), date(2019, 1, 31)) == (3, 3)
+        assert bar_file.read_price(*bar_file.find_range(date(2019, 1, 1), date(2019, 1, 9))) == _PRICE_LIST
+        assert bar_file.get_last_timestamp() == to_timestamp(date(2019, 1, 9))
+
+    path = str(tmp_path / 'SBER_7.bars')
+    intraday = [Price(datetime(2019, 1, day, hour), Decimal(hour), Decimal(hour)) for day in (3, 4) for hour in (10, 18)]
+    write_bars(path, True, [pack_price(intraday)])
+    with BarFile(path) as bar_file:
+        assert bar_file.intraday
+        assert bar_file.read_price(*bar_file.find_range(date(2019, 1, 3), date(2019, 1, 3))) == intraday[:2]
+
+
+def test_append_while_reading(tmp_path):
+    """
+    Файл, открытый для чтения, не меняется при дописывании курсов
+    """
+
+    path = str(tmp_path / 'SBER_8.bars')
+    append_bars(path, False, pack_price(_PRICE_LIST[:1]))
+    with BarFile(path) as reader:
+        append_bars(path, False, pack_price(_PRICE_LIST[1:]))
+        assert len(reader) == 1 and reader.read_price(0, len(reader)) == _PRICE_LIST[:1]
+
+        with BarFile(path) as bar_file:
+            assert bar_file.read_price(0, len(bar_file)) == _PRICE_LIST
+
+
+def test_invalid_file(tmp_path):
+    """
+    Файл другого формата не читается и не дописывается
+    """
+
+    path = str(tmp_path / 'SBER_8.bars')
+    with open(path, 'wb') as file:
+        file.write(b'EQBR\x02\x00' + bytes(10))
+
+    with pytest.raises(ValueError):
+        BarFile(path)
+    with pytest.raises(ValueError):
+        append_bars(path, False, pack_price(_PRICE_LIST))
+    assert os.path.getsize(path) == 16
+
+    with open(path, 'wb'):
+        pass
+    with pytest.raises(ValueError):
+        BarFile(path)
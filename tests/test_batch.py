@@ -0,0 +1,36 @@
+"""
+Тесты пакетного выполнения команд и конвейеров (см. interface.core.commands.manager)
+"""
+
+import src.interface.core.commands.reference  # noqa: F401 - справочник команд
+from src.interface.core.commands.manager import Manager
+
+
+def test_batch_order_and_errors():
+    """
+    Результаты пакета возвращаются в порядке команд, ошибка команды не прерывает выполнение остальных
+    """
+
+    result = Manager.run_batch(['find газпром', '', '# комментарий', 'unknown', 'find сбер'])
+
+    assert [cmd_line for cmd_line, _ in result] == ['find газпром', 'unknown', 'find сбер']
+    assert result[0][1][0].startswith('GAZP,')
+    assert result[1][1] == ['Ошибка! Команда "unknown" не найдена!']
+    assert result[2][1][0].startswith('SBER,')
+
+
+def test_pipe():
+    """
+    Команда конвейера выполняется для каждого кода из результата предыдущей команды
+    """
+
+    result = Manager.run_batch(['find сбер | find {}'])[0][1]
+
+    assert result == ['SBER:', 'SBER, Сбербанк', 'SBERP, Сбербанк-п', 'SBERP:', 'SBERP, Сбербанк-п']
+
+
+def test_pipe_invalid():
+    """
+    Пустая команда конвейера - ошибка конвейера
+    """
+    assert Manager.run_batch(['find сбер |'])[0][1] == ['Ошибка! Конвейер "find сбер |" задан не верно!']
@@ -0,0 +1,95 @@
+"""
+Тесты кэша результатов команд (см. interface.core.commands.cache, Manager)
+"""
+
+from datetime import date, timedelta
+
+import pytest
+
+import src.interface.core.commands.reference  # noqa: F401 - справочник команд
+from src.interface.core.commands import cache as cache_module
+from src.interface.core.commands.cache import CACHE_FOREVER, CURRENT_TTL, ResultCache, closed_range_ttl
+from src.interface.core.commands.manager import Manager
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """
+    Управляемое время истечения записей кэша
+    """
+
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_ttl_and_lru(clock):
+    """
+    Запись вытесняется по истечении времени жизни либо как давно не использованная
+    """
+
+    cache = ResultCache(2)
+    cache.put('a', ('1',), 10)
+    cache.put('b', ('2',), CACHE_FOREVER)
+    assert cache.get('a') == ('1',)
+
+    cache.put('c', ('3',), CACHE_FOREVER)
+    assert cache.get('b') is None and cache.get('a') == ('1',)
+
+    clock[0] += 11
+    assert cache.get('a') is None and cache.get('c') == ('3',)
+    assert cache.get_stats() == (3, 2, 1)
+
+
+def test_closed_range_ttl():
+    """
+    Результат за закрытые дни кэшируется бессрочно, за отрезок с текущим днем - ограниченное время
+    """
+
+    assert closed_range_ttl(date.today() - timedelta(days=1)) == CACHE_FOREVER
+    assert closed_range_ttl(date.today()) == CURRENT_TTL
+    assert closed_range_ttl(date.today(), 5) == 5
+
+
+def test_cached_result_unchanged(stub, store):
+    """
+    Изменение полученного результата не изменяет результат в кэше
+    """
+
+    Manager.clear_cache()
+    params = ['SBER', '01.02.19', '10.02.19']
+
+    result = Manager.run_cmd('price', params)
+    result.clear()
+    assert len(Manager.run_cmd('price', params)) == 6
+
+    data = Manager.get_data('price', params)
+    assert isinstance(data.items, tuple)
+    assert Manager.get_data('price', params) is data
+    assert stub.request_count == 1
+
+
+def test_key_case_insensitive(stub, store):
+    """
+    Параметры, отличающиеся регистром, используют один результат
+    """
+
+    Manager.clear_cache()
+    first = Manager.run_cmd('price', ['sber', '01.02.19', '10.02.19', '1D'])
+    assert Manager.run_cmd('price', ['SBER', '01.02.19', '10.02.19', '1d']) == first
+    assert Manager.get_data('price', ['Sber', '01.02.19', '10.02.19']).items == \
+        Manager.get_data('price', ['SBER', '01.02.19', '10.02.19']).items
+    assert stub.request_count == 1
+    assert Manager.get_cache_stats().size == 2
+
+
+def test_not_cached(stub):
+    """
+    Результат за отрезок с текущим днем кэшируется ограниченное время, ошибка параметров не кэшируется
+    """
+
+    Manager.clear_cache()
+    today = date.today().strftime('%d.%m.%y')
+    Manager.run_cmd('price', ['SBER', today, today])
+    Manager.run_cmd('price', ['SBER', 'xx.02.19'])
+    assert Manager.get_cache_stats().size == 1
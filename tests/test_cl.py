@@ -0,0 +1,40 @@
+"""
+Тесты интерфейса командной строки (см. interface.cl.app)
+"""
+
+import os
+import socket
+
+import pytest
+
+from src.interface.cl.app import _run_client
+
+
+@pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason='Требуется unix сокет')
+@pytest.mark.parametrize('make_path', [
+    lambda tmp_path: str(tmp_path / 'absent.sock'),
+    lambda tmp_path: _stale_socket(str(tmp_path / 'stale.sock')),
+])
+def test_client_without_daemon(tmp_path, capsys, make_path):
+    """
+    Если демон не запущен (сокет отсутствует либо остался после завершения демона), выводится ошибка без трассировки
+    """
+
+    path = make_path(tmp_path)
+    with pytest.raises(SystemExit) as err:
+        _run_client(path, ['help'])
+
+    assert err.value.code == 1
+    assert capsys.readouterr().out.startswith(f'Ошибка! Демон на сокете "{path}" не доступен')
+
+
+def _stale_socket(path: str) -> str:
+    """
+    Создать сокет, который никто не слушает
+    """
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.bind(path)
+    sock.close()
+    assert os.path.exists(path)
+    return path
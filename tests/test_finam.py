@@ -0,0 +1,72 @@
+"""
+Тесты получения курсов с локальным хранилищем (см. equities.finam)
+"""
+
+from datetime import date, timedelta
+
+from src.equities.finam import get_price, iter_price
+from src.equities.price import Period
+
+
+def test_fetch_only_missing_ranges(stub, store):
+    """
+    У источника запрашиваются только отрезки, отсутствующие в хранилище. Результат совпадает с результатом без
+    хранилища
+    """
+
+    get_price('SBER', date(2019, 1, 1), date(2019, 1, 10))
+    get_price('SBER', date(2019, 1, 21), date(2019, 1, 31))
+    stub.request_list.clear()
+
+    price_list = get_price('SBER', date(2019, 1, 5), date(2019, 2, 5))
+
+    assert stub.request_list == [('SBER', Period.DAY, date(2019, 1, 11), date(2019, 1, 20)),
+                                 ('SBER', Period.DAY, date(2019, 2, 1), date(2019, 2, 5))]
+    assert price_list == list(iter_price('SBER', date(2019, 1, 5), date(2019, 2, 5), use_store=False))
+    assert store.get('SBER', Period.DAY, date(2019, 1, 1), date(2019, 2, 5))[1] == []
+
+
+def test_stored_range_without_request(stub, store):
+    """
+    Курсы за отрезок, полученный ранее, берутся из хранилища без запроса к источнику
+    """
+
+    expected = get_price('SBER', date(2019, 3, 1), date(2019, 3, 31))
+    stub.request_list.clear()
+
+    assert get_price('SBER', date(2019, 3, 4), date(2019, 3, 29)) == \
+        [price for price in expected if date(2019, 3, 4) <= price.dt <= date(2019, 3, 29)]
+    assert stub.request_list == []
+
+
+def test_today_always_fetched(stub, store):
+    """
+    Текущий день всегда запрашивается у источника и не сохраняется в хранилище, закрытые дни - из хранилища
+    """
+
+    today = date.today()
+    dt_left = today - timedelta(days=10)
+
+    get_price('SBER', dt_left, today)
+    stub.request_list.clear()
+    get_price('SBER', dt_left, today)
+
+    assert stub.request_list == [('SBER', Period.DAY, today, today)]
+    assert store.covers('SBER', Period.DAY, dt_left, today - timedelta(days=1))
+    assert not store.covers('SBER', Period.DAY, today, today)
+
+
+def test_intraday_gap(stub, store):
+    """
+    Недостающий отрезок внутридневных курсов запрашивается и объединяется с курсами хранилища по порядку
+    """
+
+    get_price('SBER', date(2019, 1, 9), date(2019, 1, 9), Period.HOUR)
+    stub.request_list.clear()
+
+    price_list = get_price('SBER', date(2019, 1, 8), date(2019, 1, 10), Period.HOUR)
+
+    assert stub.request_list == [('SBER', Period.HOUR, date(2019, 1, 8), date(2019, 1, 8)),
+                                 ('SBER', Period.HOUR, date(2019, 1, 10), date(2019, 1, 10))]
+    assert [price.dt for price in price_list] == sorted(price.dt for price in price_list)
+    assert {price.dt.day for price in price_list} == {8, 9, 10}
@@ -0,0 +1,41 @@
+"""
+Тесты команды поиска эмитентов (см. interface.core.commands.reference.find)
+"""
+
+import src.interface.core.commands.reference  # noqa: F401 - справочник команд
+from src.interface.core.commands.manager import Manager
+
+
+def test_exact_by_default():
+    """
+    По умолчанию выполняется точный поиск, поиск с учетом опечаток - только с префиксом '~'
+    """
+
+    assert Manager.run_cmd('find', ['ГМКНорНик']) == ['GMKN, ГМКНорНик']
+    assert Manager.run_cmd('find', ['ГМКНорНек']) == ['Результат поиска отсутствует!']
+    assert Manager.get_data('find', ['ГМКНорНек']).items == ()
+
+    assert Manager.run_cmd('find', ['~ГМКНорНек']) == ['GMKN, ГМКНорНик']
+    assert Manager.get_data('find', ['~гмкнорнек']).items == ({'code': 'GMKN', 'name': 'ГМКНорНик'},)
+
+    # Точные совпадения не дополняются нечеткими
+    assert Manager.run_cmd('find', ['~ГМКНорНик']) == ['GMKN, ГМКНорНик']
+
+
+def test_invalid_params():
+    """
+    Строка поиска короче 3 символов (без учета префикса) - ошибка параметров
+    """
+
+    assert Manager.run_cmd('find', ['га'])[0].startswith('Ошибка!')
+    assert Manager.run_cmd('find', ['~га'])[0].startswith('Ошибка!')
+    assert Manager.run_cmd('find', ['~'])[0].startswith('Ошибка!')
+
+
+def test_pipe_exact():
+    """
+    Конвейер получает коды только точно найденных эмитентов
+    """
+
+    assert Manager.run_batch(['find ГМКНорНек | find {}'])[0][1] == ['Результат конвейера отсутствует!']
+    assert Manager.run_batch(['find ~ГМКНорНек | find {}'])[0][1] == ['GMKN:', 'GMKN, ГМКНорНик']
@@ -0,0 +1,92 @@
+"""
+Тесты технических индикаторов (см. equities.indicators, команда indicator)
+"""
+
+import numpy as np
+import pytest
+
+import src.interface.core.commands.reference  # noqa: F401 - справочник команд
+from src.equities.indicators import ema, log_returns, max_drawdown, rolling_std, rsi, sma
+from src.interface.core.commands.manager import Manager
+
+
+@pytest.fixture
+def close():
+    """
+    Случайное блуждание цены, достаточно длинное для расчета экспоненциального среднего несколькими блоками
+    """
+    return 100.0 * np.exp(np.cumsum(np.random.default_rng(1).normal(0.0, 0.02, 2000)))
+
+
+def _ewm_loop(values, alpha: float) -> list:
+    """
+    Экспоненциальное среднее по рекуррентной формуле
+    """
+
+    result = [values[0]]
+    for value in values[1:]:
+        result.append(alpha * value + (1.0 - alpha) * result[-1])
+    return result
+
+
+def test_moving_average(close):
+    """
+    Векторные скользящие средние совпадают с расчетом по определению
+    """
+
+    assert sma(close, 10)[9:] == pytest.approx(np.convolve(close, np.ones(10) / 10, mode='valid'))
+    assert np.isnan(sma(close, 10)[:9]).all() and np.isnan(sma(close[:3], 10)).all()
+
+    for span in (1, 3, 20, 200):
+        assert ema(close, span) == pytest.approx(_ewm_loop(close, 2.0 / (span + 1)), rel=1e-9)
+
+
+def test_rsi(close):
+    """
+    RSI совпадает с расчетом по определению (усреднение Уайлдера)
+    """
+
+    period = 14
+    change = np.diff(close)
+    avg_gain = _ewm_loop(np.insert(np.clip(change, 0, None)[period:], 0, np.clip(change, 0, None)[:period].mean()),
+                         1.0 / period)
+    avg_loss = _ewm_loop(np.insert(np.clip(-change, 0, None)[period:], 0, np.clip(-change, 0, None)[:period].mean()),
+                         1.0 / period)
+    expected = [100.0 - 100.0 / (1.0 + gain / loss) for gain, loss in zip(avg_gain, avg_loss)]
+
+    result = rsi(close, period)
+    assert np.isnan(result[:period]).all()
+    assert result[period:] == pytest.approx(expected, rel=1e-9)
+    assert rsi(np.arange(1.0, 20.0), period)[-1] == 100.0
+
+
+def test_volatility_and_drawdown(close):
+    """
+    Скользящее отклонение доходностей и максимальная просадка
+    """
+
+    returns = log_returns(close)
+    result = rolling_std(returns, 20)
+    assert np.isnan(result[:20]).all()
+    assert result[20] == pytest.approx(np.std(returns[1:21], ddof=1))
+
+    drawdown = max_drawdown(close)
+    assert drawdown.peak <= drawdown.trough
+    assert drawdown.value == pytest.approx(close[drawdown.trough] / close[drawdown.peak] - 1.0)
+    assert drawdown.value == pytest.approx(min(close[i] / close[:i + 1].max() - 1.0 for i in range(len(close))))
+
+
+def test_indicator_cmd(stub):
+    """
+    Команда indicator: значения без недостаточной истории, просадка, ошибки параметров
+    """
+
+    Manager.clear_cache()
+    item_list = Manager.get_data('indicator', ['sma', 'SBER', '01.02.19', '28.02.19', '5']).items
+    assert len(item_list) == 20 - 4 and item_list[0]['dt'] == '2019-02-07'
+
+    result = Manager.run_cmd('indicator', ['drawdown', 'SBER', '01.02.19', '28.02.19'])
+    assert len(result) == 1 and result[0].endswith('19')
+
+    assert Manager.run_cmd('indicator', ['rsi', 'SBER', '01.02.19', '28.02.19', '1'])[0].startswith('Ошибка!')
+    assert Manager.run_cmd('indicator', ['sma', 'UNKNOWN', '01.02.19', '28.02.19']) == ['Эмитент не найден!']
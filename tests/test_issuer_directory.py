@@ -0,0 +1,63 @@
+"""
+Тесты справочника эмитентов (см. equities.issuer_directory)
+"""
+
+import os
+
+import pytest
+
+from src.equities import issuer_directory
+from src.equities.finam import _get_issuer_index, get_issuer_list
+from src.equities.issuer_directory import DIRECTORY_ENV, Issuer, get_issuers, write_directory
+
+_ISSUER_LIST = {'SBER': Issuer('Сбербанк', 3, 'moex-akcii/sberbank'),
+                'SBERP': Issuer('Сбербанк-п', 23, 'moex-akcii/sberbank-pref'),
+                'GAZP': Issuer('ГАЗПРОМ ао', 16842, 'moex-akcii/gazprom')}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """
+    Управляемое время проверки замены файла справочника
+    """
+
+    now = [1000.0]
+    monkeypatch.setattr(issuer_directory.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_search_from_file():
+    """
+    Поиск выполняется по индексу файла справочника, без построения индекса в памяти
+    """
+
+    write_directory(os.environ[DIRECTORY_ENV], _ISSUER_LIST)
+
+    assert _get_issuer_index() is get_issuers()
+    assert get_issuer_list(['сбер'], 0) == [('SBER', 'Сбербанк'), ('SBERP', 'Сбербанк-п')]
+    assert get_issuer_list(['sber', 'п'], 0) == [('SBERP', 'Сбербанк-п')]
+    assert get_issuer_list(['газпрм'], 0, fuzzy=True) == [('GAZP', 'ГАЗПРОМ ао')]
+    assert get_issuer_list([], 2) == [('SBER', 'Сбербанк'), ('SBERP', 'Сбербанк-п')]
+
+
+def test_replaced_directory_closed(clock):
+    """
+    Справочник открывается заново при замене файла, прежний справочник закрывается после проверки замены
+    """
+
+    path = os.environ[DIRECTORY_ENV]
+    write_directory(path, _ISSUER_LIST)
+    first = get_issuers()
+    assert 'GAZP' in first
+
+    write_directory(path, {'SBER': _ISSUER_LIST['SBER']})
+    clock[0] += issuer_directory.DIRECTORY_CHECK_SECONDS
+    second = get_issuers()
+    assert second is not first and 'GAZP' not in second
+
+    # Обращения к прежнему справочнику, начатые до замены, завершаются
+    assert first['GAZP'].finam_id == 16842
+
+    clock[0] += issuer_directory.DIRECTORY_CHECK_SECONDS
+    assert get_issuers() is second
+    assert first._mmap.closed and not second._mmap.closed
@@ -0,0 +1,47 @@
+"""
+Тесты менеджера команд: доступность команд в web интерфейсе, объединение одинаковых команд
+(см. interface.core.commands.manager)
+"""
+
+import threading
+
+import pytest
+
+import src.interface.core.commands.reference  # noqa: F401 - справочник команд
+from src.interface.core.commands.manager import Manager, UnavailableCmd, UnknownCmd
+
+
+def test_web_unavailable():
+    """
+    Команды, изменяющие файлы либо общие данные, не выполняются в web интерфейсе, в т.ч. в конвейере
+    """
+
+    with pytest.raises(UnavailableCmd):
+        Manager.check_web('export')
+    with pytest.raises(UnknownCmd):
+        Manager.check_web('unknown')
+    Manager.check_web('price')
+
+    result = Manager.run_batch(['find сбер | export /tmp 01.01.19 02.01.19', 'update', 'issuers refresh'],
+                               web=True)
+    assert all(lines[0].startswith('Ошибка!') and 'командной строки' in lines[0] for _, lines in result)
+
+
+def test_iter_cmd_coalesced(stub, store):
+    """
+    Одновременные одинаковые команды с получением строк по мере формирования выполняются однократно
+    """
+
+    stub.latency = 0.2
+    Manager.clear_cache()
+    result_list = []
+    thread_list = [threading.Thread(target=lambda: result_list.append(
+        list(Manager.iter_cmd('price', ['SBER', '01.02.19', '10.02.19'])))) for _ in range(8)]
+    for thread in thread_list:
+        thread.start()
+    for thread in thread_list:
+        thread.join()
+
+    assert stub.request_count == 1
+    assert len(result_list) == 8 and all(result == result_list[0] for result in result_list)
+    assert len(result_list[0]) == 6
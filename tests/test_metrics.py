@@ -0,0 +1,81 @@
+"""
+Тесты метрик выполнения команд и запросов к finam.ru (см. metrics, команда stats)
+"""
+
+import src.equities.finam  # noqa: F401 - метрики запросов к finam.ru
+import src.interface.core.commands.reference  # noqa: F401 - справочник команд
+from src.interface.core.commands.manager import CMD_ERRORS, CMD_SECONDS, Manager
+from src.metrics import REGISTRY, Counter, Gauge, Histogram, Registry
+
+
+def test_render():
+    """
+    Метрики выводятся в текстовом формате Prometheus: интервалы гистограммы накопительные, граница интервала
+    включается в интервал
+    """
+
+    registry = Registry()
+    histogram = registry.add(Histogram('latency_seconds', 'Длительность', ('cmd',), buckets=(0.1, 1.0)))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, cmd='find')
+    counter = registry.add(Counter('errors_total', 'Ошибки'))
+    counter.inc()
+    counter.inc(2)
+    registry.add(Gauge('size', 'Размер', lambda: 1.5))
+
+    assert registry.add(Counter('errors_total', 'Другое описание')) is counter
+    assert registry.render().splitlines() == [
+        '# HELP errors_total Ошибки',
+        '# TYPE errors_total counter',
+        'errors_total 3',
+        '# HELP latency_seconds Длительность',
+        '# TYPE latency_seconds histogram',
+        'latency_seconds_bucket{cmd="find",le="0.1"} 2',
+        'latency_seconds_bucket{cmd="find",le="1"} 3',
+        'latency_seconds_bucket{cmd="find",le="+Inf"} 4',
+        'latency_seconds_count{cmd="find"} 4',
+        'latency_seconds_sum{cmd="find"} 3.65',
+        '# HELP size Размер',
+        '# TYPE size gauge',
+        'size 1.5']
+
+    assert histogram.quantile(0.5, cmd='find') == 0.1
+    assert histogram.quantile(0.75, cmd='find') == 1.0
+    assert histogram.quantile(1.0, cmd='find') == float('inf')
+    assert histogram.quantile(0.5, cmd='price') == 0.0
+
+
+def test_cmd_metrics(stub):
+    """
+    Выполнение команд, ошибки параметров и запросы к finam.ru учитываются в метриках и выводятся командой stats
+    """
+
+    Manager.clear_cache()
+    count = dict(CMD_SECONDS.items()).get(('price',), (None, 0))[1]
+    error_count = CMD_ERRORS.get(cmd='price', error='InvalidCmdParams')
+    rows = REGISTRY.get('finam_fetch_rows_total').get(period='DAY')
+
+    assert len(Manager.run_cmd('price', ['SBER', '01.02.19', '10.02.19'])) == 6
+    Manager.run_cmd('price', ['SBER', 'xx.02.19'])
+
+    assert dict(CMD_SECONDS.items())[('price',)][1] == count + 2
+    assert CMD_ERRORS.get(cmd='price', error='InvalidCmdParams') == error_count + 1
+    assert REGISTRY.get('finam_fetch_rows_total').get(period='DAY') == rows + 6
+
+    result = Manager.run_cmd('stats', [])
+    assert result[0] == 'Команды:'
+    assert any(line.startswith('- price: кол-во ') for line in result)
+    assert any(line.startswith('Кэш результатов: ') for line in result)
+    assert any(line.startswith('- DAY: запросов ') for line in result)
+
+
+def test_metrics_route(stub):
+    """
+    Метрики доступны в web интерфейсе
+    """
+
+    from src.interface.webserver.app import app
+
+    response = app.test_client().get('/metrics')
+    assert response.status_code == 200 and response.mimetype == 'text/plain'
+    assert '# TYPE cmd_seconds histogram' in response.get_data(as_text=True)
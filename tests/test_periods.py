@@ -0,0 +1,81 @@
+"""
+Тесты получения курсов разной детализации и разбиения длинных отрезков на части (см. equities.finam)
+"""
+
+from datetime import date, datetime, timedelta
+
+import pytest
+
+import src.interface.core.commands.reference  # noqa: F401 - справочник команд
+from src.equities import finam
+from src.equities.finam import iter_price
+from src.equities.price import PERIOD_BY_NAME, Period
+from src.interface.core.commands.manager import Manager
+
+
+@pytest.mark.parametrize('period', list(Period))
+def test_period(stub, period):
+    """
+    Курсы любой детализации упорядочены по времени и не выходят за границы отрезка, внутридневные - с временем
+    """
+
+    dt_left, dt_right = date(2019, 2, 1), date(2019, 2, 28)
+    if period == Period.TICK:
+        dt_right = dt_left
+
+    price_list = list(iter_price('SBER', dt_left, dt_right, period))
+    assert price_list and stub.request_list == [('SBER', period, dt_left, dt_right)]
+
+    dt_list = [price.dt for price in price_list]
+    assert dt_list == sorted(dt_list)
+    assert all(isinstance(dt, datetime) == (period < Period.DAY) for dt in dt_list)
+    assert all(dt_left <= (dt.date() if isinstance(dt, datetime) else dt) <= dt_right for dt in dt_list)
+    assert all(price.low <= min(price.open, price.close) <= max(price.open, price.close) <= price.high
+               for price in price_list)
+
+
+def test_chunks(stub):
+    """
+    Отрезок длиннее допустимого для детализации запрашивается частями, курсы возвращаются по порядку
+    """
+
+    dt_left, dt_right = date(2019, 1, 1), date(2019, 3, 15)
+    price_list = list(iter_price('SBER', dt_left, dt_right, Period.MIN1, use_store=False))
+
+    chunk_days = finam._CHUNK_DAYS[Period.MIN1]
+    assert sorted(stub.request_list) == [
+        ('SBER', Period.MIN1, date(2019, 1, 1), date(2019, 1, 31)),
+        ('SBER', Period.MIN1, date(2019, 2, 1), date(2019, 2, 1) + timedelta(days=chunk_days - 1)),
+        ('SBER', Period.MIN1, date(2019, 3, 4), date(2019, 3, 15))]
+
+    dt_list = [price.dt for price in price_list]
+    assert dt_list == sorted(set(dt_list))
+    assert len(price_list) == len(stub.make_lines(Period.MIN1, 'SBER', datetime(2019, 1, 1), datetime(2019, 3, 15)))
+
+
+def test_chunks_ordered_with_slow_chunks(stub, monkeypatch):
+    """
+    Части отрезка запрашиваются параллельно, но возвращаются в порядке дат
+    """
+
+    monkeypatch.setattr(finam, '_CHUNK_DAYS', {**finam._CHUNK_DAYS, Period.HOUR: 3})
+    stub.latency = 0.05
+
+    price_list = list(iter_price('SBER', date(2019, 1, 1), date(2019, 1, 31), Period.HOUR, use_store=False))
+    assert len(stub.request_list) == 11
+    assert [price.dt for price in price_list] == sorted(price.dt for price in price_list)
+    assert {price.dt.day for price in price_list} == {day for day in range(1, 32) if date(2019, 1, day).weekday() < 5}
+
+
+def test_price_cmd_period(stub):
+    """
+    Команда price принимает детализацию по краткому названию, внутридневные курсы выводятся с временем
+    """
+
+    Manager.clear_cache()
+    assert set(PERIOD_BY_NAME.values()) == set(Period)
+
+    result = Manager.run_cmd('price', ['SBER', '04.02.19', '04.02.19', '1H'])
+    assert len(result) == 9 and result[0].startswith('04.02.19 10:00:00 ')
+    assert Manager.run_cmd('price', ['SBER', '04.02.19', '04.02.19', '7m'])[0].startswith('04.02.19 ')
+    assert Manager.run_cmd('price', ['SBER', '04.02.19', '04.02.19', '1y'])[0].startswith('Ошибка!')
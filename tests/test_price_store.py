@@ -0,0 +1,191 @@
+"""
+Тесты локального хранилища курсов (см. equities.price_store)
+"""
+
+import multiprocessing
+import os
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+
+from src.equities.price import Period, Price
+from src.equities.price_store import PriceStore
+
+_DAY = date(2019, 1, 1)
+
+
+def _price(dt: date) -> Price:
+    return Price(dt, Decimal(dt.day), Decimal(dt.month), Decimal(dt.day + 1), Decimal(dt.day - 1), dt.toordinal())
+
+
+def _put_days(root: str, first: int, count: int, step: int, queue):
+    """
+    Добавить курсы за дни first, first + step, ... отдельными вызовами put (выполняется в отдельном процессе)
+    """
+
+    store = PriceStore(root)
+    error_count = 0
+    for i in range(count):
+        dt = _DAY + timedelta(days=first + i * step)
+        try:
+            store.put('SBER', Period.DAY, dt, dt, [_price(dt)])
+        except Exception:
+            error_count += 1
+    queue.put(error_count)
+
+
+def _days(first: int, last: int) -> list:
+    return [_price(_DAY + timedelta(days=i)) for i in range(first, last + 1)]
+
+
+def test_partial_coverage(tmp_path):
+    """
+    Курсы возвращаются за полученные отрезки, отсутствующие отрезки возвращаются перечнем
+    """
+
+    store = PriceStore(str(tmp_path))
+    store.put('SBER', Period.DAY, _DAY, _DAY + timedelta(days=4), _days(0, 4))
+    store.put('SBER', Period.DAY, _DAY + timedelta(days=10), _DAY + timedelta(days=14), _days(10, 14))
+
+    price_list, missing_range_list = store.get('SBER', Period.DAY, _DAY + timedelta(days=2),
+                                               _DAY + timedelta(days=20))
+
+    assert price_list == _days(2, 4) + _days(10, 14)
+    assert missing_range_list == [(_DAY + timedelta(days=5), _DAY + timedelta(days=9)),
+                                  (_DAY + timedelta(days=15), _DAY + timedelta(days=20))]
+    assert store.get_bars('SBER', Period.DAY, _DAY, _DAY + timedelta(days=5)) is None
+
+
+def test_gap_merge(tmp_path):
+    """
+    Курсы за промежуток между полученными отрезками вставляются по порядку, отрезки объединяются
+    """
+
+    store = PriceStore(str(tmp_path))
+    store.put('SBER', Period.DAY, _DAY + timedelta(days=10), _DAY + timedelta(days=14), _days(10, 14))
+    store.put('SBER', Period.DAY, _DAY, _DAY + timedelta(days=4), _days(0, 4))
+    store.put('SBER', Period.DAY, _DAY + timedelta(days=5), _DAY + timedelta(days=9), _days(5, 9))
+
+    assert store.get('SBER', Period.DAY, _DAY, _DAY + timedelta(days=14)) == (_days(0, 14), [])
+    assert (tmp_path / 'SBER_8.cov').read_text() == '2019-01-01;2019-01-15\n'
+
+
+def test_overlapping_put(tmp_path):
+    """
+    Курсы пересекающегося отрезка заменяют имеющиеся курсы за отрезок без дублирования
+    """
+
+    store = PriceStore(str(tmp_path))
+    store.put('SBER', Period.DAY, _DAY, _DAY + timedelta(days=9), _days(0, 9))
+
+    replaced = [price._replace(close=Decimal(100)) for price in _days(5, 12)]
+    store.put('SBER', Period.DAY, _DAY + timedelta(days=5), _DAY + timedelta(days=12), replaced)
+
+    # Курс за день 7 больше не существует у источника
+    store.put('SBER', Period.DAY, _DAY + timedelta(days=7), _DAY + timedelta(days=7), [])
+
+    price_list, missing_range_list = store.get('SBER', Period.DAY, _DAY, _DAY + timedelta(days=12))
+    assert price_list == _days(0, 4) + replaced[:2] + replaced[3:]
+    assert missing_range_list == []
+
+
+def test_truncated_last_record(tmp_path):
+    """
+    Неполная последняя запись (прерванное дописывание) не читается и отбрасывается при следующем дописывании
+    """
+
+    from src.equities.bar_file import _HEADER, RECORD, BarFile
+
+    store = PriceStore(str(tmp_path))
+    store.put('SBER', Period.DAY, _DAY, _DAY + timedelta(days=2), _days(0, 2))
+
+    path = tmp_path / 'SBER_8.bars'
+    with open(path, 'ab') as file:
+        file.write(b'\0' * (RECORD.size // 2))
+
+    with BarFile(str(path)) as bar_file:
+        assert len(bar_file) == 3
+    assert store.get('SBER', Period.DAY, _DAY, _DAY + timedelta(days=2)) == (_days(0, 2), [])
+
+    store.append('SBER', Period.DAY, _DAY + timedelta(days=3), _DAY + timedelta(days=5), _days(3, 5))
+
+    assert store.get('SBER', Period.DAY, _DAY, _DAY + timedelta(days=5)) == (_days(0, 5), [])
+    assert os.path.getsize(path) == _HEADER.size + 6 * RECORD.size
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='Требуется fork')
+def test_put_concurrent_processes(tmp_path):
+    """
+    Одновременное добавление курсов несколькими процессами не теряет курсы и отрезки
+    """
+
+    context = multiprocessing.get_context('fork')
+    queue = context.Queue()
+    process_list = [context.Process(target=_put_days, args=(str(tmp_path), first, 200, 2, queue))
+                    for first in (0, 1)]
+    for process in process_list:
+        process.start()
+    for process in process_list:
+        process.join(60)
+
+    assert [queue.get(timeout=1) for _ in process_list] == [0, 0]
+
+    store = PriceStore(str(tmp_path))
+    dt_right = _DAY + timedelta(days=399)
+    price_list, missing_range_list = store.get('SBER', Period.DAY, _DAY, dt_right)
+    assert missing_range_list == []
+    assert price_list == [_price(_DAY + timedelta(days=i)) for i in range(400)]
+    assert sorted(os.listdir(tmp_path)) == ['SBER_8.bars', 'SBER_8.cov', 'SBER_8.lock']
+
+
+def test_append_keeps_open_file(tmp_path):
+    """
+    Дописывание курсов и отбрасывание остатка прерванной записи не изменяют файл, открытый для чтения
+    """
+
+    from src.equities.bar_file import BarFile, append_bars, pack_price
+
+    store = PriceStore(str(tmp_path))
+    store.put('SBER', Period.DAY, _DAY, _DAY + timedelta(days=1), [_price(_DAY), _price(_DAY + timedelta(days=1))])
+
+    # Остаток прерванной записи: курс записан, отрезок не сохранен
+    path = str(tmp_path / 'SBER_8.bars')
+    append_bars(path, False, pack_price([_price(_DAY + timedelta(days=2))]))
+
+    with BarFile(path) as bar_file:
+        store.append('SBER', Period.DAY, _DAY + timedelta(days=3), _DAY + timedelta(days=3),
+                     [_price(_DAY + timedelta(days=3))])
+        assert [price.dt.day for price in bar_file.read_price(0, len(bar_file))] == [1, 2, 3]
+
+    price_list, missing_range_list = store.get('SBER', Period.DAY, _DAY, _DAY + timedelta(days=3))
+    assert [price.dt.day for price in price_list] == [1, 2, 4]
+    assert missing_range_list == [(_DAY + timedelta(days=2), _DAY + timedelta(days=2))]
+
+
+def test_disabled_by_default():
+    """
+    Хранилище по умолчанию отключено, его включают точки входа приложения
+    """
+
+    import subprocess
+    import sys
+
+    code = 'from src.equities.price_store import get_price_store; print(get_price_store())'
+    assert subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout == 'None\n'
+
+
+def test_enable(tmp_path, monkeypatch):
+    """
+    Каталог хранилища задается параметром либо переменной окружения
+    """
+
+    from src.equities.price_store import STORE_DIR_ENV, enable_price_store, get_price_store
+
+    monkeypatch.setenv(STORE_DIR_ENV, str(tmp_path / 'env'))
+    enable_price_store().put('SBER', Period.DAY, _DAY, _DAY, [_price(_DAY)])
+    assert get_price_store().covers('SBER', Period.DAY, _DAY, _DAY)
+    assert os.listdir(tmp_path / 'env')
+
+    enable_price_store(str(tmp_path / 'param')).put('SBER', Period.DAY, _DAY, _DAY, [_price(_DAY)])
+    assert os.listdir(tmp_path / 'param')
@@ -0,0 +1,78 @@
+"""
+Тесты построения курсов крупной детализации (см. equities.resample)
+"""
+
+from datetime import date, datetime, time
+from decimal import Decimal
+
+import pytest
+
+from src.equities.finam import iter_price
+from src.equities.price import Period, Price
+from src.equities.resample import get_timeframe, iter_price_by_name, month_start, resample, week_start
+
+
+def test_resample():
+    """
+    Свеча объединяет подряд идущие курсы одного интервала, курс без максимума и минимума учитывается по ценам
+    открытия и закрытия, отсутствующий объем не учитывается
+    """
+
+    price_list = [Price(date(2019, 1, 31), Decimal(10), Decimal(12), Decimal(13), Decimal(9), 100),
+                  Price(date(2019, 2, 1), Decimal(12), Decimal(15), volume=None),
+                  Price(date(2019, 2, 4), Decimal(15), Decimal(8), Decimal(16), Decimal(7), 50)]
+
+    assert list(resample(price_list, month_start)) == [
+        Price(date(2019, 1, 1), Decimal(10), Decimal(12), Decimal(13), Decimal(9), 100),
+        Price(date(2019, 2, 1), Decimal(12), Decimal(8), Decimal(16), Decimal(7), 50)]
+    assert [price.dt for price in resample(price_list, week_start)] == [date(2019, 1, 28), date(2019, 2, 4)]
+    assert list(resample([], week_start)) == []
+
+
+def test_whole_first_period(stub):
+    """
+    Первая свеча квартала строится по дням с начала квартала, а не с даты начала отрезка
+    """
+
+    result = list(iter_price_by_name('SBER', date(2019, 2, 15), date(2019, 3, 31), '1q'))
+    assert stub.request_list == [('SBER', Period.DAY, date(2019, 1, 1), date(2019, 3, 31))]
+
+    day_list = list(iter_price('SBER', date(2019, 1, 1), date(2019, 3, 31), Period.DAY))
+    assert result == list(resample(day_list, lambda _: date(2019, 1, 1)))
+    assert result[0].volume == sum(price.volume for price in day_list)
+
+
+def test_week_from_store(stub, store):
+    """
+    Недельные курсы строятся из дневных курсов хранилища с начала недели, без запросов к finam.ru
+    """
+
+    day_list = list(iter_price_by_name('SBER', date(2019, 2, 4), date(2019, 2, 28), '1d'))
+    request_count = stub.request_count
+
+    result = list(iter_price_by_name('SBER', date(2019, 2, 6), date(2019, 2, 28), '1w'))
+    assert stub.request_count == request_count
+    assert [price.dt for price in result] == [date(2019, 2, 4), date(2019, 2, 11), date(2019, 2, 18),
+                                              date(2019, 2, 25)]
+    assert result[0].open == day_list[0].open and result[0].volume == sum(price.volume for price in day_list[:5])
+
+    # Дневных курсов с начала недели нет в хранилище - недельные курсы запрашиваются у finam.ru
+    list(iter_price_by_name('SBER', date(2019, 1, 31), date(2019, 2, 28), '1w'))
+    assert stub.request_list[-1][1] == Period.WEEK
+
+
+def test_minutes(stub):
+    """
+    Свечи N минут строятся из наиболее крупной детализации finam.ru, кратной N, интервалы отсчитываются от
+    начала суток
+    """
+
+    assert get_timeframe('45m').period == Period.MIN15 and get_timeframe('2h').period == Period.HOUR
+    assert get_timeframe('0m') is None and get_timeframe('25h') is None and get_timeframe('1x') is None
+
+    result = list(iter_price_by_name('SBER', date(2019, 2, 4), date(2019, 2, 4), '45m'))
+    bar_list = list(iter_price('SBER', date(2019, 2, 4), date(2019, 2, 4), Period.MIN15))
+    assert result[0].dt == datetime.combine(date(2019, 2, 4), time(9, 45))
+    assert all(price.dt.minute % 15 == 0 for price in result)
+    assert sum(price.volume for price in result) == sum(price.volume for price in bar_list)
+    assert len(result) == pytest.approx(len(bar_list) / 3, abs=1)
@@ -0,0 +1,135 @@
+"""
+Тесты механизмов устойчивости запросов (см. equities.resilience, equities.transport)
+"""
+
+import threading
+from datetime import date
+
+import pytest
+
+from src.equities import resilience
+from src.equities.finam import get_price, iter_price
+from src.equities.resilience import CircuitBreaker, CircuitOpen
+from src.equities.transport import TransportError, set_transport
+
+
+@pytest.fixture
+def no_sleep(monkeypatch):
+    """
+    Повторы запросов без задержки
+    """
+    monkeypatch.setattr(resilience.time, 'sleep', lambda _: None)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """
+    Управляемое время предохранителя
+    """
+
+    now = [1000.0]
+    monkeypatch.setattr(resilience.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_retry_server_error(stub, no_sleep):
+    """
+    Запрос повторяется после ошибок сервера и возвращает результат
+    """
+
+    set_transport(stub.transport(retry_attempts=3, breaker=CircuitBreaker()))
+    stub.fail_count = 2
+
+    price_list = list(iter_price('SBER', date(2019, 1, 9), date(2019, 1, 10), use_store=False))
+
+    assert len(price_list) == 2
+    assert stub.request_count == 3
+
+
+def test_retry_exhausted(stub, no_sleep):
+    """
+    После исчерпания попыток возвращается ошибка последней попытки
+    """
+
+    set_transport(stub.transport(retry_attempts=2, breaker=CircuitBreaker()))
+    stub.fail_count = 2
+
+    with pytest.raises(TransportError) as err:
+        list(iter_price('SBER', date(2019, 1, 9), date(2019, 1, 10), use_store=False))
+    assert err.value.status == 503
+    assert stub.request_count == 2
+
+
+def test_breaker_transitions(stub, clock):
+    """
+    Предохранитель размыкается после серии ошибок, по истечении времени пропускает один пробный запрос и
+    замыкается при его успехе либо снова размыкается при ошибке
+    """
+
+    set_transport(stub.transport(retry_attempts=1, breaker=CircuitBreaker(failure_max=2, reset_timeout=30)))
+
+    def fetch():
+        return list(iter_price('SBER', date(2019, 1, 9), date(2019, 1, 9), use_store=False))
+
+    # Замкнут: ошибки пропускаются до failure_max
+    stub.fail_count = 3
+    for _ in range(2):
+        with pytest.raises(TransportError):
+            fetch()
+
+    # Разомкнут: запросы к источнику не выполняются
+    with pytest.raises(CircuitOpen):
+        fetch()
+    assert stub.request_count == 2
+
+    # Пробный запрос с ошибкой снова размыкает предохранитель
+    clock[0] += 30
+    with pytest.raises(TransportError):
+        fetch()
+    with pytest.raises(CircuitOpen):
+        fetch()
+    assert stub.request_count == 3
+
+    # Успешный пробный запрос замыкает предохранитель
+    clock[0] += 30
+    assert len(fetch()) == 1
+    assert len(fetch()) == 1
+    assert stub.request_count == 5
+
+
+def test_breaker_single_probe(clock):
+    """
+    Пока выполняется пробный запрос, остальные запросы не пропускаются
+    """
+
+    breaker = CircuitBreaker(failure_max=1, reset_timeout=30)
+    with pytest.raises(ZeroDivisionError):
+        breaker.call(lambda: 1 / 0)
+    clock[0] += 30
+
+    def probe():
+        with pytest.raises(CircuitOpen):
+            breaker.call(lambda: 1)
+        return 2
+
+    assert breaker.call(probe) == 2
+    assert breaker.call(lambda: 3) == 3
+
+
+def test_single_flight_coalesces(stub, store):
+    """
+    Одновременные одинаковые запросы курсов выполняют один запрос к источнику
+    """
+
+    stub.latency = 0.2
+    result_list = []
+    thread_list = [threading.Thread(target=lambda: result_list.append(
+        get_price('SBER', date(2019, 1, 1), date(2019, 1, 31)))) for _ in range(8)]
+    for thread in thread_list:
+        thread.start()
+    for thread in thread_list:
+        thread.join()
+
+    assert stub.request_count == 1
+    assert len(result_list) == 8 and all(result == result_list[0] for result in result_list)
+
@@ -0,0 +1,99 @@
+"""
+Тесты сравнения эмитентов: ранжирование, корреляции доходностей (см. equities.screener, команды screen и corr)
+"""
+
+from datetime import date
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+import src.interface.core.commands.reference  # noqa: F401 - справочник команд
+from src.equities.indicators import log_returns
+from src.equities.price import Price
+from src.equities.screener import align, correlation, get_metric, rank
+from src.equities.series import PriceSeries
+from src.interface.core.commands.cmd import InvalidCmdParams
+from src.interface.core.commands.manager import Manager
+
+
+def _series(close_by_day: dict) -> PriceSeries:
+    """
+    Ряд курсов января 2019 по ценам закрытия {День: Цена}, объем равен дню
+    """
+    return PriceSeries.from_price_list([Price(date(2019, 1, day), Decimal(close), Decimal(close), volume=day)
+                                        for day, close in close_by_day.items()])
+
+
+@pytest.fixture
+def aligned():
+    """
+    Ряды разной длины: у C нет курса 9 января, у D - один курс
+    """
+    return align({'A': _series({8: 1, 9: 2, 10: 8}), 'B': _series({8: 8, 9: 4, 10: 1}),
+                  'C': _series({8: 10, 10: 11}), 'D': _series({10: 5})})
+
+
+def test_rank(aligned):
+    """
+    Доходность считается от первого до последнего курса эмитента, эмитенты без значения показателя не включаются
+    """
+
+    assert rank(aligned, 'return') == [('A', 7.0), ('C', pytest.approx(0.1)), ('D', 0.0), ('B', -0.875)]
+    assert [code for code, _ in rank(aligned, 'return', ascending=True)] == ['B', 'D', 'C', 'A']
+    assert rank(aligned, 'volume') == [('A', 27.0), ('B', 27.0), ('C', 18.0), ('D', 10.0)]
+
+    # Для волатильности нужны две доходности соседних дат
+    assert sorted(code for code, _ in rank(aligned, 'volatility')) == ['A', 'B']
+    assert get_metric(aligned, 'volatility')[0] == pytest.approx(np.std(np.log([2., 4.]), ddof=1))
+
+    with pytest.raises(ValueError):
+        get_metric(aligned, 'unknown')
+
+
+def test_correlation(aligned):
+    """
+    Корреляция пары считается по датам, где заданы доходности обоих эмитентов
+    """
+
+    returns = log_returns(aligned.close)
+    assert np.isnan(returns[0]).all() and np.isnan(returns[1:, 2]).all()
+
+    matrix = correlation(returns)
+    assert matrix[0, 1] == pytest.approx(-1.0) and matrix[1, 0] == pytest.approx(-1.0)
+    assert np.isnan(matrix[0, 2]) and np.isnan(matrix[3, 3])
+    assert (matrix == matrix.T)[~np.isnan(matrix)].all()
+
+
+def test_screen_cmd(stub):
+    """
+    Команда screen: ранжирование выбранных эмитентов за отрезок
+    """
+
+    Manager.clear_cache()
+    result = Manager.run_cmd('screen', ['-return', '01.02.19', '28.02.19', '1', 'sber', 'GAZP'])
+    assert len(result) == 1 and result[0].startswith('1. ') and result[0].endswith('%')
+
+    item_list = Manager.get_data('screen', ['volume', '01.02.19', '28.02.19', '5', 'SBER', 'GAZP']).items
+    assert {item['code'] for item in item_list} == {'SBER', 'GAZP'}
+    assert item_list[0]['value'] >= item_list[1]['value']
+
+    assert Manager.run_cmd('screen', ['unknown', '01.02.19', '28.02.19'])[0].startswith('Ошибка!')
+    with pytest.raises(InvalidCmdParams):
+        Manager.get_data('screen', ['volume', '01.02.19', '28.02.19', '0'])
+
+
+def test_corr_cmd(stub):
+    """
+    Команда corr: матрица корреляций доходностей выбранных эмитентов
+    """
+
+    Manager.clear_cache()
+    result = Manager.run_cmd('corr', ['01.02.19', '28.02.19', 'SBER', 'GAZP'])
+    assert result[0] == '- SBER GAZP'
+    assert result[1].startswith('SBER 1.00 ') and result[2].endswith(' 1.00')
+
+    item_list = Manager.get_data('corr', ['01.02.19', '28.02.19', 'SBER', 'GAZP']).items
+    assert item_list[0]['corr']['GAZP'] == pytest.approx(item_list[1]['corr']['SBER'])
+
+    assert Manager.run_cmd('corr', ['01.02.19', '28.02.19', 'SBER'])[0].startswith('Ошибка!')
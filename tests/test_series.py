@@ -0,0 +1,82 @@
+"""
+Тесты колоночного ряда курсов (см. equities.series)
+"""
+
+from datetime import date, datetime
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from src.equities.finam import NotFoundIssuer, iter_price
+from src.equities.price import Period, Price
+from src.equities.series import PriceSeries, get_price_series, get_price_series_many
+
+_PRICE_LIST = [Price(date(2019, 1, 3), Decimal('186.55'), Decimal('188.2'), Decimal('190.01'), Decimal('185'), 1000),
+               Price(date(2019, 1, 4), Decimal('188.2'), Decimal('190'), volume=0),
+               Price(date(2019, 1, 9), Decimal('0.0012'), Decimal('191.5'), Decimal('192'), Decimal('0.001'))]
+
+
+def test_round_trip():
+    """
+    Курсы, в т.ч. без максимума, минимума и объема, восстанавливаются из ряда без потери точности
+    """
+
+    series = PriceSeries.from_price_list(_PRICE_LIST)
+    assert len(series) == 3 and series.dt.dtype == np.dtype('datetime64[D]')
+    assert series.to_price_list() == _PRICE_LIST
+    assert series.volume.tolist() == [1000, 0, -1]
+
+    intraday = [Price(datetime(2019, 1, 3, 10, 0), Decimal(1), Decimal(2)),
+                Price(datetime(2019, 1, 3, 10, 5), Decimal(2), Decimal(3))]
+    series = PriceSeries.from_price_list(intraday)
+    assert series.dt.dtype == np.dtype('datetime64[s]') and series.to_price_list() == intraday
+
+    assert len(PriceSeries.from_price_list([])) == 0 and repr(PriceSeries.from_price_list([])) == 'PriceSeries([])'
+
+
+def test_slice():
+    """
+    Срез по датам включает границы и не копирует колонки
+    """
+
+    series = PriceSeries.from_price_list(_PRICE_LIST)
+    result = series.slice(date(2019, 1, 4), date(2019, 1, 9))
+    assert result.to_price_list() == _PRICE_LIST[1:]
+    assert np.shares_memory(result.close, series.close)
+    assert len(series.slice(date(2019, 1, 5), date(2019, 1, 8))) == 0
+    assert series[-1] == _PRICE_LIST[-1]
+
+
+def test_invalid_columns():
+    """
+    Колонки разной длины - ошибка
+    """
+
+    with pytest.raises(ValueError):
+        PriceSeries(np.array(['2019-01-03'], dtype='datetime64[D]'), np.array([1.0]), np.array([1.0, 2.0]))
+
+
+def test_from_store(stub, store):
+    """
+    Ряд за прошедшие дни читается из хранилища так же, как из курсов finam.ru
+    """
+
+    expected = PriceSeries.from_price_list(iter_price('SBER', date(2019, 2, 1), date(2019, 2, 28)))
+    request_count = stub.request_count
+
+    result = get_price_series('SBER', date(2019, 2, 1), date(2019, 2, 28))
+    assert stub.request_count == request_count
+    assert result.to_price_list() == expected.to_price_list()
+    assert result.slice(date(2019, 2, 4), date(2019, 2, 4)).close.tolist() == [expected.close[1]]
+
+
+def test_many(stub):
+    """
+    Ошибка получения ряда одного эмитента не прерывает получение остальных, порядок - порядок кодов
+    """
+
+    result = get_price_series_many(['GAZP', 'UNKNOWN', 'SBER'], date(2019, 2, 1), date(2019, 2, 8))
+    assert list(result) == ['GAZP', 'UNKNOWN', 'SBER']
+    assert isinstance(result['UNKNOWN'], NotFoundIssuer)
+    assert len(result['GAZP']) == len(result['SBER']) == 6
@@ -0,0 +1,70 @@
+"""
+Тесты производственного режима веб сервера (см. interface.webserver.server)
+"""
+
+import http.client
+import socket
+import threading
+import time
+
+import pytest
+
+from src.interface.webserver.server import _PooledWSGIServer
+
+
+def _app(environ, start_response):
+    if environ['PATH_INFO'] == '/slow':
+        time.sleep(0.5)
+    start_response('200 OK', [('Content-Type', 'text/plain')])
+    return [b'ok']
+
+
+@pytest.fixture
+def port():
+    """
+    Два процесса сервера (в потоках) с одним потоком каждый, принимающие соединения с общего сокета
+    """
+
+    sock = socket.create_server(('127.0.0.1', 0))
+    server_list = [_PooledWSGIServer(_app, 1, sock.fileno()) for _ in range(2)]
+    for server in server_list:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield sock.getsockname()[1]
+    for server in server_list:
+        server.shutdown()
+        server.close()
+    sock.close()
+
+
+def _get(port: int, path: str) -> http.client.HTTPResponse:
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+    conn.request('GET', path, headers={'Connection': 'keep-alive'})
+    return conn.getresponse()
+
+
+def test_connection_closed_after_response(port):
+    """
+    Соединение закрывается после ответа и не занимает поток в ожидании следующего запроса
+    """
+
+    for _ in range(3):
+        response = _get(port, '/')
+        assert response.read() == b'ok'
+        assert response.getheader('Connection') == 'close'
+
+
+def test_busy_server_does_not_accept(port):
+    """
+    Сервер, все потоки которого заняты, не принимает соединения: их принимает свободный сервер
+    """
+
+    slow = threading.Thread(target=lambda: _get(port, '/slow').read())
+    slow.start()
+    time.sleep(0.1)
+
+    started = time.monotonic()
+    for _ in range(5):
+        assert _get(port, '/').read() == b'ok'
+    assert time.monotonic() - started < 0.3
+
+    slow.join()
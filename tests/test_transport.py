@@ -0,0 +1,44 @@
+"""
+Тесты пула соединений транспорта (см. equities.transport)
+"""
+
+import threading
+from datetime import date
+
+from src.equities.finam import iter_price
+from src.equities.resilience import CircuitBreaker
+from src.equities.transport import set_transport
+
+
+def test_connection_reused(stub):
+    """
+    Соединение возвращается в пул после чтения ответа и используется повторно
+    """
+
+    transport = stub.transport(breaker=CircuitBreaker())
+    set_transport(transport)
+
+    for _ in range(3):
+        assert len(list(iter_price('SBER', date(2019, 1, 9), date(2019, 1, 10), use_store=False))) == 2
+        assert transport._idle.qsize() == 1
+
+
+def test_slow_consumer_releases_connection(stub):
+    """
+    Потребитель, не дочитавший курсы, не занимает соединение пула: запросы других потребителей выполняются
+    """
+
+    set_transport(stub.transport(pool_size=1, breaker=CircuitBreaker()))
+
+    slow = iter_price('SBER', date(2019, 1, 1), date(2019, 1, 31), use_store=False)
+    assert next(slow).dt == date(2019, 1, 1)
+
+    result_list = []
+    thread = threading.Thread(target=lambda: result_list.append(
+        list(iter_price('GAZP', date(2019, 1, 9), date(2019, 1, 10), use_store=False))), daemon=True)
+    thread.start()
+    thread.join(5)
+
+    assert not thread.is_alive()
+    assert len(result_list[0]) == 2
+    assert len(list(slow)) == 22
@@ -0,0 +1,75 @@
+"""
+Тесты обновления хранилища курсов (см. equities.updater)
+"""
+
+from datetime import date, timedelta
+
+import pytest
+
+from src.equities.finam import NotFoundIssuer, get_price
+from src.equities.price import Period
+from src.equities.updater import Update, UpdateError, main, update_price
+
+
+def test_incremental(stub, store):
+    """
+    Запрашиваются только курсы после последнего полученного отрезка по последний закрытый день
+    """
+
+    yesterday = date.today() - timedelta(days=1)
+    get_price('SBER', date(2019, 2, 1), date(2019, 2, 10))
+    stub.request_list.clear()
+
+    result = update_price(['sber', 'GAZP'])
+    assert stub.request_list == [('SBER', Period.DAY, date(2019, 2, 11), yesterday)]
+    assert result['GAZP'] is None
+    assert result['SBER'].dt_left == date(2019, 2, 11) and result['SBER'].row_count > 0
+    assert store.covers('SBER', Period.DAY, date(2019, 2, 1), yesterday)
+
+    # Хранилище актуально - повторное обновление не запрашивает курсы
+    stub.request_list.clear()
+    assert update_price(['SBER']) == {'SBER': None}
+    assert stub.request_list == []
+
+
+def test_since(stub, store):
+    """
+    Эмитент без курсов в хранилище обновляется с даты начала истории, ошибка эмитента не прерывает обновление
+    остальных
+    """
+
+    dt_first = date.today() - timedelta(days=10)
+    result = update_price(['GAZP', 'UNKNOWN'], dt_first=dt_first)
+
+    assert isinstance(result['UNKNOWN'], NotFoundIssuer)
+    assert result['GAZP'] == Update(dt_first, date.today() - timedelta(days=1), result['GAZP'].row_count)
+    assert store.get_last_date('GAZP', Period.DAY) == date.today() - timedelta(days=1)
+
+
+def test_errors(stub, store):
+    """
+    Обновление невозможно без хранилища и для детализации больше дня
+    """
+
+    with pytest.raises(UpdateError):
+        update_price(['SBER'], Period.WEEK)
+
+    from src.equities.price_store import set_price_store
+    set_price_store(None)
+    with pytest.raises(UpdateError):
+        update_price(['SBER'])
+
+
+def test_main(stub, capsys):
+    """
+    Запуск по расписанию включает хранилище, код завершения 1 - при ошибке обновления эмитента
+    """
+
+    since = (date.today() - timedelta(days=5)).strftime('%d.%m.%y')
+    assert main(['--since', since, 'SBER', 'UNKNOWN']) == 1
+
+    line_list = capsys.readouterr().out.splitlines()
+    assert line_list[0].startswith('SBER: +') and line_list[1] == 'UNKNOWN: Ошибка! NotFoundIssuer'
+    assert line_list[-1].startswith('Обновлено эмитентов "') and line_list[-1].endswith('с ошибкой "1"')
+
+    assert main(['SBER']) == 0